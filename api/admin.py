@@ -1,30 +1,155 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Max
+from django.utils.functional import cached_property
 
-from .models import Category, Comment, Genre, Review, Title
+from .models import (
+    Category,
+    Comment,
+    Genre,
+    ModerationAudit,
+    Review,
+    Title,
+)
+
+# below this size an exact COUNT(*) is cheap enough
+ESTIMATE_COUNT_THRESHOLD = 10000
+
+
+def estimate_count(model):
+    """
+    Row count of the model table taken from the planner statistics
+    (PostgreSQL) or the highest primary key, without a full scan.
+    """
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+                [model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+    return model._default_manager.aggregate(estimate=Max("pk"))["estimate"]
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Admin paginator that does not count large unfiltered tables:
+    filtered changelists still get an exact count.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_count(queryset.model)
+            if estimate is not None and estimate > ESTIMATE_COUNT_THRESHOLD:
+                return estimate
+        return super().count
+
+
+class InputFilter(admin.SimpleListFilter):
+    """
+    List filter rendered as a text input instead of a link per
+    related row.
+    """
+
+    template = "admin/input_filter.html"
+
+    def lookups(self, request, model_admin):
+        # at least one lookup is required for the filter to be shown
+        return ((None, None),)
+
+    def choices(self, changelist):
+        all_choice = next(super().choices(changelist))
+        all_choice["query_parts"] = (
+            (key, value)
+            for key, value in changelist.get_filters_params().items()
+            if key != self.parameter_name
+        )
+        yield all_choice
+
+
+class TitleInputFilter(InputFilter):
+    title = "произведение"
+    parameter_name = "title"
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if not value:
+            return queryset
+        if value.isdigit():
+            return queryset.filter(title_id=value)
+        return queryset.filter(title__name__istartswith=value)
+
+
+class ReviewInputFilter(InputFilter):
+    title = "отзыв (id)"
+    parameter_name = "review"
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if not value or not value.isdigit():
+            return queryset
+        return queryset.filter(review_id=value)
 
 
 class CommentAdmin(admin.ModelAdmin):
     list_display = ("pk", "text", "pub_date", "author", "review")
-    search_fields = ("text", "author", "review")
+    list_select_related = ("author", "review__author", "review__title")
+    search_fields = ("^author__username",)
     list_filter = (
         "pub_date",
-        "review",
+        "is_hidden",
+        ReviewInputFilter,
     )
+    raw_id_fields = ("author", "review")
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = "-пусто-"
 
 
 class ReviewtAdmin(admin.ModelAdmin):
     list_display = ("pk", "text", "pub_date", "author", "title", "score")
-    search_fields = ("text", "author", "title")
+    list_select_related = ("author", "title")
+    search_fields = ("^author__username", "^title__name")
     list_filter = (
         "pub_date",
-        "title",
+        "is_hidden",
+        TitleInputFilter,
     )
+    raw_id_fields = ("author",)
+    autocomplete_fields = ("title",)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = "-пусто-"
 
 
+class ModerationAuditAdmin(admin.ModelAdmin):
+    list_display = (
+        "pk",
+        "created",
+        "moderator",
+        "action",
+        "target",
+        "affected",
+        "criteria",
+    )
+    list_select_related = ("moderator",)
+    list_filter = ("action", "target")
+    raw_id_fields = ("moderator",)
+
+
+class TitleAdmin(admin.ModelAdmin):
+    list_display = ("pk", "name", "year", "category")
+    list_select_related = ("category",)
+    search_fields = ("^name",)
+
+
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Review, ReviewtAdmin)
 admin.site.register(Category)
 admin.site.register(Genre)
-admin.site.register(Title)
+admin.site.register(Title, TitleAdmin)
+admin.site.register(ModerationAudit, ModerationAuditAdmin)
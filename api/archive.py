@@ -0,0 +1,161 @@
+"""
+Comment archival: comments older than COMMENT_ARCHIVE_AFTER move to
+ArchivedComment so the hot comment table (and its indexes) stays small.
+Comment lists read the archive only once a page reaches past the live
+comments of the review. Archived comments are moderated, edited and
+deleted like live ones; `Review.archived_comments_count` counts the
+visible ones (not hidden, deleted nor written by a deleted author).
+"""
+
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import ArchivedComment, Comment, Review
+
+
+def archive_comments(older_than=None, batch_size=None):
+    """
+    Move visible comments older than the horizon to the archive, one
+    batch per transaction. Returns the number of archived comments.
+    """
+    if older_than is None:
+        older_than = settings.COMMENT_ARCHIVE_AFTER
+    batch_size = batch_size or settings.COMMENT_ARCHIVE_BATCH_SIZE
+    cutoff = timezone.now() - older_than
+    queryset = (
+        Comment.objects.visible()
+        .filter(pub_date__lt=cutoff)
+        .order_by("pub_date", "id")
+    )
+    archived = 0
+    while True:
+        with transaction.atomic():
+            comments = list(queryset[:batch_size])
+            if not comments:
+                return archived
+            ArchivedComment.objects.bulk_create(
+                ArchivedComment(
+                    id=comment.pk,
+                    text=comment.text,
+                    author_id=comment.author_id,
+                    author_username=comment.author_username,
+                    review_id=comment.review_id,
+                    pub_date=comment.pub_date,
+                )
+                for comment in comments
+            )
+            Comment.objects.filter(
+                pk__in=[comment.pk for comment in comments]
+            ).delete()
+            per_review = Counter(comment.review_id for comment in comments)
+            for review_id, count in per_review.items():
+                Review.objects.filter(pk=review_id).update(
+                    archived_comments_count=F("archived_comments_count")
+                    + count
+                )
+        archived += len(comments)
+
+
+def uncount_archived(queryset):
+    """
+    Take the archived comments of `queryset` out of the
+    `archived_comments_count` of their reviews. Call it in the
+    transaction that hides or deletes them.
+    """
+    per_review = (
+        queryset.order_by().values("review_id").annotate(count=Count("pk"))
+    )
+    for row in per_review:
+        Review.objects.filter(pk=row["review_id"]).update(
+            archived_comments_count=F("archived_comments_count")
+            - row["count"]
+        )
+
+
+def recount_archived(review_ids):
+    """
+    Recompute `archived_comments_count` of the reviews, in one UPDATE;
+    call it after hiding, unhiding or deleting archived comments.
+    """
+    visible = (
+        ArchivedComment.objects.visible()
+        .filter(review_id=OuterRef("pk"))
+        .order_by()
+        .values("review_id")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    return Review.objects.filter(pk__in=review_ids).update(
+        archived_comments_count=Coalesce(Subquery(visible), 0)
+    )
+
+
+class LiveAndArchive:
+    """
+    Sliceable list of a review's comments, newest first: the live
+    comments followed by the archived ones. The archive is queried only
+    for slices reaching past the live comments.
+    """
+
+    def __init__(self, live, archive, archived_count):
+        self.live = live
+        self.archive = archive
+        self.archived_count = archived_count
+        self.live_count = None
+
+    def count(self):
+        if self.live_count is None:
+            self.live_count = self.live.count()
+        return self.live_count + self.archived_count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        start, stop = key.start or 0, key.stop
+        self.count()
+        rows = []
+        if start < self.live_count:
+            live_stop = min(stop, self.live_count)
+            rows += list(self.live[start:live_stop])
+        if stop > self.live_count and self.archived_count:
+            archive_start = max(start - self.live_count, 0)
+            archive_stop = stop - self.live_count
+            rows += list(self.archive[archive_start:archive_stop])
+        return rows
+
+
+class LiveAndArchiveHistory:
+    """
+    An author's live and archived comments as one queryset-like list
+    for HistoryPagination: `filter` and `order_by` apply to both tables,
+    a slice reads at most its stop from each and merges them by the
+    ordering (every ordering field must go the same direction).
+    """
+
+    def __init__(self, live, archive, ordering=()):
+        self.querysets = [live, archive]
+        self.ordering = ordering
+
+    def filter(self, *args, **kwargs):
+        live, archive = (q.filter(*args, **kwargs) for q in self.querysets)
+        return LiveAndArchiveHistory(live, archive, self.ordering)
+
+    def order_by(self, *ordering):
+        live, archive = (q.order_by(*ordering) for q in self.querysets)
+        return LiveAndArchiveHistory(live, archive, ordering)
+
+    def __getitem__(self, key):
+        stop = key.stop
+        rows = [row for q in self.querysets for row in q[:stop]]
+        fields = [field.lstrip("-") for field in self.ordering]
+        rows.sort(
+            key=lambda row: [getattr(row, field) for field in fields],
+            reverse=self.ordering[0].startswith("-"),
+        )
+        return rows[key]
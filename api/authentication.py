@@ -0,0 +1,22 @@
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from . import hotqueries
+
+
+class PreparedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication loading the token's user with a prepared query
+    (api.hotqueries) when HOT_QUERIES is on. Missing and inactive users
+    go through the regular lookup, which raises the usual errors.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if not settings.HOT_QUERIES or user_id is None:
+            return super().get_user(validated_token)
+        user = hotqueries.jwt_user.first(user_id=user_id)
+        if user is None or not user.is_active:
+            return super().get_user(validated_token)
+        return user
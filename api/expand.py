@@ -0,0 +1,148 @@
+"""
+`?expand=reviews,comments` on the title detail: the first reviews of
+the title and the first comments of each of them, in a fixed number of
+queries whatever the number of reviews.
+"""
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, F, Window
+from django.db.models.functions import RowNumber
+from rest_framework.exceptions import ValidationError
+
+from .models import ArchivedComment, Comment, Review
+from .serializers import CommentSerializer, ReviewSerializer
+
+EXPANSIONS = ("reviews", "comments")
+
+
+def parse_expand(value):
+    """Set of requested expansions, `comments` implies `reviews`."""
+    expand = {part.strip() for part in value.split(",") if part.strip()}
+    unknown = expand.difference(EXPANSIONS)
+    if unknown:
+        raise ValidationError(
+            {"expand": f"unknown expansion: {', '.join(sorted(unknown))}"}
+        )
+    if "comments" in expand:
+        expand.add("reviews")
+    return expand
+
+
+def first_reviews(title_id, limit):
+    """The first reviews and the archived comment count of each."""
+    rows = list(
+        Review.objects.visible()
+        .filter(title_id=title_id)
+        .order_by("-pub_date", "-id")
+        .values(*ReviewSerializer.values_fields, "archived_comments_count")[
+            :limit
+        ]
+    )
+    archived = {row["id"]: row["archived_comments_count"] for row in rows}
+    return ReviewSerializer.represent_rows(rows), archived
+
+
+def ranked_comments(queryset, limit):
+    """
+    {review id: (comment count, first `limit` rows)} of a comment
+    queryset in one query: comments are numbered per review with
+    ROW_NUMBER() and only the first ones leave the database.
+    """
+    comments = {}
+    fields = CommentSerializer.values_fields
+    if not connection.features.supports_over_clause:
+        rows = queryset.order_by("review", "-pub_date", "-id").values(*fields)
+        for row in rows:
+            count, results = comments.get(row["review"], (0, []))
+            if len(results) < limit:
+                results.append(row)
+            comments[row["review"]] = (count + 1, results)
+        return comments
+
+    partition = {"partition_by": [F("review_id")]}
+    queryset = (
+        queryset.order_by()
+        .annotate(
+            position=Window(
+                RowNumber(),
+                order_by=[F("pub_date").desc(), F("id").desc()],
+                **partition,
+            ),
+            total=Window(Count("id"), **partition),
+        )
+        .values(*fields, "position", "total")
+    )
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT * FROM ({sql}) ranked WHERE position <= %s "
+            f"ORDER BY position",
+            (*params, limit),
+        )
+        for values in cursor.fetchall():
+            row = dict(zip(fields, values))
+            _, results = comments.get(row["review"], (0, []))
+            results.append(row)
+            comments[row["review"]] = (values[-1], results)
+    return comments
+
+
+def first_comments(review_ids, limit, archived=None):
+    """
+    {review id: {"count", "results"}} of the given reviews, like the
+    first page of their comment lists. Archived comments are read (in
+    one more query) only for reviews with fewer live comments than
+    `limit`.
+    """
+    archived = archived or {}
+    comments = {review_id: (0, []) for review_id in review_ids}
+    if review_ids:
+        comments.update(
+            ranked_comments(
+                Comment.objects.visible().filter(review_id__in=review_ids),
+                limit,
+            )
+        )
+    short = [
+        review_id
+        for review_id in review_ids
+        if archived.get(review_id) and len(comments[review_id][1]) < limit
+    ]
+    if short:
+        older = ranked_comments(
+            ArchivedComment.objects.visible().filter(review_id__in=short),
+            limit,
+        )
+        for review_id, (_, rows) in older.items():
+            count, results = comments[review_id]
+            missing = limit - len(results)
+            comments[review_id] = (count, results + rows[:missing])
+
+    return {
+        review_id: {
+            "count": count + archived.get(review_id, 0),
+            "results": CommentSerializer.represent_rows(rows),
+        }
+        for review_id, (count, rows) in comments.items()
+    }
+
+
+def expand_title(data, title_id, reviews_count, expand):
+    """Add the requested expansions to a serialized title."""
+    if "reviews" not in expand:
+        return data
+    reviews, archived = first_reviews(title_id, settings.TITLE_EXPAND_REVIEWS)
+    data["reviews"] = {
+        "count": reviews_count or 0,
+        "results": reviews,
+    }
+    if "comments" in expand:
+        comments = first_comments(
+            [review["id"] for review in reviews],
+            settings.TITLE_EXPAND_COMMENTS,
+            archived,
+        )
+        for review in reviews:
+            review["comments"] = comments[review["id"]]
+    return data
@@ -1,14 +1,132 @@
+from django.db.models import Exists, F, OuterRef
 from django_filters import rest_framework as filters
+from rest_framework.filters import OrderingFilter, SearchFilter
 
-from .models import Title
+from users.search import search_users
+
+from .models import Title, TitleRanking
+from .slugs import category_slugs, genre_slugs
+
+GENRE_MODES = (("any", "any"), ("all", "all"))
+
+
+def split_slugs(value):
+    return sorted({slug.strip() for slug in value.split(",") if slug.strip()})
 
 
 class TitleFilter(filters.FilterSet):
-    genre = filters.CharFilter(field_name="genre__slug")
-    category = filters.CharFilter(field_name="category__slug")
+    """
+    `?genre=` and `?category=` take one or more comma separated slugs;
+    `genre_mode=all` keeps titles having every genre (default: any).
+    Slugs are resolved to ids through the slug maps, categories are
+    matched on the indexed category_id and genres with subqueries on
+    the genre-title table, titles are never joined to either.
+    `year_min`/`year_max` are ranges on the indexed year and
+    `rating_min` compares the stored rating of the title ranking.
+    """
+
+    genre = filters.CharFilter(method="filter_genre")
+    genre_mode = filters.ChoiceFilter(
+        choices=GENRE_MODES, method="filter_genre_mode"
+    )
+    category = filters.CharFilter(method="filter_category")
     name = filters.CharFilter(field_name="name", lookup_expr="icontains")
     year = filters.NumberFilter(field_name="year")
+    year_min = filters.NumberFilter(field_name="year", lookup_expr="gte")
+    year_max = filters.NumberFilter(field_name="year", lookup_expr="lte")
+    rating_min = filters.NumberFilter(method="filter_rating_min")
 
     class Meta:
         model = Title
         fields = ["category", "genre", "name", "year"]
+
+    def filter_category(self, queryset, name, value):
+        slugs = split_slugs(value)
+        if not slugs:
+            return queryset
+        categories = [category_slugs.get(slug) for slug in slugs]
+        ids = [category.pk for category in categories if category]
+        if not ids:
+            return queryset.none()
+        return queryset.filter(category_id__in=ids)
+
+    def filter_rating_min(self, queryset, name, value):
+        # a subquery on the indexed rating: joined, the planner walks
+        # every title in id order and looks up its ranking
+        rankings = TitleRanking.objects.filter(rating__gte=value)
+        return queryset.filter(pk__in=rankings.values("title_id"))
+
+    def filter_genre(self, queryset, name, value):
+        slugs = split_slugs(value)
+        if not slugs:
+            return queryset
+        genres = [genre_slugs.get(slug) for slug in slugs]
+        ids = [genre.pk for genre in genres if genre is not None]
+        through = Title.genre.through.objects
+        if self.form.cleaned_data.get("genre_mode") == "all":
+            if len(ids) < len(genres):
+                return queryset.none()
+            for genre_id in ids:
+                queryset = queryset.filter(
+                    Exists(
+                        through.filter(
+                            title_id=OuterRef("pk"), genre_id=genre_id
+                        )
+                    )
+                )
+            return queryset
+        if not ids:
+            return queryset.none()
+        return queryset.filter(
+            pk__in=through.filter(genre_id__in=ids).values("title_id")
+        )
+
+    def filter_genre_mode(self, queryset, name, value):
+        # read by filter_genre
+        return queryset
+
+
+class TitleOrderingFilter(OrderingFilter):
+    """
+    `?ordering=rating` sorts by the precomputed ranking instead of
+    aggregating reviews, titles without reviews always go last.
+    """
+
+    ordering_fields = ["rating", "name", "year"]
+    rating_field = "ranking__weighted_rating"
+
+    def get_valid_fields(self, queryset, view, context={}):
+        return [(field, field) for field in self.ordering_fields]
+
+    def filter_queryset(self, request, queryset, view):
+        ordering = self.get_ordering(request, queryset, view)
+        if not ordering:
+            return queryset
+
+        expressions = []
+        for field in ordering:
+            descending = field.startswith("-")
+            name = field.lstrip("-")
+            if name == "rating":
+                name = self.rating_field
+            expression = F(name)
+            expressions.append(
+                expression.desc(nulls_last=True)
+                if descending
+                else expression.asc(nulls_last=True)
+            )
+        return queryset.order_by(*expressions, "id")
+
+
+class UserSearchFilter(SearchFilter):
+    """
+    `?search=` on users through the indexed prefix/trigram search
+    instead of `LIKE '%term%'` scans.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        fields = getattr(view, "search_fields", None)
+        term = " ".join(self.get_search_terms(request))
+        if not fields or not term:
+            return queryset
+        return search_users(queryset, term, fields)
@@ -0,0 +1,113 @@
+"""
+Read cache of the hottest per-title responses (title detail and the
+first page of its reviews) with request coalescing. An entry is fresh
+for the endpoint's TTL and then served stale for a while longer; in
+both a miss and a stale hit only the request holding the key's lock
+recomputes, the others wait for it (miss) or get the stale copy.
+
+Every title has a version token in the cache, writers bump it (after
+their transaction commits) and entries of an older version are never
+served. A change is visible to the next read of every process using
+the same cache: with several worker processes HOT_CACHE must name a
+cache shared by them, a local-memory cache only sees the writes of its
+own process (gunicorn.conf.py refuses to start workers that way).
+"""
+
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from . import metrics
+
+GLOBAL_VERSION_KEY = "hot:version"
+# how often a waiting request looks for the entry being recomputed
+POLL_INTERVAL = 0.02
+
+
+def get_cache():
+    return caches[settings.HOT_CACHE]
+
+
+def version_key(title_id):
+    return f"hot:title:{title_id}:version"
+
+
+def current_version(title_id):
+    """Version of the title's entries: global token and title token."""
+    cache = get_cache()
+    keys = [GLOBAL_VERSION_KEY, version_key(title_id)]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, uuid.uuid4().hex, None)
+            versions[key] = cache.get(key)
+    return ":".join(versions[key] for key in keys)
+
+
+def invalidate_titles(title_ids):
+    """Drop the cached responses of the titles once the writes commit."""
+    keys = {version_key(title_id): uuid.uuid4().hex for title_id in title_ids}
+    if keys:
+        transaction.on_commit(lambda: get_cache().set_many(keys, None))
+
+
+def invalidate_all():
+    """For writes showing up in every title (usernames, genres, ...)."""
+    transaction.on_commit(
+        lambda: get_cache().set(GLOBAL_VERSION_KEY, uuid.uuid4().hex, None)
+    )
+
+
+def recompute(cache, key, lock_key, token, version, compute, ttls):
+    try:
+        data = compute()
+        fresh, stale = ttls
+        cache.set(key, (version, data, time.time() + fresh), fresh + stale)
+        return data
+    finally:
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+
+
+def cached(endpoint, title_id, variant, compute):
+    """
+    Data of `endpoint` for the title (`variant` tells apart e.g. query
+    strings) from the cache, `compute()` builds it on a miss. Endpoints
+    without HOT_CACHE_TTLS always compute.
+    """
+    ttls = settings.HOT_CACHE_TTLS.get(endpoint)
+    if not ttls:
+        return compute()
+    cache = get_cache()
+    version = current_version(title_id)
+    key = f"hot:{endpoint}:{title_id}:{variant}"
+    lock_key = f"{key}:lock"
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + settings.HOT_CACHE_WAIT
+    while True:
+        entry = cache.get(key)
+        if entry is not None and entry[0] == version:
+            _, data, fresh_until = entry
+            if time.time() < fresh_until:
+                metrics.cache_access("hot_titles", True)
+                return data
+            if not cache.add(lock_key, token, settings.HOT_CACHE_WAIT):
+                # someone is already refreshing it
+                metrics.inc(
+                    "yamdb_cache_requests_total",
+                    cache="hot_titles",
+                    result="stale",
+                )
+                return data
+        elif not cache.add(lock_key, token, settings.HOT_CACHE_WAIT):
+            if time.monotonic() < deadline:
+                time.sleep(POLL_INTERVAL)
+                continue
+            # the recomputing request is too slow, do not wait forever
+            metrics.cache_access("hot_titles", False)
+            return compute()
+        metrics.cache_access("hot_titles", False)
+        return recompute(cache, key, lock_key, token, version, compute, ttls)
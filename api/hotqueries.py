@@ -0,0 +1,247 @@
+"""
+Hot queries compiled once per process. The ORM builds and compiles the
+SQL of every queryset on each request; the few queries run by almost
+every request (title page, review and comment pages, the JWT user
+lookup) are defined here as PreparedQuery objects instead. A prepared
+query compiles its queryset the first time it runs and afterwards only
+binds the parameters, executes the statement and applies the
+compiler's converters to the rows.
+"""
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import F
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import ArchivedComment, Comment, Review, Title
+from .serializers import (
+    CommentSerializer,
+    ReviewSerializer,
+    TitleGetSerializer,
+    User,
+)
+
+# placeholder values the database never sees: they are swapped for the
+# real parameters before a statement runs. The string marker holds LIKE
+# wildcards, a backslash and mixed case, so any lookup escaping or
+# folding its value changes it (see check_markers)
+INT_MARKER = -(10**15)
+MARKER_TAG = "\x00Param%_\\"
+STR_MARKER = MARKER_TAG + ":{}\x00"
+
+
+class Slot(str):
+    """Name of a parameter in the parameter list of a statement."""
+
+
+def check_markers(markers, params):
+    """
+    Every marker must reach the statement exactly once and unchanged: a
+    lookup transforming its value (`__iexact`, `__contains`, dates...)
+    would otherwise send the marker itself to the database.
+    """
+    for name, marker in markers.items():
+        found = sum(
+            1
+            for param in params
+            if type(param) is type(marker) and param == marker
+        )
+        if found != 1:
+            raise ValueError(
+                f"parameter {name!r} appears {found} times unchanged in "
+                "the statement, prepared queries take plain lookups only"
+            )
+    for param in params:
+        if isinstance(param, str) and MARKER_TAG.lower() in param.lower():
+            if param not in markers.values():
+                raise ValueError(
+                    f"parameter {param!r} was transformed by its lookup"
+                )
+
+
+class PreparedQuery:
+    """
+    `build(**params)` returns the queryset; `params` maps every
+    parameter name to int or str. `.values()` querysets give dicts,
+    model querysets give instances.
+    """
+
+    def __init__(self, build, **params):
+        self.build = build
+        self.params = params
+        self.statement = None
+
+    def markers(self):
+        return {
+            name: INT_MARKER - i if kind is int else STR_MARKER.format(name)
+            for i, (name, kind) in enumerate(self.params.items())
+        }
+
+    def compile(self):
+        markers = self.markers()
+        queryset = self.build(**markers)
+        query = queryset.query
+        compiler = query.get_compiler(DEFAULT_DB_ALIAS)
+        sql, params = compiler.as_sql()
+        check_markers(markers, params)
+        slots = {marker: Slot(name) for name, marker in markers.items()}
+
+        def parameters(params):
+            return [
+                (
+                    slots.get(param, param)
+                    if isinstance(param, (int, str))
+                    else param
+                )
+                for param in params
+            ]
+
+        fields = [
+            column[0] for column in compiler.select[: compiler.col_count]
+        ]
+        if queryset._fields is None:
+            model = queryset.model
+            names = [
+                compiler.select[i][0].target.attname
+                for i in compiler.klass_info["select_fields"]
+            ]
+        else:
+            model = None
+            names = [
+                *query.extra_select,
+                *query.values_select,
+                *query.annotation_select,
+            ]
+        count_sql, count_params = (
+            queryset.order_by().query.get_compiler(DEFAULT_DB_ALIAS).as_sql()
+        )
+        self.statement = {
+            "sql": sql,
+            "params": parameters(params),
+            "count_sql": f"SELECT COUNT(*) FROM ({count_sql}) subquery",
+            "count_params": parameters(count_params),
+            "converters": list(compiler.get_converters(fields).items()),
+            "model": model,
+            "names": names,
+        }
+        return self.statement
+
+    def bind(self, **params):
+        return BoundQuery(self.statement or self.compile(), params)
+
+    def first(self, **params):
+        rows = self.bind(**params)[0:1]
+        return rows[0] if rows else None
+
+
+class BoundQuery:
+    """A prepared query with its parameters, sliceable like a queryset."""
+
+    def __init__(self, statement, params):
+        self.statement = statement
+        self.params = params
+        self.total = None
+
+    def bound_params(self, params):
+        return [
+            self.params[param] if isinstance(param, Slot) else param
+            for param in params
+        ]
+
+    def execute(self, sql, params):
+        with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            cursor.execute(sql, self.bound_params(params))
+            return cursor.fetchall()
+
+    def count(self):
+        if self.total is None:
+            self.total = self.execute(
+                self.statement["count_sql"], self.statement["count_params"]
+            )[0][0]
+        return self.total
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        connection = connections[DEFAULT_DB_ALIAS]
+        start, stop = key.start or 0, key.stop
+        limit = connection.ops.limit_offset_sql(start, stop)
+        rows = self.execute(
+            f"{self.statement['sql']} {limit}", self.statement["params"]
+        )
+        converters = self.statement["converters"]
+        if converters:
+            rows = list(map(list, rows))
+            for row in rows:
+                for position, (functions, expression) in converters:
+                    for function in functions:
+                        row[position] = function(
+                            row[position], expression, connection
+                        )
+        names = self.statement["names"]
+        model = self.statement["model"]
+        if model is not None:
+            return [
+                model.from_db(DEFAULT_DB_ALIAS, names, row) for row in rows
+            ]
+        return [dict(zip(names, row)) for row in rows]
+
+
+title_detail = PreparedQuery(
+    lambda title_id: Title.objects.annotate(
+        rating=F("ranking__rating"),
+        reviews_count=F("ranking__reviews_count"),
+    )
+    .filter(pk=title_id)
+    .values(*TitleGetSerializer.values_fields, "reviews_count"),
+    title_id=int,
+)
+
+title_genres = PreparedQuery(
+    lambda title_id: Title.genre.through.objects.filter(title_id=title_id)
+    .order_by("genre_id")
+    .values("genre__name", "genre__slug"),
+    title_id=int,
+)
+
+title_exists = PreparedQuery(
+    lambda title_id: Title.objects.filter(pk=title_id).values("id"),
+    title_id=int,
+)
+
+review_page = PreparedQuery(
+    lambda title_id: Review.objects.visible()
+    .filter(title_id=title_id)
+    .values(*ReviewSerializer.values_fields),
+    title_id=int,
+)
+
+comment_review = PreparedQuery(
+    lambda review_id, title_id: Review.objects.visible()
+    .filter(pk=review_id, title_id=title_id)
+    .values("archived_comments_count"),
+    review_id=int,
+    title_id=int,
+)
+
+comment_page = PreparedQuery(
+    lambda review_id: Comment.objects.visible()
+    .filter(review_id=review_id)
+    .values(*CommentSerializer.values_fields),
+    review_id=int,
+)
+
+archived_comment_page = PreparedQuery(
+    lambda review_id: ArchivedComment.objects.visible()
+    .filter(review_id=review_id)
+    .values(*CommentSerializer.values_fields),
+    review_id=int,
+)
+
+# USER_ID_FIELD is the email
+jwt_user = PreparedQuery(
+    lambda user_id: User.objects.filter(
+        **{api_settings.USER_ID_FIELD: user_id}
+    ),
+    user_id=str,
+)
@@ -0,0 +1,110 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+
+from .models import QueuedReview, Review
+from .rankings import refresh_title_rankings
+
+User = get_user_model()
+
+DUPLICATE_ERROR = "Вы не можете оставить еще один отзыв"
+DELETED_AUTHOR_ERROR = "Автор отзыва удалён"
+
+
+def enqueue_review(title, author, validated_data):
+    """Store an already validated review for the flusher."""
+    return QueuedReview.objects.create(
+        title=title,
+        author=author,
+        score=validated_data["score"],
+        text=validated_data.get("text"),
+    )
+
+
+def reject_queued_reviews(author):
+    """Reject the reviews of a deleted author still waiting for a flush."""
+    return QueuedReview.objects.filter(
+        author=author, status=QueuedReview.Status.PENDING
+    ).update(status=QueuedReview.Status.REJECTED, error=DELETED_AUTHOR_ERROR)
+
+
+def flush_review_queue(batch_size=None):
+    """
+    Write one batch of queued reviews: a single duplicate check, one
+    bulk_create and one rating refresh per title. Reviews of duplicate
+    or deleted authors are rejected. Returns the number of accepted and
+    rejected reviews.
+    """
+    batch_size = batch_size or settings.REVIEW_INGESTION_BATCH_SIZE
+    with transaction.atomic():
+        queued = QueuedReview.objects.filter(
+            status=QueuedReview.Status.PENDING
+        )
+        if connection.features.has_select_for_update_skip_locked:
+            queued = queued.select_for_update(skip_locked=True)
+        queued = list(queued[:batch_size])
+        if not queued:
+            return 0, 0
+
+        taken = set(
+            Review.objects.filter(
+                title_id__in={q.title_id for q in queued},
+                author_id__in={q.author_id for q in queued},
+                deleted_at=None,
+            ).values_list("title_id", "author_id")
+        )
+        # authors soft-deleted after queueing
+        usernames = dict(
+            User.all_objects.filter(
+                pk__in={item.author_id for item in queued}, deleted_at=None
+            ).values_list("pk", "username")
+        )
+        accepted, rejected, orphaned = [], [], []
+        for item in queued:
+            key = (item.title_id, item.author_id)
+            if item.author_id not in usernames:
+                orphaned.append(item.pk)
+                continue
+            if key in taken:
+                rejected.append(item.pk)
+                continue
+            taken.add(key)
+            accepted.append(item)
+
+        Review.objects.bulk_create(
+            [
+                Review(
+                    title_id=item.title_id,
+                    author_id=item.author_id,
+                    author_username=usernames[item.author_id],
+                    score=item.score,
+                    text=item.text,
+                )
+                for item in accepted
+            ],
+            batch_size=batch_size,
+        )
+        QueuedReview.objects.filter(
+            pk__in=[item.pk for item in accepted]
+        ).update(status=QueuedReview.Status.ACCEPTED)
+        QueuedReview.objects.filter(pk__in=rejected).update(
+            status=QueuedReview.Status.REJECTED, error=DUPLICATE_ERROR
+        )
+        QueuedReview.objects.filter(pk__in=orphaned).update(
+            status=QueuedReview.Status.REJECTED, error=DELETED_AUTHOR_ERROR
+        )
+        refresh_title_rankings({item.title_id for item in accepted})
+    return len(accepted), len(rejected) + len(orphaned)
+
+
+def run_flusher(interval, batch_size=None, once=False):
+    """Flush the queue until it is empty, then poll every `interval`."""
+    while True:
+        accepted, rejected = flush_review_queue(batch_size)
+        if accepted or rejected:
+            continue
+        if once:
+            return
+        time.sleep(interval)
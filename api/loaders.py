@@ -0,0 +1,332 @@
+import csv
+import os
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils.dateparse import parse_datetime
+
+from users.search import index_users, normalize
+
+from .models import Category, Comment, Genre, Review, Title
+from .rankings import refresh_title_rankings
+
+User = get_user_model()
+
+# file name of every table in the data/ directory
+CSV_FILES = {
+    "users": "users.csv",
+    "categories": "category.csv",
+    "genres": "genre.csv",
+    "titles": "titles.csv",
+    "genre_titles": "genre_title.csv",
+    "reviews": "review.csv",
+    "comments": "comments.csv",
+}
+TABLES = list(CSV_FILES)
+
+
+class LoadError(Exception):
+    pass
+
+
+@contextmanager
+def keep_pub_date(*models):
+    """Let bulk inserts keep the pub_date of the source rows."""
+    fields = [model._meta.get_field("pub_date") for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def read_csv(path):
+    with open(path, encoding="utf-8", newline="") as source:
+        yield from csv.DictReader(source)
+
+
+def csv_tables(directory):
+    return {
+        table: read_csv(os.path.join(directory, name))
+        for table, name in CSV_FILES.items()
+    }
+
+
+class BulkLoader:
+    """
+    Loads source rows (dicts keyed like the data/*.csv columns) into
+    the database in batches. Rows get fresh primary keys and foreign
+    keys are resolved through the ids assigned to the source rows, so
+    the same data can be loaded several times (`copy` keeps usernames,
+    emails, slugs and titles of every copy distinct). In dry-run mode
+    rows are only validated and errors are collected; usernames and
+    emails taken in the database or earlier in the load are errors in
+    both modes. Rows that would break a uniqueness rule (a second
+    review of the same author) are skipped and reported.
+    """
+
+    def __init__(self, batch_size=1000, dry_run=False):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.errors = []
+        self.skipped = []
+        self.counts = {table: 0 for table in TABLES}
+        self.ids = {table: {} for table in TABLES}
+        self.next_ids = {}
+        self.review_pairs = set()
+        self.title_ids = set()
+        self.slugs = {}
+        self.usernames = {}
+        self.claimed = {"username": set(), "email": set()}
+        self.copy = 0
+
+    def next_id(self, model):
+        if model not in self.next_ids:
+            last = model._base_manager.aggregate(last=Max("pk"))["last"]
+            self.next_ids[model] = (last or 0) + 1
+        pk = self.next_ids[model]
+        self.next_ids[model] += 1
+        return pk
+
+    def error(self, table, row, message):
+        self.errors.append(f"{table} {row.get('id', '?')}: {message}")
+
+    def resolve(self, table, row, target, key):
+        source_id = row.get(key)
+        pk = self.ids[target].get((self.copy, source_id))
+        if pk is None:
+            pk = self.ids[target].get((None, source_id))
+        if pk is None:
+            self.error(table, row, f"unknown {key} {source_id}")
+        return pk
+
+    def suffix(self, value, separator):
+        return value if not self.copy else f"{value}{separator}{self.copy}"
+
+    def claim(self, table, row, field, value):
+        """False (and an error) if an earlier row already has the value."""
+        if value in self.claimed[field]:
+            self.error(table, row, f"duplicate {field} {value}")
+            return False
+        self.claimed[field].add(value)
+        return True
+
+    def build_user(self, row):
+        local, _, domain = row["email"].partition("@")
+        username = self.suffix(row["username"], "_")
+        email = f"{self.suffix(local, '+')}@{domain}"
+        free = self.claim("users", row, "username", username)
+        if not self.claim("users", row, "email", email) or not free:
+            return None
+        pk = self.next_id(User)
+        self.usernames[pk] = username
+        user = User(
+            id=pk,
+            username=username,
+            email=email,
+            role=row.get("role") or User.Role.USER,
+            bio=row.get("description") or row.get("bio") or None,
+            first_name=row.get("first_name") or "",
+            last_name=row.get("last_name") or "",
+            is_active=True,
+            password=make_password(None),
+        )
+        normalize(user)
+        return user
+
+    def existing_slugs(self, model):
+        if model not in self.slugs:
+            self.slugs[model] = dict(
+                model.objects.values_list("slug", "id").iterator()
+            )
+        return self.slugs[model]
+
+    def build_slug_object(self, table, model, row):
+        # categories and genres already in the database are reused
+        existing = self.existing_slugs(model).get(row["slug"])
+        if existing is not None:
+            self.ids[table][(None, row.get("id"))] = existing
+            return None
+        obj = model(
+            id=self.next_id(model), name=row["name"], slug=row["slug"]
+        )
+        # a slug repeated in the source is reused like an existing one
+        self.existing_slugs(model)[row["slug"]] = obj.pk
+        return obj
+
+    def build_category(self, row):
+        return self.build_slug_object("categories", Category, row)
+
+    def build_genre(self, row):
+        return self.build_slug_object("genres", Genre, row)
+
+    def build_title(self, row):
+        category_id = None
+        if row.get("category"):
+            category_id = self.resolve(
+                "titles", row, "categories", "category"
+            )
+        pk = self.next_id(Title)
+        self.title_ids.add(pk)
+        return Title(
+            id=pk,
+            name=self.suffix(row["name"], " #"),
+            year=int(row["year"]),
+            description=row.get("description") or None,
+            category_id=category_id,
+        )
+
+    def build_genre_title(self, row):
+        return Title.genre.through(
+            title_id=self.resolve("genre_titles", row, "titles", "title_id"),
+            genre_id=self.resolve("genre_titles", row, "genres", "genre_id"),
+        )
+
+    def build_review(self, row):
+        title_id = self.resolve("reviews", row, "titles", "title_id")
+        author_id = self.resolve("reviews", row, "users", "author")
+        score = int(row["score"])
+        if not 1 <= score <= 10:
+            self.error("reviews", row, f"score {score} out of range")
+            return None
+        if (title_id, author_id) in self.review_pairs:
+            self.skipped.append(f"reviews {row.get('id')}: duplicate review")
+            return None
+        self.review_pairs.add((title_id, author_id))
+        return Review(
+            id=self.next_id(Review),
+            title_id=title_id,
+            author_id=author_id,
+            author_username=self.usernames.get(author_id, ""),
+            score=score,
+            text=row.get("text"),
+            pub_date=parse_datetime(row["pub_date"]),
+        )
+
+    def build_comment(self, row):
+        author_id = self.resolve("comments", row, "users", "author")
+        return Comment(
+            id=self.next_id(Comment),
+            review_id=self.resolve("comments", row, "reviews", "review_id"),
+            author_id=author_id,
+            author_username=self.usernames.get(author_id, ""),
+            text=row["text"],
+            pub_date=parse_datetime(row["pub_date"]),
+        )
+
+    builders = {
+        "users": (User, build_user),
+        "categories": (Category, build_category),
+        "genres": (Genre, build_genre),
+        "titles": (Title, build_title),
+        "genre_titles": (Title.genre.through, build_genre_title),
+        "reviews": (Review, build_review),
+        "comments": (Comment, build_comment),
+    }
+
+    def load_table(self, table, rows, copy=0):
+        """
+        Load the rows of one table. Shared tables (categories, genres)
+        are loaded once and reused by every copy.
+        """
+        self.copy = copy
+        model, build = self.builders[table]
+        batch = []
+        for row in rows:
+            errors = len(self.errors)
+            try:
+                obj = build(self, row)
+            except (KeyError, ValueError, TypeError) as exc:
+                self.error(table, row, f"invalid row: {exc!r}")
+                continue
+            if obj is None or len(self.errors) > errors:
+                continue
+            key = None if table in ("categories", "genres") else copy
+            self.ids[table][(key, row.get("id"))] = obj.pk
+            batch.append((row, obj))
+            if len(batch) >= self.batch_size:
+                self.write(table, model, batch)
+                batch = []
+        self.write(table, model, batch)
+
+    def new_users(self, batch):
+        """The users of the batch whose username and email are free."""
+        taken = {
+            field: set(
+                User.all_objects.filter(
+                    **{f"{field}__in": [getattr(u, field) for _, u in batch]}
+                ).values_list(field, flat=True)
+            )
+            for field in self.claimed
+        }
+        users = []
+        for row, user in batch:
+            clashes = [
+                f"{field} {getattr(user, field)}"
+                for field in taken
+                if getattr(user, field) in taken[field]
+            ]
+            if clashes:
+                self.error("users", row, f"{', '.join(clashes)} taken")
+            else:
+                users.append(user)
+        return users
+
+    def write(self, table, model, batch):
+        if not batch:
+            return
+        if model is User:
+            objs = self.new_users(batch)
+        else:
+            objs = [obj for _, obj in batch]
+        self.counts[table] += len(objs)
+        if self.dry_run or self.errors:
+            # the load is rolled back anyway
+            return
+        with keep_pub_date(Review, Comment):
+            model.objects.bulk_create(objs, batch_size=self.batch_size)
+        if model is User:
+            index_users(objs)
+
+    def finish(self):
+        """Reset sequences and rankings once everything is loaded."""
+        if self.dry_run:
+            return
+        models = [model for model, _ in self.builders.values()]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+        refresh_title_rankings(self.title_ids)
+
+
+def load_tables(
+    tables, copies=1, first_copy=0, batch_size=1000, dry_run=False
+):
+    """
+    Load a {table: rows} mapping (see CSV_FILES) `copies` times in one
+    transaction; a dry run validates the rows and writes nothing.
+    Copies are numbered from `first_copy`, pass a new number to load
+    the same rows into a database that already has them.
+    Returns the loader with its counts and errors.
+    """
+    loader = BulkLoader(batch_size=batch_size, dry_run=dry_run)
+    if copies > 1:
+        tables = {table: list(rows) for table, rows in tables.items()}
+    with transaction.atomic():
+        for table in ("categories", "genres"):
+            loader.load_table(table, tables.get(table, ()))
+        for copy in range(first_copy, first_copy + copies):
+            for table in TABLES:
+                if table not in ("categories", "genres"):
+                    loader.load_table(table, tables.get(table, ()), copy)
+        if loader.errors and not dry_run:
+            raise LoadError("\n".join(loader.errors))
+        loader.finish()
+    return loader
@@ -0,0 +1,303 @@
+"""
+Load generator replaying a YaMDb traffic mix, either in-process through
+the ASGI application or against a running server.
+"""
+
+import asyncio
+import bisect
+import json
+import random
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import Genre, Review, Title
+
+# relative weights of the scenarios
+DEFAULT_MIX = {
+    "browse_titles": 40,
+    "filter_titles": 15,
+    "title_detail": 15,
+    "read_reviews": 15,
+    "post_review": 5,
+    "post_comment": 5,
+    "request_code": 5,
+}
+
+# upper bounds (ms) of the latency histogram buckets
+BUCKETS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+
+class ASGITransport:
+    """Sends requests straight to an ASGI application, no sockets."""
+
+    def __init__(self, application):
+        self.application = application
+
+    async def request(self, method, path, headers, body):
+        path, _, query = path.partition("?")
+        headers = dict(headers, **{"Content-Length": str(len(body))})
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": [
+                (name.lower().encode(), value.encode())
+                for name, value in headers.items()
+            ],
+            "client": ("127.0.0.1", 0),
+            "server": ("testserver", 80),
+        }
+        messages = [{"type": "http.request", "body": body}]
+        status = None
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        await self.application(scope, receive, send)
+        return status
+
+
+class HTTPTransport:
+    """Minimal HTTP/1.1 client (one connection per request)."""
+
+    def __init__(self, url, timeout=30):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.prefix = parts.path.rstrip("/")
+        self.timeout = timeout
+
+    async def request(self, method, path, headers, body):
+        return await asyncio.wait_for(
+            self.exchange(method, path, headers, body), self.timeout
+        )
+
+    async def exchange(self, method, path, headers, body):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        lines = [
+            f"{method} {self.prefix}{path} HTTP/1.1",
+            f"Host: {self.host}:{self.port}",
+            "Connection: close",
+            f"Content-Length: {len(body)}",
+        ]
+        lines += [f"{name}: {value}" for name, value in headers.items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode() + body)
+        await writer.drain()
+        status_line = await reader.readline()
+        await reader.read()
+        writer.close()
+        try:
+            return int(status_line.split()[1])
+        except (IndexError, ValueError):
+            raise ValueError(f"malformed status line {status_line!r}")
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        # requests that got no response at all (also counted as errors)
+        self.failures = defaultdict(int)
+
+    def add(self, scenario, elapsed, ok):
+        self.latencies[scenario].append(elapsed)
+        if not ok:
+            self.errors[scenario] += 1
+
+    @staticmethod
+    def percentile(values, percent):
+        index = min(len(values) - 1, int(len(values) * percent / 100))
+        return values[index]
+
+    def report(self, wall_time):
+        total = sum(len(values) for values in self.latencies.values())
+        errors = sum(self.errors.values())
+        failures = sum(self.failures.values())
+        lines = [
+            f"requests: {total}  errors: {errors} "
+            f"({errors / max(total, 1):.2%})  failed: {failures}  "
+            f"throughput: {total / wall_time:.1f} req/s",
+            "",
+            f"{'scenario':<16}{'count':>7}{'err':>6}"
+            f"{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}",
+        ]
+        everything = []
+        for scenario in sorted(self.latencies):
+            values = sorted(self.latencies[scenario])
+            everything += values
+            lines.append(
+                f"{scenario:<16}{len(values):>7}{self.errors[scenario]:>6}"
+                + "".join(
+                    f"{self.percentile(values, p) * 1000:>8.1f}m"
+                    for p in (50, 90, 99, 100)
+                )
+            )
+
+        counts = [0] * (len(BUCKETS) + 1)
+        for value in everything:
+            counts[bisect.bisect_left(BUCKETS, value * 1000)] += 1
+        lines += ["", "latency histogram (ms):"]
+        for bound, count in zip(BUCKETS + ["inf"], counts):
+            bar = "#" * round(50 * count / max(len(everything), 1))
+            lines.append(f"  <= {bound!s:>5} {count:>7} {bar}")
+        return "\n".join(lines)
+
+
+class Workload:
+    """Builds requests of every scenario from the data in the database."""
+
+    # scenarios where a 4xx answer is part of the expected traffic
+    expected_client_errors = {"post_review"}
+    # scenarios sending an access token
+    authenticated = {"post_review", "post_comment"}
+
+    def __init__(self, users=50, seed=None):
+        self.random = random.Random(seed)
+        self.title_ids = list(Title.objects.values_list("id", flat=True))
+        self.genres = list(Genre.objects.values_list("slug", flat=True))
+        self.years = list(
+            Title.objects.values_list("year", flat=True).distinct()
+        )
+        self.reviews = list(Review.objects.values_list("title_id", "id"))
+        if not self.title_ids:
+            raise ValueError("no titles to load, seed the database first")
+        self.tokens = [
+            str(RefreshToken.for_user(user).access_token)
+            for user in get_user_model().objects.filter(is_active=True)[
+                :users
+            ]
+        ]
+        self.code_requests = 0
+        page_size = settings.REST_FRAMEWORK["PAGE_SIZE"]
+        self.pages = (len(self.title_ids) - 1) // page_size + 1
+
+    def check(self, mix):
+        """Raise ValueError if the data cannot feed the scenarios of `mix`."""
+        needing_users = sorted(
+            name for name in self.authenticated if mix.get(name)
+        )
+        if needing_users and not self.tokens:
+            raise ValueError(
+                f"no active users for {', '.join(needing_users)}, seed "
+                "the database or drop them from the mix"
+            )
+        if not any(mix.values()):
+            raise ValueError("every scenario of the mix has weight 0")
+
+    def auth(self):
+        token = self.random.choice(self.tokens)
+        return {"Authorization": f"Bearer {token}"}
+
+    def browse_titles(self):
+        page = self.random.randint(1, self.pages)
+        return "GET", f"/api/v1/titles/?page={page}", {}, None
+
+    def filter_titles(self):
+        query = self.random.choice(
+            [
+                f"genre={self.random.choice(self.genres or ['drama'])}",
+                f"year={self.random.choice(self.years)}",
+                "ordering=-rating",
+            ]
+        )
+        return "GET", f"/api/v1/titles/?{query}", {}, None
+
+    def title_detail(self):
+        title_id = self.random.choice(self.title_ids)
+        return "GET", f"/api/v1/titles/{title_id}/", {}, None
+
+    def read_reviews(self):
+        title_id = self.random.choice(self.title_ids)
+        return "GET", f"/api/v1/titles/{title_id}/reviews/", {}, None
+
+    def post_review(self):
+        title_id = self.random.choice(self.title_ids)
+        body = {"text": "load test", "score": self.random.randint(1, 10)}
+        # duplicates are answered with 400, that is expected traffic
+        return (
+            "POST",
+            f"/api/v1/titles/{title_id}/reviews/",
+            self.auth(),
+            body,
+        )
+
+    def post_comment(self):
+        if not self.reviews:
+            return self.read_reviews()
+        title_id, review_id = self.random.choice(self.reviews)
+        return (
+            "POST",
+            f"/api/v1/titles/{title_id}/reviews/{review_id}/comments/",
+            self.auth(),
+            {"text": "load test"},
+        )
+
+    def request_code(self):
+        self.code_requests += 1
+        email = f"loadtest{self.code_requests}@yamdb.fake"
+        return "POST", "/api/v1/auth/email/", {}, {"email": email}
+
+
+async def run(transport, workload, mix, concurrency, requests, duration):
+    """Run the mix until `requests` are sent or `duration` s elapsed."""
+    stats = Stats()
+    scenarios = list(mix)
+    weights = [mix[name] for name in scenarios]
+    sent = 0
+    deadline = time.perf_counter() + duration if duration else None
+
+    async def worker():
+        nonlocal sent
+        while True:
+            if requests and sent >= requests:
+                return
+            if deadline and time.perf_counter() >= deadline:
+                return
+            sent += 1
+            scenario = workload.random.choices(scenarios, weights)[0]
+            method, path, headers, body = getattr(workload, scenario)()
+            headers = dict(headers)
+            payload = b""
+            if body is not None:
+                payload = json.dumps(body).encode()
+                headers["Content-Type"] = "application/json"
+            start = time.perf_counter()
+            try:
+                status = await transport.request(
+                    method, path, headers, payload
+                )
+            except Exception:
+                # a refused connection, a timeout or a garbled answer
+                stats.failures[scenario] += 1
+                status = None
+            elapsed = time.perf_counter() - start
+            ok = status is not None and (
+                status < 400
+                or (
+                    status < 500
+                    and scenario in workload.expected_client_errors
+                )
+            )
+            stats.add(scenario, elapsed, ok)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return stats, time.perf_counter() - start
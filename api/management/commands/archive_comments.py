@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from api.archive import archive_comments
+
+
+class Command(BaseCommand):
+    help = "Move comments older than the retention horizon to the archive"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            type=float,
+            default=None,
+            help="days, COMMENT_ARCHIVE_AFTER by default",
+        )
+        parser.add_argument("--batch-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        older_than = options["older_than"]
+        if older_than is not None:
+            older_than = timedelta(days=older_than)
+        count = archive_comments(older_than, options["batch_size"])
+        self.stdout.write(f"Archived {count} comments")
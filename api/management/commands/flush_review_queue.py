@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from api.ingestion import run_flusher
+
+
+class Command(BaseCommand):
+    help = "Write reviews queued by the buffered ingestion mode"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="exit as soon as the queue is empty",
+        )
+        parser.add_argument("--interval", type=float, default=1.0)
+        parser.add_argument("--batch-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        run_flusher(
+            options["interval"], options["batch_size"], once=options["once"]
+        )
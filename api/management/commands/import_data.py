@@ -0,0 +1,53 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from api.loaders import LoadError, csv_tables, load_tables
+from api.xlsx import xlsx_tables
+
+
+class Command(BaseCommand):
+    help = (
+        "Import users, categories, genres, titles, reviews and comments "
+        "from a directory of CSV files (like data/) or an .xlsx workbook"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="data directory or .xlsx file")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="validate the rows and report errors, write nothing",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        try:
+            if os.path.isdir(path):
+                tables = csv_tables(path)
+            else:
+                tables = xlsx_tables(path)
+            loader = load_tables(
+                tables,
+                batch_size=options["batch_size"],
+                dry_run=options["dry_run"],
+            )
+        except (LoadError, OSError) as exc:
+            raise CommandError(str(exc))
+        except IntegrityError as exc:
+            # a conflict the loader's checks do not cover
+            raise CommandError(f"the import was rolled back: {exc}")
+
+        for message in loader.errors + loader.skipped:
+            self.stderr.write(message)
+        verb = "Checked" if options["dry_run"] else "Imported"
+        self.stdout.write(
+            f"{verb} "
+            + ", ".join(
+                f"{table}: {count}" for table, count in loader.counts.items()
+            )
+        )
+        if loader.errors:
+            raise CommandError(f"{len(loader.errors)} invalid rows")
@@ -0,0 +1,105 @@
+import asyncio
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from api.loaders import LoadError, csv_tables, load_tables
+from api.loadtest import (
+    DEFAULT_MIX,
+    ASGITransport,
+    HTTPTransport,
+    Workload,
+    run,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay a YaMDb traffic mix in-process (ASGI) or against a "
+        "running server and report throughput and latencies"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            help="base url of a running server, e.g. http://127.0.0.1:8000"
+            " (default: drive the ASGI application in-process)",
+        )
+        parser.add_argument("--concurrency", type=int, default=10)
+        parser.add_argument("--requests", type=int, default=1000)
+        parser.add_argument(
+            "--duration",
+            type=float,
+            default=0,
+            help="run for this many seconds instead of --requests",
+        )
+        parser.add_argument(
+            "--mix",
+            default="",
+            help="scenarios to run with their weights instead of the "
+            "default mix, e.g. browse_titles=10,post_review=1",
+        )
+        parser.add_argument(
+            "--seed-scale",
+            type=int,
+            default=0,
+            help="first load the data/ CSV files this many times",
+        )
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--random-seed", type=int, default=None)
+
+    def parse_mix(self, value):
+        if not value:
+            return dict(DEFAULT_MIX)
+        mix = {}
+        for item in filter(None, value.split(",")):
+            name, _, weight = item.partition("=")
+            if name not in DEFAULT_MIX:
+                raise CommandError(f"unknown scenario in --mix: {item!r}")
+            if not weight.isdigit() or not int(weight):
+                raise CommandError(
+                    f"--mix weights are positive integers, got {item!r}"
+                )
+            mix[name] = int(weight)
+        return mix
+
+    def handle(self, *args, **options):
+        if options["seed_scale"]:
+            try:
+                loader = load_tables(
+                    csv_tables(os.path.join(settings.BASE_DIR, "data")),
+                    copies=options["seed_scale"],
+                )
+            except (LoadError, IntegrityError) as exc:
+                raise CommandError(
+                    f"cannot seed (is the database seeded already?):\n{exc}"
+                )
+            self.stdout.write(f"Seeded {loader.counts}")
+
+        mix = self.parse_mix(options["mix"])
+        try:
+            workload = Workload(options["users"], options["random_seed"])
+            workload.check(mix)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        if options["url"]:
+            transport = HTTPTransport(options["url"])
+        else:
+            from api_yamdb.asgi import application
+
+            transport = ASGITransport(application)
+
+        stats, wall_time = asyncio.run(
+            run(
+                transport,
+                workload,
+                mix,
+                options["concurrency"],
+                options["requests"] if not options["duration"] else 0,
+                options["duration"],
+            )
+        )
+        self.stdout.write(stats.report(wall_time))
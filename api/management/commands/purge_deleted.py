@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from api.purge import purge_deleted
+
+
+class Command(BaseCommand):
+    help = "Remove soft-deleted users, reviews and comments in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.1,
+            help="seconds to sleep between batches",
+        )
+        parser.add_argument(
+            "--older-than",
+            type=float,
+            default=0,
+            help="only purge rows deleted at least this many hours ago",
+        )
+
+    def handle(self, *args, **options):
+        counts = purge_deleted(
+            batch_size=options["batch_size"],
+            pause=options["pause"],
+            older_than=timedelta(hours=options["older_than"]),
+        )
+        self.stdout.write(
+            ", ".join(f"{table}: {count}" for table, count in counts.items())
+        )
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from api.rankings import refresh_all_rankings
+
+
+class Command(BaseCommand):
+    help = "Recompute title ratings and trending counters"
+
+    def handle(self, *args, **options):
+        count = refresh_all_rankings()
+        self.stdout.write(f"Refreshed rankings for {count} titles")
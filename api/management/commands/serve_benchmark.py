@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.servebench import MODES, benchmark, summarize
+
+
+def megabytes(kilobytes):
+    return "n/a" if kilobytes is None else f"{kilobytes / 1024:.1f} MB"
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare memory per worker and first request latency of forked "
+        "workers with and without preloading the application"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument(
+            "--path",
+            action="append",
+            dest="paths",
+            help="path of a first request, may be repeated",
+        )
+        parser.add_argument(
+            "--profile",
+            default=None,
+            help="settings module to serve, default api_yamdb.settings_api",
+        )
+        parser.add_argument(
+            "--mode", choices=[*MODES, "both"], default="both"
+        )
+
+    def handle(self, *args, **options):
+        paths = options["paths"] or ["/api/v1/", "/api/v1/titles/"]
+        modes = MODES if options["mode"] == "both" else [options["mode"]]
+        for mode in modes:
+            try:
+                results = benchmark(
+                    mode, options["workers"], paths, options["profile"]
+                )
+            except RuntimeError as exc:
+                raise CommandError(f"{mode} benchmark failed: {exc}")
+            summary = summarize(results)
+            self.stdout.write(
+                f"{mode}: {len(results)} workers,"
+                f" boot {summary['boot_ms']:.1f} ms,"
+                f" first requests {summary['first_request_ms']:.1f} ms"
+                f" ({', '.join(paths)})"
+            )
+            self.stdout.write(
+                f"  per worker: RSS {megabytes(summary['rss'])},"
+                f" PSS {megabytes(summary['pss'])},"
+                f" USS {megabytes(summary['uss'])}"
+            )
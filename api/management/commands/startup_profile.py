@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.startup import by_package, profile_startup
+
+
+class Command(BaseCommand):
+    help = "Report the import time of a worker boot per package and module"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--profile",
+            default=None,
+            help="settings module to boot, e.g. api_yamdb.settings_api",
+        )
+        parser.add_argument("--limit", type=int, default=20)
+
+    def handle(self, *args, **options):
+        try:
+            imports, boot_time = profile_startup(options["profile"])
+        except RuntimeError as exc:
+            raise CommandError(f"boot failed: {exc}")
+
+        limit = options["limit"]
+        total = sum(self_time for _, self_time, _ in imports)
+        self.stdout.write(
+            f"boot: {boot_time * 1000:.1f} ms, imports: {total / 1000:.1f} ms"
+            f" in {len(imports)} modules"
+        )
+        self.stdout.write("\nself time by package:")
+        for package, self_time in by_package(imports)[:limit]:
+            self.stdout.write(f"  {self_time / 1000:>9.1f} ms  {package}")
+        self.stdout.write("\nslowest modules (cumulative):")
+        slowest = sorted(imports, key=lambda item: -item[2])[:limit]
+        for module, _, cumulative in slowest:
+            self.stdout.write(f"  {cumulative / 1000:>9.1f} ms  {module}")
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from api.usernames import sync_author_usernames
+
+
+class Command(BaseCommand):
+    help = (
+        "Rewrite the author_username copies of reviews and comments that "
+        "differ from the author's current username"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+
+    def handle(self, *args, **options):
+        counts = sync_author_usernames(options["batch_size"])
+        self.stdout.write(
+            ", ".join(f"{model}: {count}" for model, count in counts.items())
+        )
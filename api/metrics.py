@@ -0,0 +1,328 @@
+"""
+In-process request, database and cache metrics exposed in the
+Prometheus text format on /metrics.
+
+Every process keeps its own counters. When METRICS_MULTIPROC_DIR is
+set (e.g. under gunicorn) each process also dumps them to a file there
+at most every METRICS_FLUSH_INTERVAL seconds, and /metrics adds up the
+files of all processes.
+
+/metrics answers only clients from METRICS_ALLOWED_IPS.
+"""
+
+import glob
+import ipaddress
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+DESCRIPTIONS = {
+    "yamdb_http_requests_total": ("counter", "HTTP requests by view"),
+    "yamdb_http_request_duration_seconds": (
+        "histogram",
+        "HTTP request latency by view",
+    ),
+    "yamdb_db_queries_total": ("counter", "Database queries by view"),
+    "yamdb_db_query_duration_seconds_total": (
+        "counter",
+        "Time spent in database queries by view",
+    ),
+    "yamdb_cache_requests_total": ("counter", "Cache lookups by result"),
+    "yamdb_auth_failures_total": ("counter", "Authentication failures"),
+    "yamdb_emails_total": ("counter", "Confirmation emails by result"),
+    "yamdb_queue_depth": ("gauge", "Items waiting in a queue"),
+}
+
+
+def label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+class Registry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        # held by the thread writing the dump file
+        self.dump_lock = threading.Lock()
+        self.counters = defaultdict(float)
+        self.histograms = {}
+        self.last_dump = 0
+
+    def inc(self, name, value=1, **labels):
+        with self.lock:
+            self.counters[(name, label_key(labels))] += value
+        self.maybe_dump()
+
+    def observe(self, name, value, **labels):
+        key = (name, label_key(labels))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = [
+                    [0] * len(DURATION_BUCKETS),
+                    0.0,
+                    0,
+                ]
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if value <= bound:
+                    histogram[0][index] += 1
+            histogram[1] += value
+            histogram[2] += 1
+        self.maybe_dump()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "counters": [
+                    [name, labels, value]
+                    for (name, labels), value in self.counters.items()
+                ],
+                "histograms": [
+                    [name, labels, list(buckets), total, count]
+                    for (name, labels), (
+                        buckets,
+                        total,
+                        count,
+                    ) in self.histograms.items()
+                ],
+            }
+
+    def dump_path(self):
+        return os.path.join(
+            settings.METRICS_MULTIPROC_DIR, f"metrics-{os.getpid()}.json"
+        )
+
+    def maybe_dump(self, force=False):
+        """
+        Dump the counters if the interval has passed. Runs inside
+        requests, so a failed dump is logged and never raised; a thread
+        finding another one dumping skips (unless forced).
+        """
+        if not settings.METRICS_MULTIPROC_DIR:
+            return
+        if not self.dump_lock.acquire(blocking=force):
+            return
+        try:
+            now = time.monotonic()
+            if (
+                not force
+                and now - self.last_dump < settings.METRICS_FLUSH_INTERVAL
+            ):
+                return
+            self.last_dump = now
+            self.dump()
+        except Exception:
+            logger.exception("metrics dump failed")
+        finally:
+            self.dump_lock.release()
+
+    def dump(self):
+        path = self.dump_path()
+        fd, temporary = tempfile.mkstemp(
+            dir=os.path.dirname(path),
+            prefix=f"{os.path.basename(path)}.",
+            suffix=".tmp",
+        )
+        try:
+            with os.fdopen(fd, "w") as target:
+                json.dump(self.snapshot(), target)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+
+registry = Registry()
+
+
+def inc(name, value=1, **labels):
+    registry.inc(name, value, **labels)
+
+
+def observe(name, value, **labels):
+    registry.observe(name, value, **labels)
+
+
+def cache_access(cache, hit):
+    registry.inc(
+        "yamdb_cache_requests_total",
+        cache=cache,
+        result="hit" if hit else "miss",
+    )
+
+
+def collect():
+    """Snapshots of every process, merged."""
+    if settings.METRICS_MULTIPROC_DIR:
+        registry.maybe_dump(force=True)
+        pattern = os.path.join(
+            settings.METRICS_MULTIPROC_DIR, "metrics-*.json"
+        )
+        snapshots = []
+        for path in glob.glob(pattern):
+            with open(path) as source:
+                snapshots.append(json.load(source))
+    else:
+        snapshots = [registry.snapshot()]
+
+    counters = defaultdict(float)
+    histograms = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot["counters"]:
+            counters[(name, tuple(map(tuple, labels)))] += value
+        for name, labels, buckets, total, count in snapshot["histograms"]:
+            key = (name, tuple(map(tuple, labels)))
+            merged = histograms.setdefault(
+                key, [[0] * len(DURATION_BUCKETS), 0.0, 0]
+            )
+            merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+            merged[1] += total
+            merged[2] += count
+    return counters, histograms
+
+
+def queue_gauges():
+    from .models import QueuedReview
+
+    pending = QueuedReview.objects.filter(
+        status=QueuedReview.Status.PENDING
+    ).count()
+    return {("yamdb_queue_depth", (("queue", "reviews"),)): pending}
+
+
+def format_labels(labels, **extra):
+    labels = list(labels) + list(extra.items())
+    if not labels:
+        return ""
+    escaped = (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace('"', '\\"')
+        .replace("\n", "\\n")
+        for _, value in labels
+    )
+    return (
+        "{"
+        + ",".join(
+            f'{name}="{value}"' for (name, _), value in zip(labels, escaped)
+        )
+        + "}"
+    )
+
+
+def render():
+    counters, histograms = collect()
+    samples = defaultdict(list)
+    for (name, labels), value in counters.items():
+        samples[name].append(f"{name}{format_labels(labels)} {value:g}")
+    for (name, labels), value in queue_gauges().items():
+        samples[name].append(f"{name}{format_labels(labels)} {value:g}")
+    for (name, labels), (buckets, total, count) in histograms.items():
+        for bound, value in zip(DURATION_BUCKETS, buckets):
+            samples[name].append(
+                f"{name}_bucket{format_labels(labels, le=bound)} {value}"
+            )
+        samples[name].append(
+            f"{name}_bucket{format_labels(labels, le='+Inf')} {count}"
+        )
+        samples[name].append(f"{name}_sum{format_labels(labels)} {total:g}")
+        samples[name].append(f"{name}_count{format_labels(labels)} {count}")
+
+    lines = []
+    for name in sorted(samples):
+        kind, description = DESCRIPTIONS.get(name, ("untyped", name))
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(sorted(samples[name]))
+    return "\n".join(lines) + "\n"
+
+
+def client_allowed(request):
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network, strict=False)
+        for network in settings.METRICS_ALLOWED_IPS
+    )
+
+
+def metrics_view(request):
+    if not client_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(
+        render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+def view_label(request, view_func):
+    """`TitleViewSet.list` style label of a resolved view."""
+    cls = getattr(view_func, "cls", None)
+    if cls is None:
+        return getattr(view_func, "__name__", "unknown")
+    method = request.method.lower()
+    actions = getattr(view_func, "actions", None) or {}
+    return f"{cls.__name__}.{actions.get(method, method)}"
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+
+class MetricsMiddleware:
+    """Request counts, latency and database usage per view."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        from django.db import connection
+
+        request.metrics_view = "unmatched"
+        queries = QueryCounter()
+        start = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        view = request.metrics_view
+        inc(
+            "yamdb_http_requests_total",
+            view=view,
+            method=request.method,
+            status=response.status_code,
+        )
+        observe("yamdb_http_request_duration_seconds", elapsed, view=view)
+        inc("yamdb_db_queries_total", queries.count, view=view)
+        inc(
+            "yamdb_db_query_duration_seconds_total",
+            queries.duration,
+            view=view,
+        )
+        if response.status_code == 401:
+            inc("yamdb_auth_failures_total", reason="unauthenticated")
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_view = view_label(request, view_func)
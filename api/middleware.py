@@ -0,0 +1,150 @@
+import gzip
+import hashlib
+import zlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import patch_vary_headers
+
+from . import metrics
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+def gzip_compress(data):
+    return gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def gzip_stream():
+    # wbits=31 writes the gzip header and trailer
+    return zlib.compressobj(6, zlib.DEFLATED, 31)
+
+
+class BrotliStream:
+    def __init__(self):
+        self.compressor = brotli.Compressor(quality=5)
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def flush(self):
+        return self.compressor.finish()
+
+
+ENCODERS = {"gzip": (gzip_compress, gzip_stream)}
+if brotli is not None:
+    ENCODERS["br"] = (
+        lambda data: brotli.compress(data, quality=5),
+        BrotliStream,
+    )
+if zstandard is not None:
+    ENCODERS["zstd"] = (
+        lambda data: zstandard.ZstdCompressor(level=3).compress(data),
+        lambda: zstandard.ZstdCompressor(level=3).compressobj(),
+    )
+
+
+def accepted_encodings(header):
+    """Parse Accept-Encoding into the set of codings with a non-zero q."""
+    accepted = set()
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+def negotiate_encoding(header):
+    accepted = accepted_encodings(header)
+    for encoding in settings.COMPRESSION_ENCODINGS:
+        if encoding in ENCODERS and (encoding in accepted or "*" in accepted):
+            return encoding
+    return None
+
+
+def compress_sequence(sequence, encoding):
+    stream = ENCODERS[encoding][1]()
+    for item in sequence:
+        data = stream.compress(item)
+        if data:
+            yield data
+    yield stream.flush()
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with the best encoding the client accepts
+    (COMPRESSION_ENCODINGS order). Small bodies are sent as is,
+    streaming responses are compressed chunk by chunk. Compressed
+    bodies are cached by content digest, so a response served from
+    any cache is not compressed again.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        if response.has_header("Content-Encoding"):
+            return response
+        if (
+            not response.streaming
+            and len(response.content) < settings.COMPRESSION_MIN_SIZE
+        ):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        encoding = negotiate_encoding(
+            request.META.get("HTTP_ACCEPT_ENCODING", "")
+        )
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_sequence(
+                response.streaming_content, encoding
+            )
+            del response["Content-Length"]
+        else:
+            compressed = self.compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response["Content-Length"] = str(len(compressed))
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        response["Content-Encoding"] = encoding
+        return response
+
+    def compress(self, content, encoding):
+        if settings.COMPRESSION_CACHE is None:
+            return ENCODERS[encoding][0](content)
+
+        cache = caches[settings.COMPRESSION_CACHE]
+        digest = hashlib.sha1(content).hexdigest()
+        key = f"compressed:{encoding}:{digest}"
+        compressed = cache.get(key)
+        metrics.cache_access("compression", compressed is not None)
+        if compressed is None:
+            compressed = ENCODERS[encoding][0](content)
+            cache.set(key, compressed, settings.COMPRESSION_CACHE_TIMEOUT)
+        return compressed
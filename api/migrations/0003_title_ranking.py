@@ -0,0 +1,53 @@
+# Generated by Django 3.0.5 on 2026-10-19 12:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_rankings(apps, schema_editor):
+    Review = apps.get_model("api", "Review")
+    TitleRanking = apps.get_model("api", "TitleRanking")
+    stats = (
+        Review.objects.order_by()
+        .values("title_id")
+        .annotate(count=models.Count("id"), total=models.Sum("score"))
+    )
+    TitleRanking.objects.bulk_create(
+        [
+            TitleRanking(
+                title_id=row["title_id"],
+                reviews_count=row["count"],
+                score_total=row["total"],
+                rating=row["total"] / row["count"],
+                weighted_rating=row["total"] / row["count"],
+            )
+            for row in stats
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0002_auto_20210610_0645'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleRanking',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ranking', serialize=False, to='api.Title')),
+                ('reviews_count', models.PositiveIntegerField(default=0)),
+                ('score_total', models.PositiveIntegerField(default=0)),
+                ('rating', models.FloatField(db_index=True, null=True)),
+                ('weighted_rating', models.FloatField(db_index=True, null=True)),
+                ('recent_reviews', models.PositiveIntegerField(db_index=True, default=0)),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['-weighted_rating'],
+            },
+        ),
+        migrations.RunPython(populate_rankings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.0.5 on 2026-10-19 12:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_title_ranking'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='title',
+            name='name',
+            field=models.CharField(db_index=True, max_length=255, verbose_name='Название'),
+        ),
+    ]
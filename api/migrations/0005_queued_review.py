@@ -0,0 +1,34 @@
+# Generated by Django 3.0.5 on 2026-10-19 12:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0004_title_name_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueuedReview',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('handle', models.UUIDField(default=uuid.uuid4, unique=True)),
+                ('score', models.PositiveSmallIntegerField()),
+                ('text', models.TextField(blank=True, null=True)),
+                ('status', models.CharField(choices=[('pending', 'pending'), ('accepted', 'accepted'), ('rejected', 'rejected')], db_index=True, default='pending', max_length=10)),
+                ('error', models.CharField(blank=True, max_length=255)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='queued_reviews', to=settings.AUTH_USER_MODEL)),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='queued_reviews', to='api.Title')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 3.0.5 on 2026-10-19 13:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_author_usernames(apps, schema_editor):
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    username = models.Subquery(
+        User.objects.filter(pk=models.OuterRef("author_id")).values(
+            "username"
+        )[:1]
+    )
+    for name in ("Review", "Comment", "ArchivedComment"):
+        apps.get_model("api", name).objects.update(author_username=username)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('api', '0009_comment_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='author_username',
+            field=models.CharField(blank=True, max_length=150),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='author_username',
+            field=models.CharField(blank=True, max_length=150),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='author_username',
+            field=models.CharField(blank=True, max_length=150),
+        ),
+        migrations.RunPython(
+            populate_author_usernames, migrations.RunPython.noop
+        ),
+    ]
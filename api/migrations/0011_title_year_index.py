@@ -0,0 +1,18 @@
+# Generated by Django 3.0.5 on 2026-10-19 13:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_author_username'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='title',
+            name='year',
+            field=models.SmallIntegerField(db_index=True, verbose_name='Год создания'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 3.0.5 on 2026-10-19 13:24
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def recount_archived_comments(apps, schema_editor):
+    """Stop counting archived comments of soft-deleted authors."""
+    ArchivedComment = apps.get_model("api", "ArchivedComment")
+    visible = (
+        ArchivedComment.objects.filter(
+            review_id=models.OuterRef("pk"), author__deleted_at=None
+        )
+        .order_by()
+        .values("review_id")
+        .annotate(count=models.Count("pk"))
+        .values("count")
+    )
+    apps.get_model("api", "Review").objects.filter(
+        archived_comments_count__gt=0
+    ).update(
+        archived_comments_count=Coalesce(
+            models.Subquery(visible), 0
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_title_year_index'),
+        ('users', '0003_user_soft_delete'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            recount_archived_comments, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.0.5 on 2026-10-19 13:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_username_change'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='is_hidden',
+            field=models.BooleanField(default=False),
+        ),
+    ]
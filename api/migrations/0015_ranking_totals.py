@@ -0,0 +1,21 @@
+# Generated by Django 3.0.5 on 2026-10-19 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_archived_comment_moderation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RankingTotals',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score_total', models.BigIntegerField(default=0)),
+                ('reviews_count', models.BigIntegerField(default=0)),
+            ],
+        ),
+    ]
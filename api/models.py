@@ -1,3 +1,5 @@
+import uuid
+
 from django.contrib.auth import get_user_model
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
@@ -28,8 +30,12 @@ class Genre(models.Model):
 
 
 class Title(models.Model):
-    name = models.CharField(max_length=255, verbose_name="Название")
-    year = models.SmallIntegerField(verbose_name="Год создания")
+    name = models.CharField(
+        max_length=255, verbose_name="Название", db_index=True
+    )
+    year = models.SmallIntegerField(
+        verbose_name="Год создания", db_index=True
+    )
     description = models.TextField(verbose_name="Описание", null=True)
     genre = models.ManyToManyField(
         Genre, related_name="titles", verbose_name="Жанр"
@@ -49,6 +55,18 @@ class Title(models.Model):
         ordering = ["id"]
 
 
+class ModeratedQuerySet(models.QuerySet):
+    def visible(self):
+        """rows shown to users: not hidden by moderators nor deleted"""
+        return self.filter(is_hidden=False, deleted_at=None)
+
+
+class ArchivedCommentQuerySet(ModeratedQuerySet):
+    def visible(self):
+        """visible rows whose author is not deleted either"""
+        return super().visible().filter(author__deleted_at=None)
+
+
 class Review(models.Model):
 
     score = models.PositiveSmallIntegerField(
@@ -67,6 +85,9 @@ class Review(models.Model):
     author = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="reviews"
     )
+    # copy of author.username, list endpoints read it instead of joining
+    # the users table (see api.usernames)
+    author_username = models.CharField(max_length=150, blank=True)
     title = models.ForeignKey(
         Title,
         verbose_name="произведение",
@@ -76,29 +97,220 @@ class Review(models.Model):
     pub_date = models.DateTimeField(
         verbose_name="дата добавления", auto_now_add=True
     )
+    is_hidden = models.BooleanField(default=False)
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    # comments moved to ArchivedComment
+    archived_comments_count = models.PositiveIntegerField(default=0)
+
+    objects = ModeratedQuerySet.as_manager()
 
     class Meta:
         ordering = ["-pub_date"]
         # unique_together = ['author', 'title']
+        indexes = [
+            models.Index(
+                fields=["author", "pub_date", "id"],
+                name="api_review_author_date_idx",
+            )
+        ]
 
     def __str__(self):
         return f"{self.author} оставил отзыв на '{self.title}'"
 
+    def save(self, *args, **kwargs):
+        if not self.author_username and self.author_id is not None:
+            self.author_username = self.author.username
+        super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     text = models.TextField()
     author = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="comments"
     )
+    # copy of author.username, list endpoints read it instead of joining
+    # the users table (see api.usernames)
+    author_username = models.CharField(max_length=150, blank=True)
     review = models.ForeignKey(
         Review, on_delete=models.CASCADE, related_name="comments"
     )
     pub_date = models.DateTimeField(
         verbose_name="дата добавления", auto_now_add=True
     )
+    is_hidden = models.BooleanField(default=False)
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    objects = ModeratedQuerySet.as_manager()
 
     class Meta:
         ordering = ["-pub_date"]
+        indexes = [
+            models.Index(
+                fields=["author", "pub_date", "id"],
+                name="api_comment_author_date_idx",
+            )
+        ]
 
     def __str__(self):
         return self.text[:20]
+
+    def save(self, *args, **kwargs):
+        if not self.author_username and self.author_id is not None:
+            self.author_username = self.author.username
+        super().save(*args, **kwargs)
+
+
+class ArchivedComment(models.Model):
+    """
+    Comment older than the retention horizon, moved out of the hot
+    comment table by `manage.py archive_comments` (keeps its id).
+    """
+
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField()
+    author = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="archived_comments"
+    )
+    author_username = models.CharField(max_length=150, blank=True)
+    review = models.ForeignKey(
+        Review, on_delete=models.CASCADE, related_name="archived_comments"
+    )
+    pub_date = models.DateTimeField(verbose_name="дата добавления")
+    archived_at = models.DateTimeField(auto_now_add=True)
+    # moderated like live comments (see api.moderation)
+    is_hidden = models.BooleanField(default=False)
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    objects = ArchivedCommentQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["-pub_date"]
+        indexes = [
+            models.Index(
+                fields=["review", "pub_date", "id"],
+                name="api_archived_review_date_idx",
+            )
+        ]
+
+    def __str__(self):
+        return self.text[:20]
+
+
+class TitleRanking(models.Model):
+    """Precomputed rating aggregates used for sorting and leaderboards."""
+
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="ranking",
+    )
+    reviews_count = models.PositiveIntegerField(default=0)
+    score_total = models.PositiveIntegerField(default=0)
+    rating = models.FloatField(null=True, db_index=True)
+    weighted_rating = models.FloatField(null=True, db_index=True)
+    recent_reviews = models.PositiveIntegerField(default=0, db_index=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-weighted_rating"]
+
+    def __str__(self):
+        return f"{self.title_id}: {self.rating}"
+
+
+class RankingTotals(models.Model):
+    """
+    Running sums of every TitleRanking row (a single row): the
+    catalogue mean pulling the Bayesian averages, kept by
+    api.rankings instead of aggregating the rankings on every write.
+    """
+
+    score_total = models.BigIntegerField(default=0)
+    reviews_count = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.score_total}/{self.reviews_count}"
+
+
+class QueuedReview(models.Model):
+    """
+    Review accepted by the buffered ingestion mode and waiting for the
+    flusher (see api.ingestion) to write it.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "pending"
+        ACCEPTED = "accepted", "accepted"
+        REJECTED = "rejected", "rejected"
+
+    handle = models.UUIDField(default=uuid.uuid4, unique=True)
+    title = models.ForeignKey(
+        Title, on_delete=models.CASCADE, related_name="queued_reviews"
+    )
+    author = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="queued_reviews"
+    )
+    score = models.PositiveSmallIntegerField()
+    text = models.TextField(blank=True, null=True)
+    status = models.CharField(
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PENDING,
+        db_index=True,
+    )
+    error = models.CharField(max_length=255, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+
+    def __str__(self):
+        return f"{self.handle}: {self.status}"
+
+
+class UsernameChange(models.Model):
+    """
+    Rename whose `author_username` copies are still to be rewritten by
+    `manage.py propagate_usernames` (see api.usernames).
+    """
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="username_changes"
+    )
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+
+
+class ModerationAudit(models.Model):
+    """One bulk moderation request (see api.moderation)."""
+
+    class Action(models.TextChoices):
+        DELETE = "delete", "delete"
+        HIDE = "hide", "hide"
+        UNHIDE = "unhide", "unhide"
+
+    class Target(models.TextChoices):
+        REVIEWS = "reviews", "reviews"
+        COMMENTS = "comments", "comments"
+
+    moderator = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name="moderation_audits",
+    )
+    action = models.CharField(max_length=10, choices=Action.choices)
+    target = models.CharField(max_length=10, choices=Target.choices)
+    # JSON of the ids / author / title the batch was selected by
+    criteria = models.TextField()
+    affected = models.PositiveIntegerField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-id"]
+
+    def __str__(self):
+        return f"{self.action} {self.affected} {self.target}"
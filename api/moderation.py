@@ -0,0 +1,88 @@
+import json
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import hotcache
+from .archive import recount_archived
+from .models import ArchivedComment, Comment, ModerationAudit, Review
+from .rankings import refresh_title_rankings
+
+Action = ModerationAudit.Action
+Target = ModerationAudit.Target
+
+
+def moderated_querysets(target, ids=None, author_id=None, title_id=None):
+    """
+    Reviews, or live and archived comments, not deleted yet matching
+    every criterion.
+    """
+    if target == Target.REVIEWS:
+        models, title_field = [Review], "title_id"
+    else:
+        models, title_field = [Comment, ArchivedComment], "review__title_id"
+    querysets = []
+    for model in models:
+        queryset = model.objects.filter(deleted_at=None)
+        if ids is not None:
+            queryset = queryset.filter(pk__in=ids)
+        if author_id is not None:
+            queryset = queryset.filter(author_id=author_id)
+        if title_id is not None:
+            queryset = queryset.filter(**{title_field: title_id})
+        querysets.append(queryset.order_by())
+    return querysets
+
+
+def moderate(moderator, action, target, ids=None, author=None, title=None):
+    """
+    Delete, hide or unhide every matching review or comment (live or
+    archived) with one UPDATE per table in one transaction. Deletes are
+    soft (see api.purge): the rows are removed later by
+    `purge_deleted`. Ratings of the affected titles and archive counts
+    of the affected reviews are refreshed once and the batch is
+    recorded in the audit.
+    """
+    author_id = author.pk if author is not None else None
+    title_id = title.pk if title is not None else None
+    with transaction.atomic():
+        affected = 0
+        title_ids, archived_review_ids = set(), set()
+        for queryset in moderated_querysets(target, ids, author_id, title_id):
+            if queryset.model is Review:
+                title_ids = set(
+                    queryset.values_list("title_id", flat=True).distinct()
+                )
+            else:
+                hotcache.invalidate_titles(
+                    queryset.values_list(
+                        "review__title_id", flat=True
+                    ).distinct()
+                )
+            if queryset.model is ArchivedComment:
+                archived_review_ids = set(
+                    queryset.values_list("review_id", flat=True).distinct()
+                )
+            if action == Action.DELETE:
+                affected += queryset.update(deleted_at=timezone.now())
+            else:
+                affected += queryset.update(is_hidden=action == Action.HIDE)
+        recount_archived(archived_review_ids)
+        refresh_title_rankings(title_ids)
+        criteria = {
+            key: value
+            for key, value in (
+                ("ids", ids),
+                ("author", author_id),
+                ("title", title_id),
+            )
+            if value is not None
+        }
+        audit = ModerationAudit.objects.create(
+            moderator=moderator,
+            action=action,
+            target=target,
+            criteria=json.dumps(criteria, separators=(",", ":")),
+            affected=affected,
+        )
+    return audit
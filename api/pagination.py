@@ -0,0 +1,12 @@
+from rest_framework.pagination import CursorPagination
+
+
+class HistoryPagination(CursorPagination):
+    """
+    Keyset pagination over (pub_date, id) of an author's reviews or
+    comments: every page is an index range scan, however deep it is.
+    """
+
+    ordering = ("-pub_date", "-id")
+    page_size_query_param = "page_size"
+    max_page_size = 1000
@@ -1,5 +1,34 @@
+from collections import namedtuple
+
 from rest_framework import permissions
 
+Capabilities = namedtuple(
+    "Capabilities",
+    ["user_id", "is_authenticated", "is_admin", "can_moderate"],
+)
+
+
+def get_capabilities(request):
+    """
+    What the request user is allowed to do, resolved once per request
+    and reused by every permission check.
+    """
+    capabilities = getattr(request, "_capabilities", None)
+    if capabilities is None:
+        user = request.user
+        if user and user.is_authenticated:
+            is_admin = user.is_admin or user.is_superuser
+            capabilities = Capabilities(
+                user_id=user.pk,
+                is_authenticated=True,
+                is_admin=is_admin,
+                can_moderate=is_admin or user.is_moderator,
+            )
+        else:
+            capabilities = Capabilities(None, False, False, False)
+        request._capabilities = capabilities
+    return capabilities
+
 
 class ReadOnly(permissions.BasePermission):
     def has_permission(self, request, view):
@@ -15,13 +44,13 @@ class ObjReadOnly(permissions.BasePermission):
 
 class IsOwner(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
-        return request.user == obj.author
+        return obj.author_id == get_capabilities(request).user_id
 
 
 class AllowAuthPost(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in ["POST"]:
-            return bool(request.user and request.user.is_authenticated)
+            return get_capabilities(request).is_authenticated
 
         return False
 
@@ -29,26 +58,25 @@ class AllowAuthPost(permissions.BasePermission):
 class FullObjAccess(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method not in permissions.SAFE_METHODS:
-            return bool(
-                (request.user.is_admin or request.user.is_moderator)
-                or request.user.is_superuser
-                or obj.author == request.user
+            capabilities = get_capabilities(request)
+            # compare ids, so the author row is never loaded
+            return (
+                capabilities.can_moderate
+                or obj.author_id == capabilities.user_id
             )
 
 
 class IsAdmin(permissions.BasePermission):
     def has_permission(self, request, view):
-        if not (request.user and request.user.is_authenticated):
-            return False
-
-        if request.user.is_admin or request.user.is_superuser:
-            return True
-        return False
+        return get_capabilities(request).is_admin
 
     def has_object_permission(self, request, view, obj):
-        if request.user.is_admin or request.user.is_superuser:
-            return True
-        return False
+        return get_capabilities(request).is_admin
+
+
+class IsModerator(permissions.BasePermission):
+    def has_permission(self, request, view):
+        return get_capabilities(request).can_moderate
 
 
 class IsUserSelf(permissions.BasePermission):
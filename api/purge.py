@@ -0,0 +1,131 @@
+"""
+Soft deletes and the deferred purge. Deleting a user, review or
+comment through the API only marks it with `deleted_at`; the rows and
+everything depending on them are removed later by `purge_deleted` in
+small batches, so no request has to cascade through a large history.
+"""
+
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import hotcache
+from .archive import uncount_archived
+from .ingestion import reject_queued_reviews
+from .models import ArchivedComment, Comment, Review
+from .rankings import BATCH_SIZE, refresh_title_rankings
+
+User = get_user_model()
+
+
+def soft_delete_user(user):
+    """
+    Deactivate the user and mark their reviews, comments and archived
+    comments deleted; the archived ones stop counting towards the
+    reviews' archive and the ratings of the reviewed titles are
+    refreshed right away.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        # only the archived comments still visible are counted
+        archived = ArchivedComment.objects.filter(author_id=user.pk)
+        uncount_archived(archived.visible())
+        archived.filter(deleted_at=None).update(deleted_at=now)
+        User.all_objects.filter(pk=user.pk).update(
+            deleted_at=now, is_active=False
+        )
+        reviews = Review.objects.filter(author_id=user.pk, deleted_at=None)
+        title_ids = sorted(
+            set(reviews.order_by().values_list("title_id", flat=True))
+        )
+        reviews.update(deleted_at=now)
+        Comment.objects.filter(author_id=user.pk, deleted_at=None).update(
+            deleted_at=now
+        )
+        reject_queued_reviews(user)
+        refresh_rankings_in_batches(title_ids)
+        hotcache.invalidate_all()
+
+
+def refresh_rankings_in_batches(title_ids):
+    for start in range(0, len(title_ids), BATCH_SIZE):
+        end = start + BATCH_SIZE
+        refresh_title_rankings(title_ids[start:end])
+
+
+def delete_in_batches(
+    queryset, batch_size, pause, seen=None, before_delete=None
+):
+    """
+    Delete the rows of `queryset` `batch_size` at a time, sleeping
+    `pause` seconds between batches. `seen` collects the title ids of
+    deleted reviews; `before_delete(ids)` runs in the transaction of
+    each batch.
+    """
+    model = queryset.model
+    queryset = queryset.order_by()
+    deleted = 0
+    while True:
+        if seen is not None:
+            rows = list(queryset.values_list("pk", "title_id")[:batch_size])
+            seen.update(title_id for _, title_id in rows)
+            ids = [pk for pk, _ in rows]
+        else:
+            ids = list(queryset.values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        with transaction.atomic():
+            if before_delete is not None:
+                before_delete(ids)
+            model._base_manager.filter(pk__in=ids).delete()
+        deleted += len(ids)
+        if pause:
+            time.sleep(pause)
+
+
+def purge_deleted(batch_size=1000, pause=0.1, older_than=None):
+    """
+    Remove soft-deleted comments, reviews and users (dependents first,
+    so no batch cascades further), then refresh the ratings of the
+    titles whose reviews went away. Returns the deleted counts.
+    """
+    cutoff = timezone.now() - (older_than or timedelta(0))
+    title_ids = set()
+    counts = {
+        "comments": delete_in_batches(
+            Comment.objects.filter(
+                Q(deleted_at__lte=cutoff) | Q(review__deleted_at__lte=cutoff)
+            ),
+            batch_size,
+            pause,
+        ),
+        "archived_comments": delete_in_batches(
+            ArchivedComment.objects.filter(
+                Q(deleted_at__lte=cutoff)
+                | Q(author__deleted_at__lte=cutoff)
+                | Q(review__deleted_at__lte=cutoff)
+            ),
+            batch_size,
+            pause,
+            before_delete=lambda ids: uncount_archived(
+                ArchivedComment.objects.visible().filter(pk__in=ids)
+            ),
+        ),
+        "reviews": delete_in_batches(
+            Review.objects.filter(deleted_at__lte=cutoff),
+            batch_size,
+            pause,
+            seen=title_ids,
+        ),
+        "users": delete_in_batches(
+            User.all_objects.filter(deleted_at__lte=cutoff),
+            batch_size,
+            pause,
+        ),
+    }
+    refresh_rankings_in_batches(sorted(title_ids))
+    return counts
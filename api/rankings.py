@@ -0,0 +1,150 @@
+from django.conf import settings
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from . import hotcache
+from .models import RankingTotals, Review, Title, TitleRanking
+
+BATCH_SIZE = 500
+
+
+def weighted_rating(total, count, prior_mean, prior_votes):
+    """
+    Bayesian average: pulls titles with few reviews towards the mean
+    rating of the whole catalogue.
+    """
+    if not count:
+        return None
+    if not settings.RANKING_BAYESIAN or prior_mean is None:
+        return total / count
+    return (prior_votes * prior_mean + total) / (prior_votes + count)
+
+
+def catalogue_mean(total, count):
+    """
+    Mean score of the catalogue once `total` and `count` are added to
+    the running totals (see RankingTotals). The first call sums the
+    stored rankings, later ones only shift the totals.
+    """
+    totals = RankingTotals.objects.filter(pk=1)
+    if not totals.update(
+        score_total=F("score_total") + total,
+        reviews_count=F("reviews_count") + count,
+    ):
+        stored = TitleRanking.objects.order_by().aggregate(
+            total=Sum("score_total"), count=Sum("reviews_count")
+        )
+        RankingTotals.objects.get_or_create(
+            pk=1,
+            defaults={
+                "score_total": (stored["total"] or 0) + total,
+                "reviews_count": (stored["count"] or 0) + count,
+            },
+        )
+    total, count = totals.values_list("score_total", "reviews_count").get()
+    if not count:
+        return None
+    return total / count
+
+
+def forget_title_rankings(title_ids):
+    """Take the rankings of titles about to be deleted off the totals."""
+    if not settings.RANKING_BAYESIAN:
+        return
+    gone = TitleRanking.objects.filter(title_id__in=title_ids).aggregate(
+        total=Sum("score_total"), count=Sum("reviews_count")
+    )
+    if gone["count"]:
+        catalogue_mean(-(gone["total"] or 0), -gone["count"])
+
+
+def refresh_title_rankings(title_ids):
+    """
+    Recompute the ranking rows of the given titles with a single
+    aggregate query, then write them back in bulk. Cached responses of
+    the titles are invalidated.
+    """
+    title_ids = set(title_ids)
+    if not title_ids:
+        return
+    since = timezone.now() - settings.RANKING_TRENDING_WINDOW
+    stats = {
+        row["title_id"]: row
+        for row in Review.objects.visible()
+        .filter(title_id__in=title_ids)
+        .order_by()
+        .values("title_id")
+        .annotate(
+            count=Count("id"),
+            total=Sum("score"),
+            recent=Count("id", filter=Q(pub_date__gte=since)),
+        )
+    }
+    previous = {
+        title_id: (total, count)
+        for title_id, total, count in TitleRanking.objects.filter(
+            title_id__in=title_ids
+        ).values_list("title_id", "score_total", "reviews_count")
+    }
+    prior_mean = None
+    if settings.RANKING_BAYESIAN:
+        # shift the totals by the change of these titles
+        prior_mean = catalogue_mean(
+            sum(row["total"] for row in stats.values())
+            - sum(total for total, _ in previous.values()),
+            sum(row["count"] for row in stats.values())
+            - sum(count for _, count in previous.values()),
+        )
+    prior_votes = settings.RANKING_BAYESIAN_MIN_VOTES
+
+    rankings = []
+    for title_id in title_ids:
+        row = stats.get(title_id, {})
+        count = row.get("count", 0)
+        total = row.get("total") or 0
+        rankings.append(
+            TitleRanking(
+                title_id=title_id,
+                reviews_count=count,
+                score_total=total,
+                rating=total / count if count else None,
+                weighted_rating=weighted_rating(
+                    total, count, prior_mean, prior_votes
+                ),
+                recent_reviews=row.get("recent", 0),
+                updated=timezone.now(),
+            )
+        )
+
+    existing = previous.keys()
+    TitleRanking.objects.bulk_update(
+        [r for r in rankings if r.title_id in existing],
+        [
+            "reviews_count",
+            "score_total",
+            "rating",
+            "weighted_rating",
+            "recent_reviews",
+            "updated",
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    TitleRanking.objects.bulk_create(
+        [r for r in rankings if r.title_id not in existing],
+        batch_size=BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    hotcache.invalidate_titles(title_ids)
+
+
+def refresh_all_rankings():
+    """
+    Rebuild every ranking row, e.g. to slide the trending window; the
+    running totals are summed afresh.
+    """
+    RankingTotals.objects.all().delete()
+    ids = list(Title.objects.order_by("id").values_list("id", flat=True))
+    for start in range(0, len(ids), BATCH_SIZE):
+        end = start + BATCH_SIZE
+        refresh_title_rankings(ids[start:end])
+    return len(ids)
@@ -1,36 +1,112 @@
 from django.contrib.auth import get_user_model
 from django.core.validators import EmailValidator
+from django.utils.encoding import smart_str
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
 
-from .models import Category, Comment, Genre, Review, Title
+from .models import (
+    Category,
+    Comment,
+    Genre,
+    ModerationAudit,
+    Review,
+    Title,
+)
+from .slugs import category_slugs, genre_slugs
 
 User = get_user_model()
 
 
-class CommentSerializer(serializers.ModelSerializer):
-    author = serializers.SlugRelatedField(
-        read_only=True, slug_field="username"
-    )
-    review = serializers.SlugRelatedField(read_only=True, slug_field="id")
-    title = serializers.SlugRelatedField(read_only=True, slug_field="id")
+class ValuesRepresentationMixin:
+    """
+    Fast path for list endpoints: the representation is built straight
+    from `.values()` rows instead of model instances and field-by-field
+    `to_representation`. The output must stay identical to the regular
+    path. Serializers offering it define the `values_fields` to read
+    and a `represent_rows(rows)` classmethod.
+    """
+
+    values_fields = ()
+
+    @classmethod
+    def values_queryset(cls, queryset):
+        return queryset.prefetch_related(None).values(*cls.values_fields)
+
+
+class AuthorField(serializers.SlugRelatedField):
+    """
+    Author's username, rendered from the row's `author_username` copy
+    so no user has to be loaded.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(slug_field="username", **kwargs)
+
+    def get_attribute(self, instance):
+        if instance.author_username:
+            return instance.author_username
+        return super().get_attribute(instance)
+
+    def to_representation(self, value):
+        if isinstance(value, str):
+            return value
+        return super().to_representation(value)
+
+
+class CommentSerializer(
+    ValuesRepresentationMixin, serializers.ModelSerializer
+):
+    author = AuthorField(read_only=True)
+    review = serializers.PrimaryKeyRelatedField(read_only=True)
+    title = serializers.PrimaryKeyRelatedField(read_only=True)
 
     class Meta:
         model = Comment
         fields = ("id", "text", "author", "pub_date", "review", "title")
 
+    values_fields = ("id", "text", "author_username", "pub_date", "review")
 
-class ReviewSerializer(serializers.ModelSerializer):
-    author = serializers.SlugRelatedField(
-        read_only=False,
-        slug_field="username",
-        queryset=User.objects.all(),
-        default=serializers.CurrentUserDefault(),
-    )
+    @classmethod
+    def represent_rows(cls, rows):
+        pub_date = serializers.DateTimeField().to_representation
+        return [
+            {
+                "id": row["id"],
+                "text": row["text"],
+                "author": row["author_username"],
+                "pub_date": pub_date(row["pub_date"]),
+                "review": row["review"],
+            }
+            for row in rows
+        ]
+
+
+class ReviewSerializer(
+    ValuesRepresentationMixin, serializers.ModelSerializer
+):
+    # set from the request on create, never rewritten by an update
+    author = AuthorField(read_only=True)
 
     class Meta:
         model = Review
         fields = ("id", "text", "author", "score", "pub_date")
 
+    values_fields = ("id", "text", "author_username", "score", "pub_date")
+
+    @classmethod
+    def represent_rows(cls, rows):
+        pub_date = serializers.DateTimeField().to_representation
+        return [
+            {
+                "id": row["id"],
+                "text": row["text"],
+                "author": row["author_username"],
+                "score": row["score"],
+                "pub_date": pub_date(row["pub_date"]),
+            }
+            for row in rows
+        ]
+
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
@@ -44,7 +120,9 @@ class GenreSerializer(serializers.ModelSerializer):
         fields = ["name", "slug"]
 
 
-class TitleGetSerializer(serializers.ModelSerializer):
+class TitleGetSerializer(
+    ValuesRepresentationMixin, serializers.ModelSerializer
+):
     genre = GenreSerializer(
         many=True,
         read_only=True,
@@ -57,13 +135,75 @@ class TitleGetSerializer(serializers.ModelSerializer):
         model = Title
         fields = "__all__"
 
+    values_fields = (
+        "id",
+        "category__name",
+        "category__slug",
+        "rating",
+        "name",
+        "year",
+        "description",
+    )
+
+    @classmethod
+    def represent_rows(cls, rows):
+        rows = list(rows)
+        genres = {row["id"]: [] for row in rows}
+        links = (
+            Title.genre.through.objects.filter(title_id__in=genres)
+            .order_by("genre_id")
+            .values_list("title_id", "genre__name", "genre__slug")
+        )
+        for title_id, name, slug in links:
+            genres[title_id].append({"name": name, "slug": slug})
+        return [cls.represent_row(row, genres[row["id"]]) for row in rows]
+
+    @classmethod
+    def represent_row(cls, row, genres):
+        return {
+            "id": row["id"],
+            "genre": genres,
+            "category": (
+                None
+                if row["category__slug"] is None
+                else {
+                    "name": row["category__name"],
+                    "slug": row["category__slug"],
+                }
+            ),
+            "rating": None if row["rating"] is None else int(row["rating"]),
+            "name": row["name"],
+            "year": row["year"],
+            "description": row["description"],
+        }
+
+
+class CachedSlugRelatedField(serializers.SlugRelatedField):
+    """SlugRelatedField resolving slugs through an api.slugs.SlugMap."""
+
+    def __init__(self, slug_map, **kwargs):
+        self.slug_map = slug_map
+        super().__init__(slug_field="slug", **kwargs)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            self.fail("invalid")
+        instance = self.slug_map.get(data)
+        if instance is None:
+            self.fail(
+                "does_not_exist",
+                slug_name=self.slug_field,
+                value=smart_str(data),
+            )
+        return instance
+
 
 class TitleCreateSerializer(serializers.ModelSerializer):
-    category = serializers.SlugRelatedField(
-        slug_field="slug", queryset=Category.objects.all()
+    category = CachedSlugRelatedField(
+        category_slugs, queryset=Category.objects.all()
     )
-    genre = serializers.SlugRelatedField(
-        slug_field="slug", queryset=Genre.objects.all(), many=True
+    genre = CachedSlugRelatedField(
+        genre_slugs, queryset=Genre.objects.all(), many=True
     )
 
     class Meta:
@@ -83,6 +223,47 @@ class ActivationCodeSerializer(serializers.Serializer):
     confirmation_code = serializers.CharField()
 
 
+class TitleShortSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Title
+        fields = ("id", "name")
+
+
+class ReviewHistorySerializer(serializers.ModelSerializer):
+    title = TitleShortSerializer(read_only=True)
+
+    class Meta:
+        model = Review
+        fields = ("id", "text", "score", "pub_date", "title", "is_hidden")
+
+
+class CommentHistorySerializer(serializers.ModelSerializer):
+    title = serializers.IntegerField(source="review.title_id")
+
+    class Meta:
+        model = Comment
+        fields = ("id", "text", "pub_date", "review", "title", "is_hidden")
+
+
+class ModerationSerializer(serializers.Serializer):
+    action = serializers.ChoiceField(choices=ModerationAudit.Action.choices)
+    target = serializers.ChoiceField(choices=ModerationAudit.Target.choices)
+    ids = serializers.ListField(
+        child=serializers.IntegerField(), required=False, max_length=10000
+    )
+    author = serializers.SlugRelatedField(
+        slug_field="username", queryset=User.objects.all(), required=False
+    )
+    title = serializers.PrimaryKeyRelatedField(
+        queryset=Title.objects.all(), required=False
+    )
+
+    def validate(self, data):
+        if not any(key in data for key in ("ids", "author", "title")):
+            raise serializers.ValidationError("Укажите ids, author или title")
+        return data
+
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -94,3 +275,12 @@ class UserSerializer(serializers.ModelSerializer):
             "email",
             "role",
         )
+        # soft-deleted users keep their username and email until purged
+        extra_kwargs = {
+            field: {
+                "validators": [
+                    UniqueValidator(queryset=User.all_objects.all())
+                ]
+            }
+            for field in ("username", "email")
+        }
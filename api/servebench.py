@@ -0,0 +1,180 @@
+"""
+Serving benchmark of the multi-process setup (see gunicorn.conf.py).
+A master process in a fresh interpreter forks the workers either after
+loading and warming up the application ("preload") or before touching
+Django at all, each worker loading it on its own ("cold"). Every worker
+times its first request per path through the WSGI application and,
+once all of them are alive, reports its memory: RSS, PSS (shared pages
+split between the processes) and USS (pages only this worker has).
+
+Nothing from Django is imported at module level: in the cold mode the
+master must not load the application.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+MASTER_SCRIPT = """
+import json, sys
+from api.servebench import run_master
+print(json.dumps(run_master(**json.loads(sys.argv[1]))))
+"""
+
+MODES = ("preload", "cold")
+
+
+def parse_memory(text):
+    """RSS, PSS and USS in kB from the text of /proc/<pid>/smaps_rollup."""
+    fields = {}
+    for line in text.splitlines():
+        name, _, value = line.partition(":")
+        parts = value.split()
+        if len(parts) == 2 and parts[1] == "kB":
+            fields[name] = int(parts[0])
+    return {
+        "rss": fields.get("Rss"),
+        "pss": fields.get("Pss"),
+        "uss": (
+            fields["Private_Clean"] + fields["Private_Dirty"]
+            if "Private_Clean" in fields and "Private_Dirty" in fields
+            else None
+        ),
+    }
+
+
+def process_memory():
+    try:
+        with open("/proc/self/smaps_rollup") as smaps:
+            return parse_memory(smaps.read())
+    except OSError:
+        import resource
+
+        # peak RSS only, in kB on Linux
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {"rss": peak, "pss": None, "uss": None}
+
+
+def load_application():
+    from api_yamdb.wsgi import application
+
+    return application
+
+
+def timed_request(application, path):
+    from wsgiref.util import setup_testing_defaults
+
+    environ = {"PATH_INFO": path, "HTTP_ACCEPT": "application/json"}
+    setup_testing_defaults(environ)
+    statuses = []
+    start = time.perf_counter()
+    response = application(
+        environ, lambda status, headers, *args: statuses.append(status)
+    )
+    try:
+        b"".join(response)
+    finally:
+        getattr(response, "close", lambda: None)()
+    elapsed = time.perf_counter() - start
+    return {"path": path, "status": int(statuses[0][:3]), "ms": elapsed * 1e3}
+
+
+def run_worker(application, paths, report, go):
+    start = time.perf_counter()
+    if application is None:
+        application = load_application()
+    boot = (time.perf_counter() - start) * 1e3
+    requests = [timed_request(application, path) for path in paths]
+    report.write("ready\n")
+    report.flush()
+    # memory is read only once every worker is up
+    go.read(1)
+    return {"boot_ms": boot, "requests": requests, **process_memory()}
+
+
+def fork_worker(application, paths):
+    report_read, report_write = os.pipe()
+    go_read, go_write = os.pipe()
+    pid = os.fork()
+    if pid:
+        os.close(report_write)
+        os.close(go_read)
+        return pid, os.fdopen(report_read), os.fdopen(go_write, "w")
+    os.close(report_read)
+    os.close(go_write)
+    status = 1
+    try:
+        with os.fdopen(report_write, "w") as report, os.fdopen(go_read) as go:
+            result = run_worker(application, paths, report, go)
+            report.write(json.dumps(result) + "\n")
+        status = 0
+    finally:
+        os._exit(status)
+
+
+def run_master(mode, workers, paths):
+    """Fork the workers and collect their reports (runs in the master)."""
+    application = None
+    if mode == "preload":
+        application = load_application()
+        from api.warmup import warm_up
+
+        warm_up()
+    sys.stdout.flush()
+    children = [fork_worker(application, paths) for _ in range(workers)]
+    for _, report, _ in children:
+        if report.readline() != "ready\n":
+            raise RuntimeError("a worker failed before its first request")
+    for _, _, go in children:
+        go.write("g")
+        go.close()
+    results = []
+    for pid, report, _ in children:
+        results.append(json.loads(report.readline()))
+        report.close()
+        os.waitpid(pid, 0)
+    return results
+
+
+def benchmark(mode, workers=2, paths=("/api/v1/",), settings_module=None):
+    """Run a master of the given mode in a subprocess, return its workers."""
+    if mode not in MODES:
+        raise ValueError(f"unknown mode {mode!r}")
+    env = dict(os.environ)
+    if settings_module:
+        env["DJANGO_SETTINGS_MODULE"] = settings_module
+    env.setdefault("DJANGO_SETTINGS_MODULE", "api_yamdb.settings_api")
+    arguments = {"mode": mode, "workers": workers, "paths": list(paths)}
+    result = subprocess.run(
+        [sys.executable, "-c", MASTER_SCRIPT, json.dumps(arguments)],
+        env=env,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode:
+        lines = result.stderr.strip().splitlines() or ["no output"]
+        raise RuntimeError(lines[-1])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def summarize(results):
+    """Means over the workers: boot and first request ms, memory in kB."""
+
+    def mean(values):
+        values = [value for value in values if value is not None]
+        return sum(values) / len(values) if values else None
+
+    return {
+        "boot_ms": mean(result["boot_ms"] for result in results),
+        "first_request_ms": mean(
+            sum(request["ms"] for request in result["requests"])
+            for result in results
+        ),
+        **{
+            key: mean(result[key] for result in results)
+            for key in ("rss", "pss", "uss")
+        },
+    }
@@ -0,0 +1,75 @@
+import threading
+import uuid
+
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from . import metrics
+from .models import Category, Genre
+
+
+class SlugMap:
+    """
+    In-process slug -> object map of a small, rarely changing table.
+    Writers bump a version token in the cache, readers reload the map
+    when their copy is outdated; resolving slugs needs no query. The
+    token lives in the default cache, which must be shared by all the
+    worker processes (see CACHES in the settings).
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.version_key = f"slugs:{model._meta.label_lower}:version"
+        self.version = None
+        self.objects = {}
+        # slugs missing from the map loaded for `version`
+        self.missing = set()
+        self.lock = threading.Lock()
+
+    def __deepcopy__(self, memo):
+        # serializer fields are deep-copied, the map must stay shared
+        return self
+
+    def current_version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            cache.add(self.version_key, uuid.uuid4().hex, None)
+            version = cache.get(self.version_key)
+        return version
+
+    def invalidate(self):
+        cache.set(self.version_key, uuid.uuid4().hex, None)
+
+    def load(self, version):
+        rows = self.model.objects.values_list("id", "name", "slug")
+        objects = {
+            slug: (pk, name, slug) for pk, name, slug in rows.iterator()
+        }
+        with self.lock:
+            self.objects = objects
+            self.missing = set()
+            self.version = version
+
+    def get(self, slug):
+        """Object with the given slug (without a query) or None."""
+        version = self.current_version()
+        fresh = version == self.version
+        if not fresh:
+            self.load(version)
+        values = self.objects.get(slug)
+        metrics.cache_access("slugs", fresh and values is not None)
+        if values is None and fresh and slug not in self.missing:
+            # created by a writer that could not reach our cache; an
+            # unknown slug reloads the map once per version
+            self.load(version)
+            values = self.objects.get(slug)
+        if values is None:
+            self.missing.add(slug)
+            return None
+        return self.model.from_db(
+            DEFAULT_DB_ALIAS, ["id", "name", "slug"], values
+        )
+
+
+category_slugs = SlugMap(Category)
+genre_slugs = SlugMap(Genre)
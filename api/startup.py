@@ -0,0 +1,72 @@
+"""
+Worker cold start profiling: boots the project in a fresh interpreter
+under `python -X importtime` and aggregates the import time per module
+and per package.
+"""
+
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+# what a worker does before it can answer the first request
+BOOT_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(f"boot time: {time.perf_counter() - start}", file=sys.stderr)
+"""
+
+
+def parse_importtime(lines):
+    """(module, self µs, cumulative µs) of every `-X importtime` line."""
+    imports = []
+    boot_time = None
+    for line in lines:
+        if line.startswith("boot time:"):
+            boot_time = float(line.split(":", 1)[1])
+            continue
+        if not line.startswith("import time:"):
+            continue
+        parts = line.split(":", 1)[1].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        imports.append(
+            (parts[2].strip(), int(parts[0]), int(parts[1].strip()))
+        )
+    return imports, boot_time
+
+
+def package_of(module):
+    """Top-level package, contrib apps are kept apart."""
+    parts = module.split(".")
+    if parts[:2] == ["django", "contrib"] and len(parts) > 2:
+        return ".".join(parts[:3])
+    return parts[0]
+
+
+def by_package(imports):
+    totals = defaultdict(int)
+    for module, self_time, _ in imports:
+        totals[package_of(module)] += self_time
+    return sorted(totals.items(), key=lambda item: -item[1])
+
+
+def profile_startup(settings_module=None, python=sys.executable):
+    """Boot the project in a subprocess, return its imports and time."""
+    env = dict(os.environ)
+    if settings_module:
+        env["DJANGO_SETTINGS_MODULE"] = settings_module
+    env.setdefault("DJANGO_SETTINGS_MODULE", "api_yamdb.settings")
+    result = subprocess.run(
+        [python, "-X", "importtime", "-c", BOOT_SCRIPT],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return parse_importtime(result.stderr.splitlines())
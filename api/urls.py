@@ -6,6 +6,7 @@ from .views import (
     CategoryViewSet,
     CommentViewSet,
     GenreViewSet,
+    ModerationViewSet,
     ReviewViewSet,
     SendEmailConfirmationViewSet,
     TitleViewSet,
@@ -38,4 +39,5 @@ urlpatterns = [
         ActivateUserViewSet.as_view(),
         name="token_obtain_pair",
     ),
+    path("v1/moderation/", ModerationViewSet.as_view(), name="moderation"),
 ]
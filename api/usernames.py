@@ -0,0 +1,114 @@
+"""
+The `author_username` copies on reviews and comments. They are written
+with the row; a rename only queues a UsernameChange, and
+`manage.py propagate_usernames` rewrites the copies in batches in the
+background, so neither the request nor a single statement rewrites
+everything a prolific author wrote. `manage.py sync_author_usernames`
+repairs copies changed behind the API's back (e.g. a rename in the
+admin).
+"""
+
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import F
+
+from . import hotcache
+from .models import ArchivedComment, Comment, Review, UsernameChange
+
+User = get_user_model()
+
+MODELS = [Review, Comment, ArchivedComment]
+
+
+def update_in_batches(queryset, batch_size, **changes):
+    queryset = queryset.order_by()
+    updated = 0
+    while True:
+        ids = list(queryset.values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            return updated
+        with transaction.atomic():
+            updated += queryset.model._base_manager.filter(pk__in=ids).update(
+                **changes
+            )
+
+
+def copy_username(model, user_id, username, batch_size):
+    return update_in_batches(
+        model._base_manager.filter(author_id=user_id).exclude(
+            author_username=username
+        ),
+        batch_size,
+        author_username=username,
+    )
+
+
+def propagate_username(user_id, username, batch_size=None):
+    """Write the new username into the user's reviews and comments."""
+    batch_size = batch_size or settings.AUTHOR_USERNAME_BATCH_SIZE
+    return sum(
+        copy_username(model, user_id, username, batch_size)
+        for model in MODELS
+    )
+
+
+def enqueue_rename(user):
+    """Queue the rewrite of the user's copies (a single INSERT)."""
+    return UsernameChange.objects.create(user=user)
+
+
+def propagate_queued(batch_size=None):
+    """
+    Rewrite the copies of up to `batch_size` queued renames with the
+    authors' current usernames, then drop the handled entries. Returns
+    the number of entries handled.
+    """
+    batch_size = batch_size or settings.AUTHOR_USERNAME_BATCH_SIZE
+    queued = list(
+        UsernameChange.objects.values_list("pk", "user_id")[:batch_size]
+    )
+    if not queued:
+        return 0
+    for user_id, username in User.all_objects.filter(
+        pk__in={user_id for _, user_id in queued}
+    ).values_list("pk", "username"):
+        propagate_username(user_id, username)
+    # entries queued meanwhile stay for the next round
+    UsernameChange.objects.filter(pk__in=[pk for pk, _ in queued]).delete()
+    hotcache.invalidate_all()
+    return len(queued)
+
+
+def run_propagator(interval, batch_size=None, once=False):
+    """Handle the queue until it is empty, then poll every `interval`."""
+    while True:
+        if propagate_queued(batch_size):
+            continue
+        if once:
+            return
+        time.sleep(interval)
+
+
+def sync_author_usernames(batch_size=None):
+    """
+    Fix every copy that differs from the author's username. Returns
+    the number of updated rows per model.
+    """
+    batch_size = batch_size or settings.AUTHOR_USERNAME_BATCH_SIZE
+    counts = {}
+    for model in MODELS:
+        stale = (
+            model._base_manager.exclude(author_username=F("author__username"))
+            .values_list("author_id", flat=True)
+            .distinct()
+        )
+        counts[model._meta.model_name] = sum(
+            copy_username(model, user_id, username, batch_size)
+            for user_id, username in User.all_objects.filter(
+                pk__in=list(stale)
+            ).values_list("pk", "username")
+        )
+    return counts
@@ -1,7 +1,12 @@
+from functools import partial
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.mail import EmailMessage
-from django.db.models import Avg
+from django.db.models import F
+from django.http import Http404
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import (
     filters,
@@ -12,26 +17,55 @@ from rest_framework import (
     viewsets,
 )
 from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework_simplejwt.tokens import RefreshToken
 
 from users.tokens import account_activation_token
 
-from .filters import TitleFilter
-from .models import Category, Comment, Genre, Review, Title
-from .permissions import FullObjAccess, IsAdmin, ObjReadOnly, ReadOnly
+from . import hotcache, hotqueries, metrics
+from .archive import LiveAndArchive, LiveAndArchiveHistory, recount_archived
+from .expand import expand_title, parse_expand
+from .filters import TitleFilter, TitleOrderingFilter, UserSearchFilter
+from .ingestion import enqueue_review
+from .models import (
+    ArchivedComment,
+    Category,
+    Comment,
+    Genre,
+    QueuedReview,
+    Review,
+    Title,
+)
+from .moderation import moderate
+from .pagination import HistoryPagination
+from .permissions import (
+    FullObjAccess,
+    IsAdmin,
+    IsModerator,
+    ObjReadOnly,
+    ReadOnly,
+    get_capabilities,
+)
+from .purge import soft_delete_user
+from .rankings import forget_title_rankings, refresh_title_rankings
 from .serializers import (
     ActivationCodeSerializer,
     CategorySerializer,
+    CommentHistorySerializer,
     CommentSerializer,
     ConfirmationCodeSerializer,
     GenreSerializer,
+    ModerationSerializer,
+    ReviewHistorySerializer,
     ReviewSerializer,
     TitleCreateSerializer,
     TitleGetSerializer,
     UserSerializer,
 )
+from .slugs import category_slugs, genre_slugs
+from .usernames import enqueue_rename
 
 User = get_user_model()
 
@@ -45,6 +79,100 @@ class CreateDestroyListViewSet(
     pass
 
 
+class ValuesListMixin:
+    """
+    Serve `list` through the serializer's `.values()` fast path when it
+    has one and SERIALIZER_FAST_PATH is on.
+    """
+
+    def list(self, request, *args, **kwargs):
+        serializer_class = self.get_serializer_class()
+        if not (
+            settings.SERIALIZER_FAST_PATH
+            and hasattr(serializer_class, "represent_rows")
+        ):
+            return super().list(request, *args, **kwargs)
+
+        queryset = serializer_class.values_queryset(
+            self.filter_queryset(self.get_queryset())
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                serializer_class.represent_rows(page)
+            )
+        return Response(serializer_class.represent_rows(queryset))
+
+
+def use_hot_queries():
+    return settings.HOT_QUERIES and settings.SERIALIZER_FAST_PATH
+
+
+class ConditionalWriteMixin:
+    """
+    update/destroy of author-owned objects as one conditional
+    `UPDATE ... WHERE id=? AND author_id=?` (the author condition is
+    dropped for moderators) instead of loading the parent, the object
+    and saving every column. Only submitted fields are written; destroy
+    is a soft delete, see api.purge.
+
+    Views define `get_write_queryset()`, the objects the URL may address
+    before the author check, and `perform_conditional_write(changes)`,
+    called after a successful write (`changes` is None on destroy).
+    """
+
+    def addressed(self, pk):
+        """Object of the URL in the write queryset; 404 on a bad pk."""
+        try:
+            pk = int(pk)
+        except ValueError:
+            raise Http404
+        return self.get_write_queryset().filter(pk=pk)
+
+    def writable(self, queryset):
+        capabilities = get_capabilities(self.request)
+        if capabilities.can_moderate:
+            return queryset
+        return queryset.filter(author_id=capabilities.user_id)
+
+    def write_denied(self, queryset):
+        # nothing was written: the object is either missing or not ours
+        if queryset.exists():
+            raise PermissionDenied
+        raise Http404
+
+    def update(self, request, *args, **kwargs):
+        serializer = self.get_serializer(
+            data=request.data, partial=kwargs.pop("partial", False)
+        )
+        serializer.is_valid(raise_exception=True)
+        changes = {
+            field: value
+            for field, value in serializer.validated_data.items()
+            if field in request.data
+        }
+
+        queryset = self.addressed(kwargs["pk"])
+        if changes:
+            written = self.writable(queryset).update(**changes)
+        else:
+            written = self.writable(queryset).exists()
+        if not written:
+            self.write_denied(queryset)
+        self.perform_conditional_write(changes)
+
+        instance = queryset.get()
+        return Response(self.get_serializer(instance).data)
+
+    def destroy(self, request, *args, **kwargs):
+        queryset = self.addressed(kwargs["pk"])
+        deleted = self.writable(queryset).update(deleted_at=timezone.now())
+        if not deleted:
+            self.write_denied(queryset)
+        self.perform_conditional_write(None)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 class CategoryViewSet(CreateDestroyListViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
@@ -54,6 +182,15 @@ class CategoryViewSet(CreateDestroyListViewSet):
     search_fields = ["name"]
     lookup_field = "slug"
 
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        category_slugs.invalidate()
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        category_slugs.invalidate()
+        hotcache.invalidate_all()
+
 
 class GenreViewSet(CreateDestroyListViewSet):
     queryset = Genre.objects.all()
@@ -64,12 +201,29 @@ class GenreViewSet(CreateDestroyListViewSet):
     search_fields = ["name"]
     lookup_field = "slug"
 
-
-class TitleViewSet(viewsets.ModelViewSet):
-    queryset = Title.objects.all().annotate(rating=Avg("reviews__score"))
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        genre_slugs.invalidate()
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        genre_slugs.invalidate()
+        hotcache.invalidate_all()
+
+
+class TitleViewSet(ValuesListMixin, viewsets.ModelViewSet):
+    queryset = (
+        Title.objects.select_related("category")
+        .prefetch_related("genre")
+        .annotate(
+            rating=F("ranking__rating"),
+            reviews_count=F("ranking__reviews_count"),
+        )
+    )
     permission_classes = [ReadOnly | IsAdminUser]
     filter_backends = [
         DjangoFilterBackend,
+        TitleOrderingFilter,
     ]
     filterset_class = TitleFilter
 
@@ -78,8 +232,60 @@ class TitleViewSet(viewsets.ModelViewSet):
             return TitleCreateSerializer
         return TitleGetSerializer
 
+    def retrieve(self, request, *args, **kwargs):
+        """`?expand=reviews,comments` embeds the first reviews/comments"""
+        expand = parse_expand(request.query_params.get("expand", ""))
+        if not kwargs["pk"].isdigit():
+            return Response(self.title_data(expand))
+        title_id = int(kwargs["pk"])
+        if use_hot_queries():
+            compute = partial(self.prepared_title, title_id, expand)
+        else:
+            compute = partial(self.title_data, expand)
+        variant = ",".join(sorted(expand))
+        return Response(hotcache.cached("title", title_id, variant, compute))
+
+    def title_data(self, expand):
+        instance = self.get_object()
+        data = self.get_serializer(instance).data
+        return expand_title(data, instance.pk, instance.reviews_count, expand)
+
+    def prepared_title(self, title_id, expand):
+        row = hotqueries.title_detail.first(title_id=title_id)
+        if row is None:
+            raise Http404
+        genres = [
+            {"name": genre["genre__name"], "slug": genre["genre__slug"]}
+            for genre in hotqueries.title_genres.bind(title_id=title_id)[:]
+        ]
+        data = TitleGetSerializer.represent_row(row, genres)
+        return expand_title(data, title_id, row["reviews_count"], expand)
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        hotcache.invalidate_titles([serializer.instance.pk])
+
+    def perform_destroy(self, instance):
+        hotcache.invalidate_titles([instance.pk])
+        forget_title_rankings([instance.pk])
+        super().perform_destroy(instance)
+
+    @action(detail=False, methods=["GET"], url_path="trending")
+    def trending(self, request, **kwargs):
+        """titles with the most reviews inside the trending window"""
+        queryset = (
+            self.filter_queryset(self.get_queryset())
+            .filter(ranking__recent_reviews__gt=0)
+            .order_by("-ranking__recent_reviews", "id")
+        )
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(
+    ConditionalWriteMixin, ValuesListMixin, viewsets.ModelViewSet
+):
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
     permission_classes = [
@@ -87,24 +293,108 @@ class CommentViewSet(viewsets.ModelViewSet):
         FullObjAccess | ObjReadOnly,
     ]
 
-    def get_queryset(self, **kwargs):
-        review = get_object_or_404(
-            Review,
+    def get_review(self):
+        return get_object_or_404(
+            Review.objects.visible(),
             id=self.kwargs.get("review_id"),
             title=self.kwargs.get("title_id"),
         )
-        return review.comments.all()
 
-    def perform_create(self, serializer):
-        review = get_object_or_404(
-            Review,
-            id=self.kwargs.get("review_id"),
-            title=self.kwargs.get("title_id"),
+    def get_queryset(self, **kwargs):
+        return self.get_review().comments.visible()
+
+    # set while a write falls back to the archived copy of the comment
+    archived = False
+
+    def get_write_queryset(self):
+        model = ArchivedComment if self.archived else Comment
+        return model.objects.visible().filter(
+            review_id=self.kwargs.get("review_id"),
+            review__title_id=self.kwargs.get("title_id"),
+            review__is_hidden=False,
+            review__deleted_at=None,
         )
-        serializer.save(author=self.request.user, review=review)
 
+    def list(self, request, *args, **kwargs):
+        """live comments first, archived ones past the end of them"""
+        if use_hot_queries():
+            return self.prepared_list()
+        review = self.get_review()
+        live = review.comments.visible()
+        archive = review.archived_comments.visible()
+        fast_path = settings.SERIALIZER_FAST_PATH
+        if fast_path:
+            live = live.values(*CommentSerializer.values_fields)
+            archive = archive.values(*CommentSerializer.values_fields)
+        page = self.paginate_queryset(
+            LiveAndArchive(live, archive, review.archived_comments_count)
+        )
+        if fast_path:
+            data = CommentSerializer.represent_rows(page)
+        else:
+            data = self.get_serializer(page, many=True).data
+        return self.get_paginated_response(data)
+
+    def prepared_list(self):
+        try:
+            review_id = int(self.kwargs["review_id"])
+            title_id = int(self.kwargs["title_id"])
+        except ValueError:
+            raise Http404
+        review = hotqueries.comment_review.first(
+            review_id=review_id, title_id=title_id
+        )
+        if review is None:
+            raise Http404
+        page = self.paginate_queryset(
+            LiveAndArchive(
+                hotqueries.comment_page.bind(review_id=review_id),
+                hotqueries.archived_comment_page.bind(review_id=review_id),
+                review["archived_comments_count"],
+            )
+        )
+        return self.get_paginated_response(
+            CommentSerializer.represent_rows(page)
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            archived = get_object_or_404(
+                self.get_review().archived_comments.visible(),
+                pk=kwargs["pk"],
+            )
+            return Response(self.get_serializer(archived).data)
+
+    def update(self, request, *args, **kwargs):
+        try:
+            return super().update(request, *args, **kwargs)
+        except Http404:
+            # archived comments keep their ids
+            self.archived = True
+            return super().update(request, *args, **kwargs)
+
+    def destroy(self, request, *args, **kwargs):
+        try:
+            return super().destroy(request, *args, **kwargs)
+        except Http404:
+            self.archived = True
+            return super().destroy(request, *args, **kwargs)
+
+    def perform_create(self, serializer):
+        serializer.save(author=self.request.user, review=self.get_review())
+        hotcache.invalidate_titles([int(self.kwargs.get("title_id"))])
 
-class ReviewViewSet(viewsets.ModelViewSet):
+    def perform_conditional_write(self, changes):
+        if self.archived and changes is None:
+            recount_archived([int(self.kwargs.get("review_id"))])
+        hotcache.invalidate_titles([int(self.kwargs.get("title_id"))])
+
+
+class ReviewViewSet(
+    ConditionalWriteMixin, ValuesListMixin, viewsets.ModelViewSet
+):
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
     permission_classes = [
@@ -114,15 +404,97 @@ class ReviewViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self, **kwargs):
         title = get_object_or_404(Title, id=self.kwargs.get("title_id"))
-        return title.reviews.all()
+        return title.reviews.visible()
+
+    def get_write_queryset(self):
+        return Review.objects.visible().filter(
+            title_id=self.kwargs.get("title_id")
+        )
+
+    def list(self, request, *args, **kwargs):
+        """the first page (no query parameters) comes from the hot cache"""
+        title_id = kwargs["title_id"]
+        if request.query_params or not title_id.isdigit():
+            return self.review_page(request, *args, **kwargs)
+        return Response(
+            hotcache.cached(
+                "reviews",
+                int(title_id),
+                request.get_host(),
+                lambda: self.review_page(request, *args, **kwargs).data,
+            )
+        )
+
+    def review_page(self, request, *args, **kwargs):
+        if not use_hot_queries() or not kwargs["title_id"].isdigit():
+            return super().list(request, *args, **kwargs)
+        title_id = int(kwargs["title_id"])
+        if hotqueries.title_exists.first(title_id=title_id) is None:
+            raise Http404
+        page = self.paginate_queryset(
+            hotqueries.review_page.bind(title_id=title_id)
+        )
+        return self.get_paginated_response(
+            ReviewSerializer.represent_rows(page)
+        )
+
+    def create(self, request, *args, **kwargs):
+        if not settings.REVIEW_INGESTION_BUFFERED:
+            return super().create(request, *args, **kwargs)
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        title = get_object_or_404(Title, id=self.kwargs.get("title_id"))
+        queued = enqueue_review(
+            title, request.user, serializer.validated_data
+        )
+        return Response(
+            {"handle": queued.handle, "status": queued.status},
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+    @action(
+        detail=False,
+        methods=["GET"],
+        url_path=r"queued/(?P<handle>[0-9a-f-]+)",
+    )
+    def queued(self, request, handle, **kwargs):
+        """status of a review sent in the buffered ingestion mode"""
+        queued = get_object_or_404(
+            QueuedReview, handle=handle, title_id=self.kwargs.get("title_id")
+        )
+        data = {
+            "handle": queued.handle,
+            "status": queued.status,
+            "error": queued.error,
+        }
+        if queued.status == QueuedReview.Status.ACCEPTED:
+            data["id"] = (
+                Review.objects.filter(
+                    title_id=queued.title_id,
+                    author_id=queued.author_id,
+                    deleted_at=None,
+                )
+                .values_list("id", flat=True)
+                .first()
+            )
+        return Response(data)
 
     def perform_create(self, serializer):
         title = get_object_or_404(Title, id=self.kwargs.get("title_id"))
-        if title.reviews.filter(author=self.request.user):
+        if title.reviews.filter(author=self.request.user, deleted_at=None):
             raise serializers.ValidationError(
                 "Вы не можете оставить еще один отзыв"
             )
         serializer.save(author=self.request.user, title=title)
+        refresh_title_rankings([title.id])
+
+    def perform_conditional_write(self, changes):
+        title_id = int(self.kwargs.get("title_id"))
+        if changes is None or "score" in changes:
+            refresh_title_rankings([title_id])
+        else:
+            hotcache.invalidate_titles([title_id])
 
 
 def get_tokens_for_user(user):
@@ -142,7 +514,12 @@ def send_code_by_email(email, code):
         to=[email],
     )
 
-    email.send()
+    try:
+        email.send()
+    except Exception:
+        metrics.inc("yamdb_emails_total", result="failed")
+        raise
+    metrics.inc("yamdb_emails_total", result="sent")
 
 
 class SendEmailConfirmationViewSet(generics.GenericAPIView):
@@ -158,8 +535,9 @@ class SendEmailConfirmationViewSet(generics.GenericAPIView):
 
         user_email = serializer.validated_data.get("email")
 
-        # get or create user
-        user, created = User.objects.get_or_create(
+        # get or create user (a soft-deleted one keeps the email until
+        # purged and cannot be activated)
+        user, created = User.all_objects.get_or_create(
             email=user_email,
         )
 
@@ -202,11 +580,28 @@ class ActivateUserViewSet(generics.GenericAPIView):
                 get_tokens_for_user(user), status=status.HTTP_200_OK
             )
 
+        metrics.inc("yamdb_auth_failures_total", reason="invalid_code")
         return Response(
             "token is not valid", status=status.HTTP_400_BAD_REQUEST
         )
 
 
+class ModerationViewSet(generics.GenericAPIView):
+    """bulk delete / hide / unhide of reviews or comments"""
+
+    permission_classes = [IsAuthenticated, IsModerator]
+    serializer_class = ModerationSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        audit = moderate(request.user, **serializer.validated_data)
+        return Response(
+            {"audit": audit.pk, "affected": audit.affected},
+            status=status.HTTP_200_OK,
+        )
+
+
 class UserViewSet(viewsets.ModelViewSet):
 
     queryset = User.objects.all()
@@ -215,11 +610,66 @@ class UserViewSet(viewsets.ModelViewSet):
 
     permission_classes = [IsAuthenticated, IsAdmin]
 
-    filter_backends = [filters.SearchFilter]
+    filter_backends = [UserSearchFilter]
     search_fields = [
         "username",
+        "email",
     ]
 
+    def author_history(self, queryset):
+        author_id = (
+            User.objects.filter(username=self.kwargs["username"])
+            .values_list("id", flat=True)
+            .first()
+        )
+        if author_id is None:
+            raise Http404
+        paginator = HistoryPagination()
+        page = paginator.paginate_queryset(
+            queryset.filter(author_id=author_id), self.request, view=self
+        )
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(
+        detail=True,
+        methods=["GET"],
+        permission_classes=[IsAuthenticated, IsModerator],
+        serializer_class=ReviewHistorySerializer,
+    )
+    def reviews(self, request, **kwargs):
+        """reviews of the user across titles, newest first"""
+        return self.author_history(
+            Review.objects.filter(deleted_at=None).select_related("title")
+        )
+
+    @action(
+        detail=True,
+        methods=["GET"],
+        permission_classes=[IsAuthenticated, IsModerator],
+        serializer_class=CommentHistorySerializer,
+    )
+    def comments(self, request, **kwargs):
+        """comments of the user across titles, newest first"""
+        live, archive = (
+            model.objects.filter(
+                deleted_at=None, review__deleted_at=None
+            ).select_related("review")
+            for model in (Comment, ArchivedComment)
+        )
+        return self.author_history(LiveAndArchiveHistory(live, archive))
+
+    def perform_update(self, serializer):
+        renamed = "username" in serializer.validated_data
+        super().perform_update(serializer)
+        if renamed:
+            # reviews and comments show the author's username, rewritten
+            # by `manage.py propagate_usernames`
+            enqueue_rename(serializer.instance)
+
+    def perform_destroy(self, instance):
+        soft_delete_user(instance)
+
     @action(
         detail=False,
         methods=["GET"],
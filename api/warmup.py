@@ -0,0 +1,48 @@
+"""
+Warm-up of a serving process before its workers are forked (see
+gunicorn.conf.py). Everything loaded here is built once in the master
+and shared by the workers copy-on-write, instead of being rebuilt by
+each worker on its first requests.
+"""
+
+import gc
+
+from django.db import connections
+from django.urls import get_resolver
+
+from . import hotqueries, serializers
+from .slugs import category_slugs, genre_slugs
+
+SERIALIZERS = [
+    serializers.TitleGetSerializer,
+    serializers.TitleCreateSerializer,
+    serializers.ReviewSerializer,
+    serializers.CommentSerializer,
+    serializers.CategorySerializer,
+    serializers.GenreSerializer,
+    serializers.UserSerializer,
+]
+
+
+def warm_up():
+    """
+    Populate the URL resolver, the slug maps, model and serializer
+    field caches and the prepared hot queries, then close the database
+    connections (a socket must not be shared by forked workers) and
+    freeze the heap so the garbage collector leaves the shared pages
+    alone.
+    """
+    get_resolver().reverse_dict
+    for slug_map in (category_slugs, genre_slugs):
+        slug_map.load(slug_map.current_version())
+    for serializer_class in SERIALIZERS:
+        # builds the model field mappings and _meta caches
+        serializer_class().fields
+    for query in vars(hotqueries).values():
+        if isinstance(query, hotqueries.PreparedQuery):
+            if query.statement is None:
+                query.compile()
+    connections.close_all()
+    gc.collect()
+    if hasattr(gc, "freeze"):
+        gc.freeze()
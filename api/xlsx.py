@@ -0,0 +1,198 @@
+"""
+Streaming reader of .xlsx workbooks (like data/YaMDb.xlsx) for the bulk
+loader. Sheets are parsed row by row with iterparse straight from the
+zip archive and every parsed row is detached from the tree, so a large
+workbook never sits in memory; only the shared string table is kept,
+cells refer to it by index.
+"""
+
+import posixpath
+import re
+import zipfile
+from datetime import datetime, timedelta
+from xml.etree.ElementTree import iterparse
+
+from .loaders import LoadError
+
+MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+PACKAGE_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+# sheet name (case-insensitive) of every table of api.loaders.TABLES
+SHEETS = {
+    "users": "users",
+    "category": "categories",
+    "genre": "genres",
+    "titles": "titles",
+    "genre_title": "genre_titles",
+    "review": "reviews",
+    "comments": "comments",
+}
+
+# numeric cells in these columns are Excel dates (days since 1899-12-30)
+DATE_COLUMNS = {"pub_date"}
+EXCEL_EPOCH = datetime(1899, 12, 30)
+
+COLUMN = re.compile(r"[A-Z]+")
+
+
+def column_index(reference):
+    """0-based column of a cell reference: "A1" -> 0, "AB7" -> 27."""
+    index = 0
+    for letter in COLUMN.match(reference).group():
+        index = index * 26 + ord(letter) - ord("A") + 1
+    return index - 1
+
+
+def iter_elements(source, tag):
+    """
+    Yield every complete `tag` element of an xml stream and detach it
+    from its parent once the caller is done with it, so the tree built
+    by iterparse does not grow with the number of elements.
+    """
+    parents = []
+    for event, element in iterparse(source, events=("start", "end")):
+        if event == "start":
+            parents.append(element)
+            continue
+        parents.pop()
+        if element.tag == tag:
+            yield element
+            if parents:
+                parents[-1].remove(element)
+
+
+def shared_strings(archive):
+    if "xl/sharedStrings.xml" not in archive.namelist():
+        return []
+    with archive.open("xl/sharedStrings.xml") as source:
+        # rich text keeps its runs in several <t> elements
+        return [
+            "".join(t.text or "" for t in element.iter(f"{MAIN}t"))
+            for element in iter_elements(source, f"{MAIN}si")
+        ]
+
+
+def sheet_paths(archive):
+    """{sheet name: path of its xml in the archive} in workbook order."""
+    with archive.open("xl/_rels/workbook.xml.rels") as source:
+        targets = {
+            element.get("Id"): element.get("Target")
+            for _, element in iterparse(source)
+            if element.tag == f"{PACKAGE_REL}Relationship"
+        }
+    paths = {}
+    with archive.open("xl/workbook.xml") as source:
+        for _, element in iterparse(source):
+            if element.tag == f"{MAIN}sheet":
+                target = targets[element.get(f"{REL}id")]
+                if target.startswith("/"):
+                    path = target.lstrip("/")
+                else:
+                    path = posixpath.join("xl", target)
+                paths[element.get("name")] = posixpath.normpath(path)
+    return paths
+
+
+def cell_value(cell, strings):
+    kind = cell.get("t")
+    if kind == "inlineStr":
+        return "".join(t.text or "" for t in cell.iter(f"{MAIN}t"))
+    value = cell.findtext(f"{MAIN}v")
+    if value is None:
+        return ""
+    if kind == "s":
+        return strings[int(value)]
+    if kind == "b":
+        return "true" if value == "1" else "false"
+    if kind in ("str", "e"):
+        return value
+    if kind == "d":
+        return iso_date(cell, value)
+    try:
+        number = float(value)
+    except ValueError:
+        raise LoadError(
+            f"cell {cell.get('r')}: unreadable {kind or 'n'} value {value!r}"
+        )
+    if number.is_integer():
+        # the loader expects "1994", not "1994.0"
+        return str(int(number))
+    return value
+
+
+def iso_date(cell, value):
+    """Value of a t="d" cell (ISO 8601), a naive one is taken as UTC."""
+    try:
+        moment = datetime.fromisoformat(value.rstrip("Z"))
+    except ValueError:
+        raise LoadError(f"cell {cell.get('r')}: invalid date {value!r}")
+    text = moment.isoformat(timespec="seconds")
+    return text if moment.tzinfo else text + "Z"
+
+
+def excel_date(value):
+    if not value or not re.fullmatch(r"\d+(\.\d+)?", value):
+        return value
+    moment = EXCEL_EPOCH + timedelta(days=float(value))
+    return moment.isoformat(timespec="seconds") + "Z"
+
+
+def read_sheet(archive, path, strings):
+    """
+    Yield the rows of a sheet as dicts keyed by the header row; empty
+    rows are skipped.
+    """
+    header = None
+    with archive.open(path) as source:
+        for element in iter_elements(source, f"{MAIN}row"):
+            values = {}
+            for cell in element.iter(f"{MAIN}c"):
+                value = cell_value(cell, strings)
+                if value != "":
+                    values[column_index(cell.get("r"))] = value
+            if not values:
+                continue
+            if header is None:
+                header = {
+                    index: name.strip() for index, name in values.items()
+                }
+                continue
+            row = {
+                name: values.get(index, "") for index, name in header.items()
+            }
+            for column in DATE_COLUMNS & row.keys():
+                row[column] = excel_date(row[column])
+            yield row
+
+
+def xlsx_tables(path):
+    """
+    {table: rows} of a workbook for `api.loaders.load_tables`, the
+    sheets are read lazily one at a time, each with the archive open
+    only while it is read. Raises LoadError if the file is not a
+    workbook, or once reading reaches a cell it cannot read.
+    """
+    try:
+        with zipfile.ZipFile(path) as archive:
+            paths = sheet_paths(archive)
+    except (OSError, KeyError, zipfile.BadZipFile) as exc:
+        raise LoadError(f"{path}: not an xlsx workbook ({exc})")
+    strings = None
+
+    def rows(sheet_path):
+        nonlocal strings
+        # the archive is open while the sheet is read
+        with zipfile.ZipFile(path) as archive:
+            if strings is None:
+                strings = shared_strings(archive)
+            try:
+                yield from read_sheet(archive, sheet_path, strings)
+            except LoadError as exc:
+                raise LoadError(f"{path} {sheet_path}: {exc}")
+
+    return {
+        SHEETS[name.lower()]: rows(sheet_path)
+        for name, sheet_path in paths.items()
+        if name.lower() in SHEETS
+    }
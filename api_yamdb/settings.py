@@ -15,11 +15,12 @@ from datetime import timedelta
 
 from dotenv import load_dotenv
 
-load_dotenv("../.env")
-
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+# .env next to the project directory, wherever the process is started
+load_dotenv(os.path.join(os.path.dirname(BASE_DIR), ".env"))
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/3.0/howto/deployment/checklist/
@@ -35,6 +36,10 @@ ALLOWED_HOSTS = ["*"]
 
 # Application definition
 
+# Stateless JWT API workers (api_yamdb.settings_api) serve no admin,
+# redoc page or browsable API.
+API_ONLY = False
+
 INSTALLED_APPS = [
     "django.contrib.admin",
     "django.contrib.auth",
@@ -49,7 +54,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "api.metrics.MetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "api.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -146,16 +153,114 @@ AUTH_USER_MODEL = "users.CustomUser"
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.PreparedJWTAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 100,
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "api.renderers.FastJSONParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
 }
 
+# Caches: slug map versions (api.slugs) and the hot title cache
+# (api.hotcache) stay coherent only if every worker process uses the same
+# cache. With several processes set CACHE_BACKEND and CACHE_LOCATION to a
+# shared backend (memcached, redis, database or file based); the default
+# local-memory cache suits a single process (runserver, tests) only.
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
+    }
+}
+
+# Response compression: encodings in order of preference ("br" and "zstd"
+# need the brotli / zstandard packages), bodies below COMPRESSION_MIN_SIZE
+# bytes are sent uncompressed. Compressed bodies are kept in
+# COMPRESSION_CACHE (None disables it).
+COMPRESSION_ENCODINGS = ["br", "zstd", "gzip"]
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_CACHE = "default"
+COMPRESSION_CACHE_TIMEOUT = 300
+
+# /metrics: with several worker processes point METRICS_MULTIPROC_DIR to
+# a directory shared by them (and emptied on deploy), every process dumps
+# its counters there at most every METRICS_FLUSH_INTERVAL seconds.
+METRICS_MULTIPROC_DIR = os.environ.get("METRICS_MULTIPROC_DIR")
+METRICS_FLUSH_INTERVAL = 5
+# addresses or networks allowed to read /metrics (REMOTE_ADDR, so behind
+# a proxy list the proxy and restrict /metrics there)
+METRICS_ALLOWED_IPS = os.environ.get(
+    "METRICS_ALLOWED_IPS", "127.0.0.1,::1"
+).split(",")
+
+# /titles/{id}/?expand=reviews,comments: number of reviews embedded and
+# of comments embedded per review.
+TITLE_EXPAND_REVIEWS = 10
+TITLE_EXPAND_COMMENTS = 3
+
+# Hot title cache (api.hotcache) of the title detail ("title") and the
+# first review page ("reviews"): (fresh, stale) seconds per endpoint, a
+# stale entry is still served while one request recomputes it. Other
+# requests wait for a recomputation at most HOT_CACHE_WAIT seconds.
+HOT_CACHE = "default"
+HOT_CACHE_TTLS = {"title": (30, 300), "reviews": (10, 120)}
+HOT_CACHE_WAIT = 2
+
+# Reviews and comments keep a copy of the author's username; a rename is
+# queued and `manage.py propagate_usernames` rewrites the copies
+# AUTHOR_USERNAME_BATCH_SIZE rows (and queued renames) at a time.
+AUTHOR_USERNAME_BATCH_SIZE = 1000
+
+# `manage.py archive_comments` moves comments older than
+# COMMENT_ARCHIVE_AFTER to the archive table, COMMENT_ARCHIVE_BATCH_SIZE
+# at a time. Comment lists read the archive only past the live comments.
+COMMENT_ARCHIVE_AFTER = timedelta(days=365)
+COMMENT_ARCHIVE_BATCH_SIZE = 1000
+
+# Buffered review ingestion: POST of a review is validated and queued
+# (202 with a status handle), `manage.py flush_review_queue` writes the
+# queue in batches.
+REVIEW_INGESTION_BUFFERED = False
+REVIEW_INGESTION_BATCH_SIZE = 500
+
+# Fuzzy user search (users.search): minimal trigram similarity of a match,
+# how many candidates (the users sharing the most trigrams with the term)
+# the UserTrigram search checks at most per query, and whether to use the
+# pg_trgm extension and its indexes instead on PostgreSQL.
+USER_SEARCH_SIMILARITY = 0.3
+USER_SEARCH_CANDIDATES = 200
+USER_SEARCH_PG_TRGM = True
+
+# "orjson" (used when installed) or "json" for the stdlib encoder
+JSON_BACKEND = "orjson"
+# build list responses of titles, reviews and comments from .values() rows
+SERIALIZER_FAST_PATH = True
+# run the title page, the review and comment pages (with the fast path)
+# and the JWT user lookup as statements compiled once (api.hotqueries)
+HOT_QUERIES = True
+
 SIMPLE_JWT = {
     "USER_ID_FIELD": "email",
     "ACCESS_TOKEN_LIFETIME": timedelta(days=5),
 }
+
+# Title rankings: `?ordering=rating` sorts by the Bayesian average when
+# enabled, titles with fewer reviews than the threshold are pulled
+# towards the catalogue mean, kept as running totals while enabled. Run
+# `manage.py refresh_rankings` periodically to slide the trending window
+# and resync the totals, and after enabling the Bayesian average.
+RANKING_BAYESIAN = False
+RANKING_BAYESIAN_MIN_VOTES = 10
+RANKING_TRENDING_WINDOW = timedelta(days=7)
@@ -0,0 +1,60 @@
+"""
+Settings profile of stateless JWT API workers: no admin, sessions,
+messages or CSRF, and no browsable API, so workers boot faster.
+Select it with DJANGO_SETTINGS_MODULE=api_yamdb.settings_api.
+"""
+
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import INSTALLED_APPS, MIDDLEWARE, REST_FRAMEWORK, TEMPLATES
+
+API_ONLY = True
+
+# the serving profile of gunicorn.conf.py: no debug pages, and no
+# connection.queries piling up in long-lived workers
+DEBUG = os.environ.get("DJANGO_DEBUG") == "1"
+ALLOWED_HOSTS = os.environ.get(
+    "ALLOWED_HOSTS", "localhost,127.0.0.1,[::1]"
+).split(",")
+
+INSTALLED_APPS = [
+    app
+    for app in INSTALLED_APPS
+    if app
+    not in (
+        "django.contrib.admin",
+        "django.contrib.sessions",
+        "django.contrib.messages",
+        "django.contrib.staticfiles",
+    )
+]
+
+MIDDLEWARE = [
+    middleware
+    for middleware in MIDDLEWARE
+    if middleware
+    not in (
+        "django.contrib.sessions.middleware.SessionMiddleware",
+        "django.middleware.csrf.CsrfViewMiddleware",
+        "django.contrib.auth.middleware.AuthenticationMiddleware",
+        "django.contrib.messages.middleware.MessageMiddleware",
+        "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    )
+]
+
+TEMPLATES = [
+    dict(
+        TEMPLATES[0],
+        OPTIONS={
+            "context_processors": [
+                "django.template.context_processors.request",
+            ],
+        },
+    )
+]
+
+REST_FRAMEWORK = dict(
+    REST_FRAMEWORK,
+    DEFAULT_RENDERER_CLASSES=["api.renderers.FastJSONRenderer"],
+)
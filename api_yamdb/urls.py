@@ -1,13 +1,26 @@
-from django.contrib import admin
+from django.conf import settings
 from django.urls import include, path
-from django.views.generic import TemplateView
+
+from api.metrics import metrics_view
 
 urlpatterns = [
-    path("admin/", admin.site.urls),
     path("api/", include("api.urls")),
-    path(
-        "redoc/",
-        TemplateView.as_view(template_name="redoc.html"),
-        name="redoc",
-    ),
+    path("metrics", metrics_view, name="metrics"),
 ]
+
+# not loaded at all by API-only workers
+if "django.contrib.admin" in settings.INSTALLED_APPS:
+    from django.contrib import admin
+
+    urlpatterns.append(path("admin/", admin.site.urls))
+
+if not settings.API_ONLY:
+    from django.views.generic import TemplateView
+
+    urlpatterns.append(
+        path(
+            "redoc/",
+            TemplateView.as_view(template_name="redoc.html"),
+            name="redoc",
+        )
+    )
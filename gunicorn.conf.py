@@ -0,0 +1,54 @@
+"""
+Production entry point:
+
+    gunicorn -c gunicorn.conf.py
+
+The application is loaded once in the master and warmed up (see
+api.warmup) before the workers are forked, so they share its imports
+and caches copy-on-write. The knobs below are read from the
+environment; `manage.py serve_benchmark` compares memory per worker and
+first request latency with and without the preload.
+"""
+
+import multiprocessing
+import os
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "api_yamdb.settings_api")
+
+wsgi_app = "api_yamdb.wsgi:application"
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(
+    os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1)
+)
+# more than one thread per worker switches to the threaded worker
+threads = int(os.environ.get("GUNICORN_THREADS", 1))
+worker_class = "gthread" if threads > 1 else "sync"
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 30))
+# recycle workers after this many requests (0: never)
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", 0))
+max_requests_jitter = max_requests // 10
+preload_app = os.environ.get("GUNICORN_PRELOAD", "1") == "1"
+
+
+def on_starting(server):
+    # slug map versions and the hot cache must be seen by every worker
+    from django.conf import settings
+
+    local = sorted(
+        alias
+        for alias in {"default", settings.HOT_CACHE}
+        if settings.CACHES[alias]["BACKEND"].endswith(".LocMemCache")
+    )
+    if workers > 1 and local:
+        raise RuntimeError(
+            f"cache {', '.join(local)} is local to each worker process, "
+            "set CACHE_BACKEND and CACHE_LOCATION to a shared backend"
+        )
+
+
+def when_ready(server):
+    # runs in the master after the preload, before the first fork
+    if preload_app:
+        from api.warmup import warm_up
+
+        warm_up()
@@ -0,0 +1,198 @@
+"""
+Test data written straight to the database with bulk_create instead
+of API calls. A Factory builds unsaved objects with their ids already
+assigned, `save()` inserts all of them in a few queries; the same
+built factory can be saved again into the fresh database of every
+test (see fixtures/fixture_data.py), so treat its objects as read-only.
+The first save takes a snapshot of the rows it produced (search index
+and rankings included), later saves write the snapshot back with one
+executemany per table instead of rebuilding everything.
+"""
+
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection
+from django.db.models import Max
+from django.utils import timezone
+
+from api import hotcache
+from api.loaders import keep_pub_date
+from api.models import Category, Comment, Genre, Review, Title, TitleRanking
+from api.rankings import refresh_title_rankings
+from api.slugs import category_slugs, genre_slugs
+from users.models import UserTrigram
+from users.search import index_users, normalize
+
+User = get_user_model()
+GenreTitle = Title.genre.through
+
+# insertion order, every model after the ones it refers to
+MODELS = [User, Category, Genre, Title, GenreTitle, Review, Comment]
+
+
+class Factory:
+    def __init__(self, first_id=None):
+        # None: continue after the rows already in the database
+        self.first_id = first_id
+        self.next_ids = {}
+        self.objects = {model: [] for model in MODELS}
+        self.now = timezone.now()
+        self.snapshot = None
+
+    def next_id(self, model):
+        if model not in self.next_ids:
+            first_id = self.first_id
+            if first_id is None:
+                last = model._base_manager.aggregate(last=Max("pk"))["last"]
+                first_id = (last or 0) + 1
+            self.next_ids[model] = first_id
+        pk = self.next_ids[model]
+        self.next_ids[model] += 1
+        return pk
+
+    def add(self, obj):
+        obj.pk = self.next_id(type(obj))
+        self.objects[type(obj)].append(obj)
+        return obj
+
+    def users(self, count, role=User.Role.USER, prefix="user"):
+        result = []
+        for _ in range(count):
+            pk = self.next_id(User)
+            user = User(
+                id=pk,
+                username=f"{prefix}{pk}",
+                email=f"{prefix}{pk}@yamdb.fake",
+                role=role,
+                is_active=True,
+                password=make_password(None),
+            )
+            normalize(user)
+            self.objects[User].append(user)
+            result.append(user)
+        return result
+
+    def categories(self, *slugs):
+        return [
+            self.add(Category(name=slug.capitalize(), slug=slug))
+            for slug in slugs
+        ]
+
+    def genres(self, *slugs):
+        return [
+            self.add(Genre(name=slug.capitalize(), slug=slug))
+            for slug in slugs
+        ]
+
+    def titles(self, count, category=None, genres=(), year=2000):
+        result = []
+        for _ in range(count):
+            pk = self.next_id(Title)
+            title = Title(
+                id=pk, name=f"Произведение {pk}", year=year, category=category
+            )
+            self.objects[Title].append(title)
+            for genre in genres:
+                self.objects[GenreTitle].append(
+                    GenreTitle(title_id=title.pk, genre_id=genre.pk)
+                )
+            result.append(title)
+        return result
+
+    def reviews(self, titles, authors, score=5):
+        """One review of every title by every author, newest first."""
+        return [
+            self.add(
+                Review(
+                    title=title,
+                    author=author,
+                    author_username=author.username,
+                    score=score,
+                    text=f"отзыв {author.username}",
+                    pub_date=self.pub_date(Review),
+                )
+            )
+            for title in titles
+            for author in authors
+        ]
+
+    def comments(self, reviews, authors, per_review=1):
+        result = []
+        for review in reviews:
+            for i in range(per_review):
+                author = authors[i % len(authors)]
+                comment = Comment(
+                    review=review,
+                    author=author,
+                    author_username=author.username,
+                    text=f"комментарий {i}",
+                    pub_date=self.pub_date(Comment),
+                )
+                result.append(self.add(comment))
+        return result
+
+    def pub_date(self, model):
+        # distinct dates keep the -pub_date orderings deterministic
+        return self.now - timedelta(seconds=len(self.objects[model]))
+
+    def save(self):
+        """Insert everything built so far, ready for the API."""
+        if self.snapshot is None:
+            self.insert()
+            self.snapshot = self.take_snapshot()
+        else:
+            self.restore_snapshot()
+        statements = connection.ops.sequence_reset_sql(no_style(), MODELS)
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+        category_slugs.invalidate()
+        genre_slugs.invalidate()
+        return self
+
+    def insert(self):
+        with keep_pub_date(Review, Comment):
+            for model in MODELS:
+                model._base_manager.bulk_create(self.objects[model])
+        index_users(self.objects[User])
+        refresh_title_rankings(title.pk for title in self.objects[Title])
+
+    def snapshot_queries(self):
+        """(model, queryset) of every row written by `insert()`."""
+        title_ids = [title.pk for title in self.objects[Title]]
+        for model in MODELS:
+            if model is GenreTitle:
+                # bulk_create leaves the ids of the links unset
+                yield model, model.objects.filter(title_id__in=title_ids)
+                continue
+            pks = [obj.pk for obj in self.objects[model]]
+            yield model, model._base_manager.filter(pk__in=pks)
+        yield UserTrigram, UserTrigram.objects.filter(
+            user_id__in=[user.pk for user in self.objects[User]]
+        )
+        yield TitleRanking, TitleRanking.objects.filter(
+            title_id__in=title_ids
+        )
+
+    def take_snapshot(self):
+        snapshot = []
+        for model, queryset in self.snapshot_queries():
+            columns = [field.column for field in model._meta.concrete_fields]
+            rows = list(queryset.order_by("pk").values_list(*columns))
+            snapshot.append((model._meta.db_table, columns, rows))
+        return snapshot
+
+    def restore_snapshot(self):
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            for table, columns, rows in self.snapshot:
+                cursor.executemany(
+                    f"INSERT INTO {quote(table)} "
+                    f"({', '.join(map(quote, columns))}) "
+                    f"VALUES ({', '.join(['%s'] * len(columns))})",
+                    rows,
+                )
+        hotcache.invalidate_all()
@@ -0,0 +1,30 @@
+import pytest
+
+from tests.factories import Factory
+
+# ids of the seed data start high so rows created by other fixtures
+# (the admin user and friends) never collide with them
+FIRST_ID = 1000
+
+
+@pytest.fixture(scope="session")
+def seed():
+    """
+    The seed catalogue, built once per session (per xdist worker) and
+    inserted into the database of every test that asks for `catalogue`.
+    """
+    factory = Factory(first_id=FIRST_ID)
+    users = factory.users(5)
+    moderator = factory.users(1, role="moderator", prefix="moder")[0]
+    films, books = factory.categories("films", "books")
+    drama, comedy, horror = factory.genres("drama", "comedy", "horror")
+    titles = factory.titles(10, category=films, genres=[drama, comedy])
+    titles += factory.titles(10, category=books, genres=[horror], year=1990)
+    reviews = factory.reviews(titles[:5], users)
+    factory.comments(reviews, [moderator, *users], per_review=2)
+    return factory
+
+
+@pytest.fixture
+def catalogue(seed, db):
+    return seed.save()
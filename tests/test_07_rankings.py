@@ -0,0 +1,149 @@
+import pytest
+
+from .common import auth_client, create_reviews
+
+
+class Test07RankingAPI:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_ordering_by_rating(self, user_client, admin):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        user_client.post(
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/',
+            data={"text": "отлично", "score": 9},
+        )
+        response = user_client.get("/api/v1/titles/?ordering=-rating")
+        assert response.status_code == 200, (
+            "Проверьте, что при GET запросе `/api/v1/titles/?ordering=-rating` "
+            "возвращается статус 200"
+        )
+        ratings = [t["rating"] for t in response.json()["results"]]
+        assert ratings == [9, 4], (
+            "Проверьте, что `?ordering=-rating` сортирует произведения "
+            "по убыванию рейтинга"
+        )
+        response = user_client.get("/api/v1/titles/?ordering=rating")
+        ratings = [t["rating"] for t in response.json()["results"]]
+        assert ratings == [4, 9], (
+            "Проверьте, что `?ordering=rating` сортирует произведения "
+            "по возрастанию рейтинга"
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_rating_follows_review_writes(self, user_client, admin):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        assert user_client.get(url).json()["rating"] == 4
+        client_user = auth_client(user)
+        client_user.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[1]["id"]}/',
+            data={"score": 9},
+        )
+        assert (
+            user_client.get(url).json()["rating"] == 6
+        ), "Проверьте, что рейтинг пересчитывается при изменении отзыва"
+        user_client.delete(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[1]["id"]}/'
+        )
+        assert (
+            user_client.get(url).json()["rating"] == 4
+        ), "Проверьте, что рейтинг пересчитывается при удалении отзыва"
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_trending(self, client, user_client, admin):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        response = client.get("/api/v1/titles/trending/")
+        assert response.status_code == 200, (
+            "Проверьте, что при GET запросе `/api/v1/titles/trending/` "
+            "без токена авторизации возвращается статус 200"
+        )
+        data = response.json()
+        assert data["count"] == 1, (
+            "Проверьте, что `/api/v1/titles/trending/` возвращает только "
+            "произведения с отзывами за последнее время"
+        )
+        assert data["results"][0]["id"] == titles[0]["id"]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_bayesian_ordering(self, settings, user_client, admin):
+        from api.models import Review, Title
+        from api.rankings import refresh_all_rankings
+
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        user_client.post(
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/',
+            data={"text": "неплохо", "score": 5},
+        )
+        flop = Title.objects.create(name="Провал", year=2001)
+        for author in (admin, user, moderator):
+            Review.objects.create(title=flop, author=author, score=1)
+
+        settings.RANKING_BAYESIAN = False
+        refresh_all_rankings()
+        response = user_client.get("/api/v1/titles/?ordering=-rating")
+        ids = [t["id"] for t in response.json()["results"]]
+        assert ids == [titles[1]["id"], titles[0]["id"], flop.id]
+
+        settings.RANKING_BAYESIAN = True
+        settings.RANKING_BAYESIAN_MIN_VOTES = 10
+        refresh_all_rankings()
+        response = user_client.get("/api/v1/titles/?ordering=-rating")
+        ids = [t["id"] for t in response.json()["results"]]
+        assert ids == [titles[0]["id"], titles[1]["id"], flop.id], (
+            "Проверьте, что при включенном байесовском среднем произведение "
+            "с единственной оценкой не опережает произведения с несколькими"
+        )
+        ratings = [t["rating"] for t in response.json()["results"]]
+        expected = [4, 5, 1]
+        assert (
+            ratings == expected
+        ), "Проверьте, что поле `rating` остается средним арифметическим"
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_running_catalogue_totals(self, settings, user_client, admin):
+        from django.db import connection
+        from django.db.models import Sum
+        from django.test.utils import CaptureQueriesContext
+
+        from api.models import RankingTotals, TitleRanking
+
+        def stored():
+            return TitleRanking.objects.aggregate(
+                total=Sum("score_total"), count=Sum("reviews_count")
+            )
+
+        settings.RANKING_BAYESIAN = False
+        with CaptureQueriesContext(connection) as context:
+            reviews, titles, user, moderator = create_reviews(
+                user_client, admin
+            )
+        assert not any(
+            "SUM" in query["sql"] and "api_titleranking" in query["sql"]
+            for query in context.captured_queries
+        ), "Проверьте, что без байесовского среднего оценки не суммируются"
+        assert not RankingTotals.objects.exists()
+
+        settings.RANKING_BAYESIAN = True
+        user_client.post(
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/',
+            data={"text": "неплохо", "score": 5},
+        )
+        totals = RankingTotals.objects.get()
+        assert {
+            "total": totals.score_total,
+            "count": totals.reviews_count,
+        } == stored()
+        with CaptureQueriesContext(connection) as context:
+            auth_client(user).post(
+                f'/api/v1/titles/{titles[1]["id"]}/reviews/',
+                data={"text": "хорошо", "score": 9},
+            )
+        assert not any(
+            "SUM" in query["sql"] and "api_titleranking" in query["sql"]
+            for query in context.captured_queries
+        ), "Проверьте, что сумма оценок каталога ведётся нарастающим итогом"
+        user_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        totals = RankingTotals.objects.get()
+        assert {
+            "total": totals.score_total,
+            "count": totals.reviews_count,
+        } == stored()
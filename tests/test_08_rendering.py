@@ -0,0 +1,61 @@
+import pytest
+
+from .common import create_comments
+
+
+class Test08RenderingAPI:
+    def get_all(self, client, titles, reviews):
+        title_id = titles[0]["id"]
+        review_id = reviews[0]["id"]
+        urls = [
+            "/api/v1/titles/",
+            "/api/v1/titles/?genre=horror",
+            f"/api/v1/titles/{title_id}/reviews/",
+            f"/api/v1/titles/{title_id}/reviews/{review_id}/comments/",
+        ]
+        return [client.get(url).content for url in urls]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_fast_path_is_byte_identical(
+        self, settings, client, user_client, admin
+    ):
+        user_client.post(
+            "/api/v1/categories/", data={"name": "Игры ", "slug": "games"}
+        )
+        user_client.post(
+            "/api/v1/titles/",
+            data={"name": "Без жанра", "year": 1999, "category": "games"},
+        )
+        comments, reviews, titles, user, moderator = create_comments(
+            user_client, admin
+        )
+        # both passes have to render, not read the hot cache
+        settings.HOT_CACHE_TTLS = {}
+        settings.JSON_BACKEND = "json"
+        settings.SERIALIZER_FAST_PATH = False
+        expected = self.get_all(client, titles, reviews)
+
+        settings.JSON_BACKEND = "orjson"
+        settings.SERIALIZER_FAST_PATH = True
+        assert self.get_all(client, titles, reviews) == expected, (
+            "Проверьте, что быстрый путь сериализации и рендеринга "
+            "возвращает те же байты, что и стандартный"
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_fast_parser(self, settings, user_client):
+        settings.JSON_BACKEND = "orjson"
+        response = user_client.post(
+            "/api/v1/genres/",
+            data='{"name": "Ужасы", "slug": "horror"}',
+            content_type="application/json",
+        )
+        assert response.status_code == 201
+        response = user_client.post(
+            "/api/v1/genres/",
+            data='{"name": ',
+            content_type="application/json",
+        )
+        assert (
+            response.status_code == 400
+        ), "Проверьте, что при некорректном JSON возвращается статус 400"
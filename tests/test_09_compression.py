@@ -0,0 +1,75 @@
+import gzip
+
+import pytest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory
+
+from api import middleware
+from api.middleware import CompressionMiddleware, negotiate_encoding
+
+from .common import create_titles
+
+
+class Test09Compression:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_large_response_is_gzipped(self, client, user_client):
+        titles, _, _ = create_titles(user_client)
+        user_client.patch(
+            f'/api/v1/titles/{titles[0]["id"]}/',
+            data={"description": "Очень длинное описание. " * 100},
+        )
+        plain = client.get("/api/v1/titles/")
+        assert not plain.has_header("Content-Encoding")
+        response = client.get("/api/v1/titles/", HTTP_ACCEPT_ENCODING="gzip")
+        assert response["Content-Encoding"] == "gzip", (
+            "Проверьте, что большие ответы сжимаются, если клиент "
+            "поддерживает gzip"
+        )
+        assert "Accept-Encoding" in response["Vary"]
+        assert gzip.decompress(response.content) == plain.content
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_small_response_is_not_compressed(self, client):
+        response = client.get("/api/v1/titles/", HTTP_ACCEPT_ENCODING="gzip")
+        assert not response.has_header(
+            "Content-Encoding"
+        ), "Проверьте, что ответы меньше COMPRESSION_MIN_SIZE не сжимаются"
+
+    def test_03_negotiation(self, settings):
+        settings.COMPRESSION_ENCODINGS = ["br", "zstd", "gzip"]
+        assert negotiate_encoding("gzip, deflate") == "gzip"
+        assert negotiate_encoding("gzip;q=0, deflate") is None
+        assert negotiate_encoding("identity") is None
+        assert negotiate_encoding("*") is not None
+
+    def test_04_streaming(self):
+        request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip")
+        chunks = [b"title;" * 200 for _ in range(5)]
+        response = CompressionMiddleware(
+            lambda request: StreamingHttpResponse(iter(chunks))
+        )(request)
+        assert response["Content-Encoding"] == "gzip"
+        body = b"".join(response.streaming_content)
+        assert gzip.decompress(body) == b"".join(chunks)
+
+    def test_05_compressed_body_is_cached(self, settings, monkeypatch):
+        settings.COMPRESSION_CACHE = "default"
+        calls = []
+        compress = middleware.ENCODERS["gzip"]
+
+        def counting(data):
+            calls.append(data)
+            return compress[0](data)
+
+        monkeypatch.setitem(
+            middleware.ENCODERS, "gzip", (counting, compress[1])
+        )
+        content = b"cached body " * 500
+        handler = CompressionMiddleware(lambda request: HttpResponse(content))
+        for _ in range(3):
+            request = RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip")
+            response = handler(request)
+            assert gzip.decompress(response.content) == content
+        assert (
+            len(calls) == 1
+        ), "Проверьте, что сжатое тело ответа берется из кэша"
@@ -0,0 +1,56 @@
+import pytest
+
+from api.admin import EstimatedCountPaginator
+from api.models import Review
+
+from .common import create_comments
+
+
+class Test10Admin:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_changelists(self, client, user_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(
+            user_client, admin
+        )
+        client.force_login(admin)
+        urls = [
+            "/admin/api/review/",
+            f'/admin/api/review/?title={titles[0]["id"]}',
+            "/admin/api/review/?title=Пово",
+            "/admin/api/review/?q=TestUser",
+            "/admin/api/comment/",
+            f'/admin/api/comment/?review={reviews[0]["id"]}',
+            "/admin/api/comment/?q=TestUser",
+        ]
+        for url in urls:
+            response = client.get(url)
+            assert response.status_code == 200, url
+
+        response = client.get(f'/admin/api/review/?title={titles[1]["id"]}')
+        assert response.context["cl"].result_count == 0
+        response = client.get("/admin/api/review/?title=Пово")
+        assert response.context["cl"].result_count == 3
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_changelist_query_count(
+        self, client, user_client, admin, django_assert_max_num_queries
+    ):
+        create_comments(user_client, admin)
+        client.force_login(admin)
+        with django_assert_max_num_queries(10):
+            client.get("/admin/api/comment/")
+        with django_assert_max_num_queries(10):
+            client.get("/admin/api/review/")
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_estimated_count(self, monkeypatch, user_client, admin):
+        from api import admin as api_admin
+
+        create_comments(user_client, admin)
+        monkeypatch.setattr(api_admin, "ESTIMATE_COUNT_THRESHOLD", 0)
+        paginator = EstimatedCountPaginator(Review.objects.all(), 10)
+        assert paginator.count == Review.objects.latest("id").id
+        filtered = EstimatedCountPaginator(
+            Review.objects.filter(score__gt=4), 10
+        )
+        assert filtered.count == Review.objects.filter(score__gt=4).count()
@@ -0,0 +1,117 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+
+from users.models import UserTrigram
+from users.search import search_users, similarity, trigram_matches
+
+from .factories import Factory
+
+
+class Test11UserSearch:
+    def create_users(self):
+        User = get_user_model()
+        for username, email in (
+            ("aleksandr", "sasha@yamdb.fake"),
+            ("alexandra", "alex@yamdb.fake"),
+            ("bingobongo", "bingo@yamdb.fake"),
+            ("capt_obvious", "captain@yamdb.fake"),
+        ):
+            User.objects.create(username=username, email=email)
+
+    def usernames(self, user_client, term):
+        response = user_client.get(f"/api/v1/users/?search={term}")
+        assert response.status_code == 200
+        return {user["username"] for user in response.json()["results"]}
+
+    @pytest.mark.django_db(transaction=True)
+    def test_01_search(self, user_client):
+        self.create_users()
+        assert self.usernames(user_client, "ale") == {
+            "aleksandr",
+            "alexandra",
+        }, "Проверьте поиск пользователей по префиксу"
+        assert self.usernames(user_client, "bongo") == {
+            "bingobongo"
+        }, "Проверьте поиск пользователей по подстроке"
+        assert "aleksandr" in self.usernames(
+            user_client, "alexandr"
+        ), "Проверьте поиск пользователей с опечатками"
+        assert self.usernames(user_client, "sasha") == {
+            "aleksandr"
+        }, "Проверьте поиск пользователей по email"
+        assert self.usernames(user_client, "zzz") == set()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_index_follows_username(self, user_client):
+        self.create_users()
+        user = get_user_model().objects.get(username="bingobongo")
+        user_client.patch(
+            "/api/v1/users/bingobongo/", data={"username": "zebra_crossing"}
+        )
+        assert self.usernames(user_client, "crossing") == {"zebra_crossing"}
+        assert not UserTrigram.objects.filter(
+            user=user, trigram="bon"
+        ).exists(), "Проверьте, что индекс обновляется при смене username"
+
+    def test_03_similarity(self):
+        assert similarity("word", "word") == 1
+        assert similarity("aleksandr", "alexandr") > 0.3
+        assert similarity("aleksandr", "bongo") == 0
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_candidates_capped(self, user_client, settings):
+        self.create_users()
+        # shares more trigrams with "alexandr" than "aleksandr" does
+        get_user_model().objects.create(
+            username="alexqqqqqq", email="qqqxandrqqq@yamdb.fake"
+        )
+        settings.USER_SEARCH_CANDIDATES = 3
+        assert "aleksandr" in self.usernames(
+            user_client, "alexandr"
+        ), "Проверьте, что поиск проверяет лучших кандидатов"
+        settings.USER_SEARCH_CANDIDATES = 2
+        assert len(trigram_matches("alexandr")) <= 2, (
+            "Проверьте, что число проверяемых кандидатов ограничено "
+            "USER_SEARCH_CANDIDATES"
+        )
+
+    @pytest.mark.django_db
+    def test_05_prefix_uses_index(self):
+        self.create_users()
+        User = get_user_model()
+        queryset = search_users(User.objects.all(), "ALE")
+        assert set(queryset.values_list("username", flat=True)) == {
+            "aleksandr",
+            "alexandra",
+        }
+        factory = Factory()
+        factory.users(300)
+        factory.users(300, prefix="member")
+        factory.save()
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        # short terms are searched by prefix only
+        plan = search_users(User.objects.all(), "al").explain()
+        assert "username_lower" in plan and "INDEX" in plan, (
+            "Проверьте, что поиск по префиксу использует индекс\n" + plan
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_06_deferred_fields(self, user_client):
+        self.create_users()
+        User = get_user_model()
+        assert len(User.objects.only("username")) == 5, (
+            "Проверьте, что пользователей можно загружать с отложенными "
+            "полями"
+        )
+        assert len(User.objects.defer("email")) == 5
+
+        user = User.objects.only("id", "username").get(username="bingobongo")
+        user.username = "zebra_crossing"
+        user.save()
+        assert self.usernames(user_client, "crossing") == {"zebra_crossing"}
+        user = User.objects.defer("username", "email").get(pk=user.pk)
+        user.bio = "о себе"
+        user.save()
+        assert User.objects.get(pk=user.pk).username_lower == "zebra_crossing"
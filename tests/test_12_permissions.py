@@ -0,0 +1,125 @@
+import pytest
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.models import Comment, Review
+from api.permissions import FullObjAccess, IsAdmin, get_capabilities
+
+from .common import auth_client, create_comments
+
+
+def make_request(method, user):
+    request = Request(getattr(APIRequestFactory(), method)("/"))
+    request.user = user
+    return request
+
+
+class Test12Permissions:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_object_permission_without_queries(
+        self, user_client, admin, django_assert_num_queries
+    ):
+        comments, reviews, titles, user, moderator = create_comments(
+            user_client, admin
+        )
+        review = Review.objects.get(pk=reviews[1]["id"])
+        comment = Comment.objects.get(pk=comments[0]["id"])
+        permission = FullObjAccess()
+        with django_assert_num_queries(0):
+            assert permission.has_object_permission(
+                make_request("patch", user), None, review
+            )
+            assert not permission.has_object_permission(
+                make_request("delete", user), None, comment
+            )
+            assert permission.has_object_permission(
+                make_request("delete", moderator), None, comment
+            )
+            assert permission.has_object_permission(
+                make_request("delete", admin), None, review
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_capabilities_are_cached(self, user_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(
+            user_client, admin
+        )
+        request = make_request("get", moderator)
+        capabilities = get_capabilities(request)
+        assert capabilities.can_moderate and not capabilities.is_admin
+        moderator.role = moderator.Role.ADMIN
+        assert get_capabilities(request) is capabilities
+        assert not IsAdmin().has_permission(request, None)
+        assert IsAdmin().has_permission(make_request("get", admin), None)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_conditional_writes(self, client, user_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(
+            user_client, admin
+        )
+        client_user = auth_client(user)
+        title_id = titles[0]["id"]
+        url = f"/api/v1/titles/{title_id}/reviews/"
+
+        response = client_user.patch(
+            f'{url}{reviews[0]["id"]}/', data={"text": "чужой"}
+        )
+        assert (
+            response.status_code == 403
+        ), "Проверьте, что изменение чужого отзыва возвращает статус 403"
+        assert Review.objects.get(pk=reviews[0]["id"]).text == "qwerty"
+        response = client_user.patch(f"{url}999/", data={"text": "нет"})
+        assert response.status_code == 404
+        for response in (
+            client_user.patch(f"{url}abc/", data={"text": "нет"}),
+            client_user.delete(f"{url}abc/"),
+        ):
+            assert (
+                response.status_code == 404
+            ), "Проверьте, что нечисловой id возвращает статус 404"
+        response = client_user.patch(
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/{reviews[1]["id"]}/',
+            data={"text": "не то произведение"},
+        )
+        assert response.status_code == 404
+
+        response = client_user.patch(
+            f'{url}{reviews[1]["id"]}/', data={"text": "новый текст"}
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["text"] == "новый текст"
+        assert data["score"] == reviews[1]["score"]
+        assert data["author"] == user.username
+
+        comments_url = f'{url}{reviews[0]["id"]}/comments/'
+        response = client_user.delete(f'{comments_url}{comments[0]["id"]}/')
+        assert response.status_code == 403
+        response = client_user.delete(f'{comments_url}{comments[1]["id"]}/')
+        assert response.status_code == 204
+        assert not (
+            Comment.objects.visible().filter(pk=comments[1]["id"]).exists()
+        )
+        response = client_user.delete(f'{comments_url}{comments[1]["id"]}/')
+        assert response.status_code == 404
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_write_query_count(
+        self, user_client, admin, django_assert_max_num_queries
+    ):
+        comments, reviews, titles, user, moderator = create_comments(
+            user_client, admin
+        )
+        client_moderator = auth_client(moderator)
+        url = (
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}'
+            f'/comments/{comments[0]["id"]}/'
+        )
+        # user, update, fetch for the response
+        with django_assert_max_num_queries(3):
+            response = client_moderator.patch(url, data={"text": "правка"})
+        assert response.status_code == 200
+        # user, transaction, delete
+        with django_assert_max_num_queries(3):
+            response = client_moderator.delete(url)
+        assert response.status_code == 204
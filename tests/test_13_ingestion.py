@@ -0,0 +1,80 @@
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from api.models import QueuedReview, Review
+
+from .common import auth_client, create_titles, create_users_api
+
+
+class Test13BufferedIngestion:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_buffered_review(self, settings, client, user_client):
+        settings.REVIEW_INGESTION_BUFFERED = True
+        titles, _, _ = create_titles(user_client)
+        user, moderator = create_users_api(user_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+
+        response = user_client.post(url, data={"text": "ок", "score": 11})
+        assert (
+            response.status_code == 400
+        ), "Проверьте, что отзыв валидируется до постановки в очередь"
+        response = user_client.post(url, data={"text": "ок", "score": 8})
+        assert response.status_code == 202, (
+            "Проверьте, что в буферизованном режиме POST запрос "
+            "возвращает статус 202"
+        )
+        handle = response.json()["handle"]
+        auth_client(user).post(url, data={"text": "да", "score": 4})
+        user_client.post(url, data={"text": "еще раз", "score": 1})
+        assert not Review.objects.exists()
+
+        status_url = f"{url}queued/{handle}/"
+        assert client.get(status_url).json()["status"] == "pending"
+
+        call_command("flush_review_queue", once=True)
+        data = client.get(status_url).json()
+        assert data["status"] == "accepted"
+        assert Review.objects.filter(pk=data["id"], score=8).exists()
+        assert Review.objects.count() == 2
+        assert (
+            QueuedReview.objects.filter(status="rejected").count() == 1
+        ), "Проверьте, что повторный отзыв автора отклоняется"
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.json()["rating"] == 6
+
+        user_client.delete(f'{url}{data["id"]}/')
+        assert (
+            client.get(status_url).json()["id"] is None
+        ), "Проверьте, что статус не ссылается на удалённый отзыв"
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_deleted_author(self, settings, client, user_client):
+        settings.REVIEW_INGESTION_BUFFERED = True
+        titles, _, _ = create_titles(user_client)
+        user, moderator = create_users_api(user_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        handles = [
+            auth_client(author).post(url, data={"score": 9}).json()["handle"]
+            for author in (user, moderator)
+        ]
+
+        user_client.delete(f"/api/v1/users/{user.username}/")
+        data = client.get(f"{url}queued/{handles[0]}/").json()
+        assert (
+            data["status"] == "rejected"
+        ), "Проверьте, что отзывы удалённого пользователя снимаются с очереди"
+
+        # deleted behind soft_delete_user, the flush has to check itself
+        type(moderator).all_objects.filter(pk=moderator.pk).update(
+            deleted_at=timezone.now()
+        )
+        call_command("flush_review_queue", once=True)
+        assert client.get(f"{url}queued/{handles[1]}/").json()["status"] == (
+            "rejected"
+        )
+        assert (
+            not Review.objects.exists()
+        ), "Проверьте, что отзыв удалённого автора не публикуется"
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert response.json()["rating"] is None
@@ -0,0 +1,82 @@
+import pytest
+
+from api.serializers import TitleCreateSerializer
+from api.slugs import genre_slugs
+
+from .common import create_categories, create_genre
+
+
+class Test14SlugCache:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_resolve_without_queries(
+        self, user_client, django_assert_num_queries
+    ):
+        genres = create_genre(user_client)
+        categories = create_categories(user_client)
+        data = {
+            "name": "Поворот туда",
+            "year": 2000,
+            "genre": [genre["slug"] for genre in genres],
+            "category": categories[0]["slug"],
+        }
+        TitleCreateSerializer(data=data).is_valid()
+        with django_assert_num_queries(0):
+            serializer = TitleCreateSerializer(data=data)
+            assert serializer.is_valid(), serializer.errors
+        validated = serializer.validated_data
+        assert [g.slug for g in validated["genre"]] == data["genre"]
+        assert validated["category"].name == categories[0]["name"]
+
+        title = serializer.save()
+        assert (
+            list(title.genre.values_list("slug", flat=True)) == data["genre"]
+        )
+        assert title.category.slug == categories[0]["slug"]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_invalidation(self, user_client):
+        create_genre(user_client)
+        create_categories(user_client)
+        assert genre_slugs.get("horror") is not None
+        user_client.delete("/api/v1/genres/horror/")
+        assert (
+            genre_slugs.get("horror") is None
+        ), "Проверьте, что удаление жанра сбрасывает кэш слагов"
+        user_client.post(
+            "/api/v1/genres/", data={"name": "Мистика", "slug": "mystic"}
+        )
+        response = user_client.post(
+            "/api/v1/titles/",
+            data={
+                "name": "Твин Пикс",
+                "year": 1990,
+                "genre": ["mystic"],
+                "category": "films",
+            },
+        )
+        assert response.status_code == 201, (
+            "Проверьте, что новый жанр сразу доступен при создании "
+            "произведения"
+        )
+        response = user_client.post(
+            "/api/v1/titles/",
+            data={
+                "name": "Твин Пикс",
+                "year": 1990,
+                "genre": ["horror"],
+                "category": "films",
+            },
+        )
+        assert response.status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_unknown_slug_reloads_once(
+        self, user_client, django_assert_num_queries
+    ):
+        create_genre(user_client)
+        assert genre_slugs.get("horror") is not None
+        assert genre_slugs.get("no-such-genre") is None
+        with django_assert_num_queries(0):
+            assert (
+                genre_slugs.get("no-such-genre") is None
+            ), "Проверьте, что неизвестный слаг не перезагружает карту"
@@ -0,0 +1,86 @@
+import asyncio
+import os
+
+import pytest
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from api.loaders import csv_tables, load_tables
+from api.loadtest import ASGITransport, Workload, run
+from api.models import Comment, Review, Title, TitleRanking
+
+DATA_DIR = os.path.join(settings.BASE_DIR, "data")
+
+
+class Test15LoadTest:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_seed_scaled_data(self):
+        dry = load_tables(csv_tables(DATA_DIR), copies=2, dry_run=True)
+        assert not dry.errors
+        assert not Title.objects.exists()
+
+        loader = load_tables(csv_tables(DATA_DIR), copies=2)
+        assert Title.objects.count() == loader.counts["titles"] == 64
+        assert Review.objects.count() == loader.counts["reviews"]
+        assert Comment.objects.count() == loader.counts["comments"]
+        assert TitleRanking.objects.exclude(rating=None).exists()
+        review = Review.objects.order_by("id").first()
+        assert (
+            review.pub_date.year == 2019
+        ), "Проверьте, что загрузчик сохраняет даты публикации из данных"
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_in_process_run(self):
+        from api_yamdb.asgi import application
+
+        load_tables(csv_tables(DATA_DIR))
+        workload = Workload(users=5, seed=1)
+        mix = {"browse_titles": 1, "title_detail": 1, "read_reviews": 1}
+        stats, wall_time = asyncio.run(
+            run(ASGITransport(application), workload, mix, 2, 20, 0)
+        )
+        assert sum(len(v) for v in stats.latencies.values()) == 20
+        assert not sum(stats.errors.values())
+        assert "throughput" in stats.report(wall_time)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_workload_check(self):
+        load_tables(csv_tables(DATA_DIR))
+        get_user_model().objects.update(is_active=False)
+        with pytest.raises(CommandError, match="no active users"):
+            call_command("loadtest", requests=1, mix="post_comment=1")
+        workload = Workload(users=5, seed=1)
+        workload.check({"browse_titles": 1, "post_review": 0})
+        for mix in ("titles:x", "browse_titles=x", "browse_titles=0"):
+            with pytest.raises(CommandError, match="--mix"):
+                call_command("loadtest", requests=1, mix=mix)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_failed_requests(self):
+        class FlakyTransport:
+            calls = 0
+
+            async def request(self, method, path, headers, body):
+                self.calls += 1
+                if self.calls % 2:
+                    raise asyncio.TimeoutError
+                return 500
+
+        load_tables(csv_tables(DATA_DIR))
+        stats, wall_time = asyncio.run(
+            run(
+                FlakyTransport(),
+                Workload(seed=1),
+                {"title_detail": 1},
+                2,
+                10,
+                0,
+            )
+        )
+        assert (
+            stats.failures["title_detail"] == 5
+        ), "Проверьте, что запросы без ответа считаются, а не прерывают прогон"
+        assert stats.errors["title_detail"] == 10
+        assert "failed: 5" in stats.report(wall_time)
@@ -0,0 +1,133 @@
+import json
+import os
+import threading
+
+import pytest
+
+from api import metrics
+
+from .common import create_genre, create_titles
+
+
+def sample(text, line_start):
+    for line in text.splitlines():
+        if line.startswith(line_start):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+class Test16Metrics:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_request_metrics(self, client, user_client):
+        create_titles(user_client)
+        before = client.get("/metrics").content.decode()
+        client.get("/api/v1/titles/")
+        client.get("/api/v1/titles/")
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/plain")
+        text = response.content.decode()
+
+        requests = (
+            'yamdb_http_requests_total{method="GET",status="200",'
+            'view="TitleViewSet.list"}'
+        )
+        assert sample(text, requests) - sample(before, requests) == 2, (
+            "Проверьте, что /metrics считает запросы с меткой "
+            "`ViewSet.action`"
+        )
+        count = (
+            "yamdb_http_request_duration_seconds_count"
+            '{view="TitleViewSet.list"}'
+        )
+        assert sample(text, count) - sample(before, count) == 2
+        queries = 'yamdb_db_queries_total{view="TitleViewSet.list"}'
+        assert sample(text, queries) > sample(before, queries)
+        assert "# TYPE yamdb_http_request_duration_seconds histogram" in text
+        assert 'yamdb_queue_depth{queue="reviews"} 0' in text
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_cache_and_auth(self, client, user_client, admin):
+        create_genre(user_client)
+        before = client.get("/metrics").content.decode()
+        client.post(
+            "/api/v1/auth/token/",
+            data={"email": admin.email, "confirmation_code": "wrong-code"},
+        )
+        client.get("/api/v1/users/me/")
+        user_client.post(
+            "/api/v1/titles/",
+            data={"name": "Поворот туда", "year": 2000, "genre": ["horror"]},
+        )
+        text = client.get("/metrics").content.decode()
+
+        for reason in ("invalid_code", "unauthenticated"):
+            line = f'yamdb_auth_failures_total{{reason="{reason}"}}'
+            assert sample(text, line) - sample(before, line) == 1, (
+                f"Проверьте, что /metrics считает ошибки авторизации "
+                f"({reason})"
+            )
+        lookups = sum(
+            sample(text, f'yamdb_cache_requests_total{{cache="slugs",{r}')
+            for r in ('result="hit"}', 'result="miss"}')
+        ) - sum(
+            sample(before, f'yamdb_cache_requests_total{{cache="slugs",{r}')
+            for r in ('result="hit"}', 'result="miss"}')
+        )
+        assert lookups >= 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_multiprocess(self, client, settings, tmp_path):
+        settings.METRICS_MULTIPROC_DIR = str(tmp_path)
+        other = {
+            "counters": [
+                [
+                    "yamdb_auth_failures_total",
+                    [["reason", "other_worker"]],
+                    3,
+                ]
+            ],
+            "histograms": [],
+        }
+        (tmp_path / "metrics-1.json").write_text(json.dumps(other))
+        text = client.get("/metrics").content.decode()
+        assert (
+            'yamdb_auth_failures_total{reason="other_worker"} 3' in text
+        ), "Проверьте, что /metrics суммирует счётчики всех процессов"
+        assert os.path.exists(metrics.registry.dump_path())
+
+    def test_04_concurrent_dumps(self, settings, tmp_path):
+        settings.METRICS_MULTIPROC_DIR = str(tmp_path)
+        settings.METRICS_FLUSH_INTERVAL = 0
+        errors = []
+
+        def work():
+            try:
+                for _ in range(50):
+                    metrics.inc("yamdb_auth_failures_total", reason="race")
+            except Exception as exc:
+                errors.append(exc)
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors, "Проверьте, что запись метрик потокобезопасна"
+        assert [path.name for path in tmp_path.iterdir()] == [
+            os.path.basename(metrics.registry.dump_path())
+        ]
+        json.loads(open(metrics.registry.dump_path()).read())
+
+        settings.METRICS_MULTIPROC_DIR = str(tmp_path / "missing")
+        metrics.inc("yamdb_auth_failures_total", reason="race")
+
+    @pytest.mark.django_db
+    def test_05_allowed_clients(self, client, settings):
+        response = client.get("/metrics", REMOTE_ADDR="10.0.0.1")
+        assert (
+            response.status_code == 403
+        ), "Проверьте, что /metrics закрыт для посторонних адресов"
+        settings.METRICS_ALLOWED_IPS = ["10.0.0.0/8"]
+        response = client.get("/metrics", REMOTE_ADDR="10.0.0.1")
+        assert response.status_code == 200
@@ -0,0 +1,88 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Genre, Title
+from api.rankings import refresh_all_rankings
+
+from .common import create_reviews
+
+
+class Test17GenreFilter:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_any_and_all(self, client, user_client, admin):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        user_client.post(
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/',
+            data={"text": "отлично", "score": 9},
+        )
+
+        response = client.get("/api/v1/titles/?genre=horror,comedy,drama")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["count"] == 2, (
+            "Проверьте, что фильтр по нескольким жанрам не дублирует "
+            "произведения"
+        )
+        ratings = {t["id"]: t["rating"] for t in data["results"]}
+        assert ratings == {
+            titles[0]["id"]: 4,
+            titles[1]["id"]: 9,
+        }, "Проверьте, что фильтр по жанрам не искажает рейтинг"
+
+        response = client.get(
+            "/api/v1/titles/?genre=horror,comedy&genre_mode=all"
+        )
+        data = response.json()
+        assert [t["id"] for t in data["results"]] == [titles[0]["id"]], (
+            "Проверьте, что `genre_mode=all` оставляет произведения со "
+            "всеми жанрами"
+        )
+        assert data["results"][0]["rating"] == 4
+        response = client.get(
+            "/api/v1/titles/?genre=horror,drama&genre_mode=all"
+        )
+        assert response.json()["count"] == 0
+
+        response = client.get("/api/v1/titles/?genre=comedy")
+        assert [t["id"] for t in response.json()["results"]] == [
+            titles[0]["id"]
+        ]
+        response = client.get("/api/v1/titles/?genre=unknown")
+        assert response.json()["count"] == 0
+        response = client.get("/api/v1/titles/?genre=drama&genre_mode=x")
+        assert response.status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_large_genre_table(self, client, django_assert_num_queries):
+        genres = Genre.objects.bulk_create(
+            Genre(id=i + 1, name=f"Жанр {i}", slug=f"genre-{i}")
+            for i in range(30)
+        )
+        titles = Title.objects.bulk_create(
+            Title(id=i + 1, name=f"Произведение {i}", year=2000)
+            for i in range(300)
+        )
+        Title.genre.through.objects.bulk_create(
+            Title.genre.through(title_id=title.pk, genre_id=genre.pk)
+            for i, title in enumerate(titles)
+            for genre in genres[i % 3 :: 3]
+        )
+        refresh_all_rankings()
+
+        url = "/api/v1/titles/?genre=genre-0,genre-3,genre-1"
+        client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        assert response.json()["count"] == 200
+        through = Title.genre.through._meta.db_table
+        assert not any(
+            f"JOIN {connection.ops.quote_name(through)}" in query["sql"]
+            for query in queries.captured_queries
+        ), "Проверьте, что фильтр по жанрам не соединяет таблицы"
+
+        with django_assert_num_queries(len(queries.captured_queries)):
+            response = client.get(
+                "/api/v1/titles/?genre=genre-0,genre-3&genre_mode=all"
+            )
+        assert response.json()["count"] == 100
@@ -0,0 +1,62 @@
+import pytest
+
+from .common import create_comments
+
+
+class Test18TitleExpand:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_expand_reviews_and_comments(
+        self, client, user_client, admin, settings
+    ):
+        settings.TITLE_EXPAND_REVIEWS = 2
+        settings.TITLE_EXPAND_COMMENTS = 1
+        comments, reviews, titles, user, moderator = create_comments(
+            user_client, admin
+        )
+        title_id = titles[0]["id"]
+
+        response = client.get(f"/api/v1/titles/{title_id}/")
+        assert "reviews" not in response.json()
+
+        response = client.get(
+            f"/api/v1/titles/{title_id}/?expand=reviews,comments"
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["rating"] == 4
+        listed = client.get(f"/api/v1/titles/{title_id}/reviews/").json()
+        assert data["reviews"]["count"] == listed["count"] == 3
+        assert data["reviews"]["results"] == [
+            dict(review, comments=data["reviews"]["results"][i]["comments"])
+            for i, review in enumerate(listed["results"][:2])
+        ], (
+            "Проверьте, что `?expand=reviews` возвращает первую страницу "
+            "отзывов"
+        )
+
+        for review in data["reviews"]["results"]:
+            url = (
+                f"/api/v1/titles/{title_id}/reviews/{review['id']}/comments/"
+            )
+            listed = client.get(url).json()
+            assert review["comments"]["count"] == listed["count"]
+            assert review["comments"]["results"] == listed["results"][:1], (
+                "Проверьте, что `?expand=comments` возвращает первые "
+                "комментарии каждого отзыва"
+            )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_fixed_number_of_queries(
+        self, client, user_client, admin, django_assert_num_queries
+    ):
+        comments, reviews, titles, user, moderator = create_comments(
+            user_client, admin
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/?expand=comments'
+        # title, genres, reviews, comments
+        with django_assert_num_queries(4):
+            response = client.get(url)
+        assert len(response.json()["reviews"]["results"]) == 3
+
+        response = client.get(f"{url},authors")
+        assert response.status_code == 400
@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+
+from api.startup import by_package, parse_importtime
+
+API_WORKER_CHECK = """
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+from django.conf import settings
+from django.urls import Resolver404, resolve
+assert "django.contrib.sessions" not in settings.INSTALLED_APPS
+assert not settings.DEBUG
+assert resolve("/api/v1/titles/").func.cls.__name__ == "TitleViewSet"
+for path in ("/admin/", "/redoc/"):
+    try:
+        resolve(path)
+    except Resolver404:
+        continue
+    raise AssertionError(path)
+"""
+
+
+class Test19Startup:
+    def test_01_parse_importtime(self):
+        lines = [
+            "import time: self [us] | cumulative | imported package",
+            "import time:       120 |        120 |     django.utils",
+            "import time:        30 |        150 |   django.contrib.admin",
+            "import time:        50 |        200 | api.views",
+            "boot time: 0.25",
+        ]
+        imports, boot_time = parse_importtime(lines)
+        assert boot_time == 0.25
+        assert imports[0] == ("django.utils", 120, 120)
+        assert by_package(imports) == [
+            ("django", 120),
+            ("api", 50),
+            ("django.contrib.admin", 30),
+        ]
+
+    def test_02_api_worker_profile(self):
+        result = subprocess.run(
+            [sys.executable, "-c", API_WORKER_CHECK],
+            env={"DJANGO_SETTINGS_MODULE": "api_yamdb.settings_api"},
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            capture_output=True,
+            text=True,
+        )
+        assert result.returncode == 0, (
+            "Проверьте, что профиль `api_yamdb.settings_api` загружается "
+            "без отладки, админки, сессий и redoc\n" + result.stderr
+        )
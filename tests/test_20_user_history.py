@@ -0,0 +1,70 @@
+import pytest
+
+from api.models import Comment, Review
+
+from .common import auth_client, create_comments
+from .factories import Factory
+
+
+class Test20UserHistory:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_history_endpoints(self, client, user_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(
+            user_client, admin
+        )
+        url = f"/api/v1/users/{user.username}/reviews/"
+        assert client.get(url).status_code == 401
+        assert auth_client(user).get(url).status_code == 403, (
+            "Проверьте, что историю пользователя видят только модераторы "
+            "и администраторы"
+        )
+
+        response = auth_client(moderator).get(url)
+        assert response.status_code == 200
+        data = response.json()
+        assert [review["id"] for review in data["results"]] == [
+            reviews[1]["id"]
+        ]
+        assert data["results"][0]["title"] == {
+            "id": titles[0]["id"],
+            "name": titles[0]["name"],
+        }
+
+        response = user_client.get(
+            f"/api/v1/users/{moderator.username}/comments/"
+        )
+        assert response.status_code == 200
+        expected = Comment.objects.filter(author=moderator).order_by(
+            "-pub_date", "-id"
+        )
+        assert [c["id"] for c in response.json()["results"]] == [
+            comment.id for comment in expected
+        ]
+        response = user_client.get("/api/v1/users/nobody/reviews/")
+        assert response.status_code == 404
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_keyset_pages(
+        self, user_client, admin, django_assert_num_queries
+    ):
+        factory = Factory()
+        factory.reviews(factory.titles(7), [admin])
+        factory.save()
+
+        url = f"/api/v1/users/{admin.username}/reviews/?page_size=3"
+        seen = []
+        while url:
+            # auth user, author id, reviews with titles
+            with django_assert_num_queries(3):
+                response = user_client.get(url)
+            data = response.json()
+            assert len(data["results"]) <= 3
+            seen += [review["id"] for review in data["results"]]
+            url = data["next"]
+        expected = Review.objects.filter(author=admin).order_by(
+            "-pub_date", "-id"
+        )
+        assert seen == [review.id for review in expected], (
+            "Проверьте, что страницы истории отзывов идут по порядку "
+            "без пропусков и повторов"
+        )
@@ -0,0 +1,134 @@
+import json
+
+import pytest
+from django.core.management import call_command
+
+from api.models import Comment, ModerationAudit, Review
+
+from .common import auth_client, create_comments
+
+
+class Test21BulkModeration:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_permissions_and_validation(self, user_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(
+            user_client, admin
+        )
+        data = {"action": "hide", "target": "reviews", "ids": [1]}
+        response = auth_client(user).post(
+            "/api/v1/moderation/", data=data, format="json"
+        )
+        assert response.status_code == 403, (
+            "Проверьте, что массовая модерация недоступна обычным "
+            "пользователям"
+        )
+        response = auth_client(moderator).post(
+            "/api/v1/moderation/",
+            data={"action": "hide", "target": "reviews"},
+            format="json",
+        )
+        assert response.status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_hide_and_unhide(self, client, user_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(
+            user_client, admin
+        )
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        moderator_client = auth_client(moderator)
+        response = moderator_client.post(
+            "/api/v1/moderation/",
+            data={
+                "action": "hide",
+                "target": "reviews",
+                "author": "TestUser",
+            },
+            format="json",
+        )
+        assert response.status_code == 200
+        assert response.json()["affected"] == 1
+        listed = client.get(f"{title_url}reviews/").json()
+        assert reviews[0]["id"] not in [
+            r["id"] for r in listed["results"]
+        ], "Проверьте, что скрытые отзывы не показываются"
+        response = client.get(
+            f'{title_url}reviews/{reviews[0]["id"]}/comments/'
+        )
+        assert response.status_code == 404
+        assert (
+            client.get(title_url).json()["rating"] == 3
+        ), "Проверьте, что скрытые отзывы не учитываются в рейтинге"
+
+        audit = ModerationAudit.objects.latest("id")
+        assert audit.moderator == moderator
+        assert json.loads(audit.criteria) == {"author": admin.pk}
+
+        moderator_client.post(
+            "/api/v1/moderation/",
+            data={
+                "action": "unhide",
+                "target": "reviews",
+                "ids": [reviews[0]["id"]],
+            },
+            format="json",
+        )
+        assert client.get(f"{title_url}reviews/").json()["count"] == 3
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_bulk_delete(
+        self, client, user_client, admin, django_assert_max_num_queries
+    ):
+        comments, reviews, titles, user, moderator = create_comments(
+            user_client, admin
+        )
+        title_id = titles[0]["id"]
+        assert Comment.objects.filter(review__title_id=title_id).exists()
+        with django_assert_max_num_queries(20):
+            response = user_client.post(
+                "/api/v1/moderation/",
+                data={
+                    "action": "delete",
+                    "target": "reviews",
+                    "title": title_id,
+                },
+                format="json",
+            )
+        assert response.json()["affected"] == 3
+        assert not Review.objects.visible().filter(title_id=title_id).exists()
+        assert (
+            client.get(f"/api/v1/titles/{title_id}/").json()["rating"] is None
+        )
+        assert (
+            Review.objects.filter(title_id=title_id).count() == 3
+        ), "Проверьте, что модератор удаляет отзывы мягко"
+
+        response = user_client.post(
+            "/api/v1/moderation/",
+            data={
+                "action": "delete",
+                "target": "comments",
+                "author": "TestUser",
+            },
+            format="json",
+        )
+        assert response.status_code == 200
+        assert not Comment.objects.visible().filter(author=admin).exists()
+        affected = response.json()["affected"]
+
+        response = user_client.post(
+            "/api/v1/moderation/",
+            data={
+                "action": "delete",
+                "target": "comments",
+                "author": "TestUser",
+            },
+            format="json",
+        )
+        assert (
+            response.json()["affected"] == 0 < affected
+        ), "Проверьте, что уже удалённые строки не учитываются"
+
+        call_command("purge_deleted", "--pause", "0")
+        assert not Review.objects.filter(title_id=title_id).exists()
+        assert not Comment.objects.filter(review__title_id=title_id).exists()
+        assert not Comment.objects.filter(author=admin).exists()
@@ -0,0 +1,143 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+
+from api.loaders import keep_pub_date
+from api.models import ArchivedComment, Comment, Review, Title, TitleRanking
+from api.purge import soft_delete_user
+
+from .common import auth_client, create_comments
+
+
+class Test22SoftDelete:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_review_soft_delete_and_purge(
+        self, client, user_client, admin
+    ):
+        comments, reviews, titles, user, moderator = create_comments(
+            user_client, admin
+        )
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        review_id = reviews[0]["id"]
+        response = user_client.delete(f"{title_url}reviews/{review_id}/")
+        assert response.status_code == 204
+        review = Review.objects.get(pk=review_id)
+        assert (
+            review.deleted_at is not None
+        ), "Проверьте, что удаление отзыва помечает его удалённым"
+        listed = client.get(f"{title_url}reviews/").json()
+        assert review_id not in [r["id"] for r in listed["results"]]
+        response = client.get(f"{title_url}reviews/{review_id}/comments/")
+        assert response.status_code == 404
+        assert client.get(title_url).json()["rating"] == 3
+
+        call_command("purge_deleted", "--pause", "0", "--batch-size", "1")
+        assert not Review.objects.filter(pk=review_id).exists()
+        assert not Comment.objects.filter(
+            review_id=review_id
+        ).exists(), (
+            "Проверьте, что очистка удаляет комментарии удалённых отзывов"
+        )
+        assert Review.objects.filter(title_id=titles[0]["id"]).count() == 2
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_user_soft_delete_and_purge(self, client, user_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(
+            user_client, admin
+        )
+        User = get_user_model()
+        title_url = f'/api/v1/titles/{titles[0]["id"]}/'
+        response = user_client.delete(f"/api/v1/users/{user.username}/")
+        assert response.status_code == 204
+        assert User.all_objects.filter(pk=user.pk).exists()
+        response = user_client.get(f"/api/v1/users/{user.username}/")
+        assert response.status_code == 404
+        response = auth_client(user).get("/api/v1/users/me/")
+        assert (
+            response.status_code == 401
+        ), "Проверьте, что удалённый пользователь не может авторизоваться"
+        listed = client.get(f"{title_url}reviews/").json()
+        assert user.username not in [r["author"] for r in listed["results"]]
+        for review in reviews:
+            comments_url = f'{title_url}reviews/{review["id"]}/comments/'
+            response = client.get(comments_url)
+            if response.status_code == 200:
+                authors = [c["author"] for c in response.json()["results"]]
+                assert user.username not in authors
+
+        ranking = TitleRanking.objects.get(title_id=titles[0]["id"])
+        assert ranking.rating == 4.5, (
+            "Проверьте, что рейтинг пересчитывается сразу после "
+            "удаления пользователя"
+        )
+
+        response = user_client.post(
+            "/api/v1/users/",
+            data={"username": user.username, "email": "new@yamdb.fake"},
+        )
+        assert response.status_code == 400
+
+        call_command("purge_deleted", "--pause", "0", "--batch-size", "2")
+        assert not User.all_objects.filter(pk=user.pk).exists()
+        assert not Review.objects.filter(author_id=user.pk).exists()
+        assert not Comment.objects.filter(author_id=user.pk).exists()
+        ranking = TitleRanking.objects.get(title_id=titles[0]["id"])
+        assert ranking.rating == 4.5, (
+            "Проверьте, что после очистки рейтинг пересчитывается "
+            "без отзывов удалённого пользователя"
+        )
+
+    @pytest.mark.parametrize("hot_queries", [True, False])
+    @pytest.mark.django_db(transaction=True)
+    def test_03_archived_comments_of_deleted_user(
+        self, client, admin, settings, hot_queries
+    ):
+        settings.HOT_QUERIES = hot_queries
+        author = get_user_model().objects.create(
+            username="archived", email="archived@yamdb.fake"
+        )
+        title = Title.objects.create(name="Архив", year=1990)
+        review = Review.objects.create(
+            title=title, author=admin, text="отзыв", score=7
+        )
+        now = timezone.now()
+        old = now - timedelta(days=400)
+        with keep_pub_date(Comment):
+            Comment.objects.bulk_create(
+                [
+                    Comment(
+                        review=review,
+                        author=admin,
+                        text="живой",
+                        pub_date=now,
+                    )
+                ]
+                + [
+                    Comment(
+                        review=review,
+                        author=author,
+                        text="старый",
+                        pub_date=old,
+                    )
+                    for _ in range(3)
+                ]
+            )
+        call_command("archive_comments", "--older-than", "365")
+        url = f"/api/v1/titles/{title.id}/reviews/{review.id}/comments/"
+        assert client.get(url).json()["count"] == 4
+
+        soft_delete_user(author)
+        for step in ("soft delete", "purge"):
+            data = client.get(url).json()
+            assert data["count"] == len(data["results"]) == 1, (
+                "Проверьте, что архивные комментарии удалённого "
+                f"пользователя не учитываются ({step})"
+            )
+            assert data["results"][0]["text"] == "живой"
+            call_command("purge_deleted", "--pause", "0")
+        review.refresh_from_db()
+        assert review.archived_comments_count == 0
+        assert not ArchivedComment.objects.exists()
@@ -0,0 +1,116 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api.loaders import keep_pub_date
+from api.models import ArchivedComment, Comment, Review, Title
+
+
+def create_history(admin, live, old):
+    title = Title.objects.create(name="Архив", year=1990)
+    review = Review.objects.create(
+        title=title, author=admin, text="отзыв", score=7
+    )
+    now = timezone.now()
+    with keep_pub_date(Comment):
+        Comment.objects.bulk_create(
+            Comment(
+                id=i + 1,
+                review=review,
+                author=admin,
+                text=f"комментарий {i}",
+                pub_date=now - timedelta(days=i if i < live else 400 + i),
+            )
+            for i in range(live + old)
+        )
+    return title, review
+
+
+class Test23CommentArchive:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_archive_and_list(self, client, admin):
+        title, review = create_history(admin, live=110, old=20)
+        url = f"/api/v1/titles/{title.id}/reviews/{review.id}/comments/"
+        before = [client.get(f"{url}?page={page}").json() for page in (1, 2)]
+
+        call_command("archive_comments", "--older-than", "365")
+        assert Comment.objects.count() == 110
+        assert ArchivedComment.objects.count() == 20
+        review.refresh_from_db()
+        assert review.archived_comments_count == 20
+
+        with CaptureQueriesContext(connection) as queries:
+            first = client.get(f"{url}?page=1").json()
+        assert not any(
+            ArchivedComment._meta.db_table in query["sql"]
+            for query in queries.captured_queries
+        ), "Проверьте, что архив читается только за пределами живых комментариев"
+        second = client.get(f"{url}?page=2").json()
+        assert [
+            first,
+            second,
+        ] == before, (
+            "Проверьте, что список комментариев не меняется после архивации"
+        )
+
+        response = client.get(f"{url}130/")
+        assert response.status_code == 200
+        assert response.json()["text"] == "комментарий 129"
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_expand_counts_archive(self, client, admin, settings):
+        settings.TITLE_EXPAND_COMMENTS = 3
+        title, review = create_history(admin, live=2, old=3)
+        call_command("archive_comments")
+        data = client.get(f"/api/v1/titles/{title.id}/?expand=comments")
+        comments = data.json()["reviews"]["results"][0]["comments"]
+        assert comments["count"] == 5
+        assert [c["id"] for c in comments["results"]] == [1, 2, 3]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_archived_comments_moderated(self, user_client, admin):
+        title, review = create_history(admin, live=2, old=3)
+        call_command("archive_comments")
+        url = f"/api/v1/titles/{title.id}/reviews/{review.id}/comments/"
+
+        response = user_client.patch(f"{url}5/", data={"text": "правка"})
+        assert (
+            response.status_code == 200
+        ), "Проверьте, что архивный комментарий можно изменить"
+        assert ArchivedComment.objects.get(pk=5).text == "правка"
+        assert user_client.delete(f"{url}4/").status_code == 204
+        assert user_client.get(f"{url}4/").status_code == 404
+        review.refresh_from_db()
+        assert review.archived_comments_count == 2
+
+        history = user_client.get(f"/api/v1/users/{admin.username}/comments/")
+        assert [c["id"] for c in history.json()["results"]] == [1, 2, 3, 5], (
+            "Проверьте, что история пользователя включает архивные "
+            "комментарии"
+        )
+
+        data = {
+            "action": "hide",
+            "target": "comments",
+            "author": admin.username,
+        }
+        response = user_client.post(
+            "/api/v1/moderation/", data=data, format="json"
+        )
+        assert response.json()["affected"] == 4, (
+            "Проверьте, что массовая модерация скрывает и архивные "
+            "комментарии"
+        )
+        review.refresh_from_db()
+        assert review.archived_comments_count == 0
+        assert user_client.get(url).json()["count"] == 0
+
+        data["action"] = "unhide"
+        user_client.post("/api/v1/moderation/", data=data, format="json")
+        review.refresh_from_db()
+        assert review.archived_comments_count == 2
+        assert user_client.get(url).json()["count"] == 4
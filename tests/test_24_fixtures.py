@@ -0,0 +1,48 @@
+import pytest
+
+from api.models import Comment, Review, Title
+from api.slugs import genre_slugs
+
+from .common import auth_client
+
+
+class Test24Fixtures:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_catalogue(self, client, catalogue):
+        assert Title.objects.count() == 20
+        assert Review.objects.count() == 25
+        assert Comment.objects.count() == 50
+        assert genre_slugs.get(
+            "horror"
+        ), "Проверьте, что после загрузки данных кэш слагов сброшен"
+
+        response = client.get("/api/v1/titles/?genre=horror")
+        assert response.json()["count"] == 10
+        title = catalogue.objects[Title][0]
+        response = client.get(f"/api/v1/titles/{title.id}/")
+        assert (
+            response.json()["rating"] == 5
+        ), "Проверьте, что рейтинги загруженных произведений пересчитаны"
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_catalogue_is_writable(self, catalogue, admin):
+        user = catalogue.objects[Review][0].author
+        title = catalogue.objects[Title][-1]
+        response = auth_client(user).post(
+            f"/api/v1/titles/{title.id}/reviews/",
+            data={"text": "новый отзыв", "score": 7},
+        )
+        assert response.status_code == 201
+        assert response.json()["id"] > max(
+            review.id for review in catalogue.objects[Review]
+        ), "Проверьте, что счётчики id продолжаются после загруженных строк"
+        assert admin.pk not in {u.pk for u in catalogue.objects[type(admin)]}
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_snapshot_matches_insert(self, seed):
+        seed.save()
+        assert seed.take_snapshot() == seed.snapshot, (
+            "Проверьте, что снимок восстанавливает те же строки, "
+            "что и полная загрузка"
+        )
+        assert Title.objects.get(pk=seed.objects[Title][0].pk).ranking
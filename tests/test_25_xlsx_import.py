@@ -0,0 +1,218 @@
+import os
+import zipfile
+from io import StringIO
+from xml.etree.ElementTree import iterparse
+
+import pytest
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+
+from api import xlsx
+from api.loaders import LoadError, csv_tables
+from api.models import Comment, Review, Title
+from api.xlsx import xlsx_tables
+
+User = get_user_model()
+
+DATA_DIR = os.path.join(settings.BASE_DIR, "data")
+WORKBOOK = os.path.join(DATA_DIR, "YaMDb.xlsx")
+
+NS = 'xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+NS_R = (
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/'
+    'relationships"'
+)
+NS_PR = 'xmlns="http://schemas.openxmlformats.org/package/2006/relationships"'
+
+
+def cell(column, row, value):
+    ref = f"{column}{row}"
+    if isinstance(value, str):
+        return f'<c r="{ref}" t="inlineStr"><is><t>{value}</t></is></c>'
+    if isinstance(value, tuple):
+        # (cell type, raw value)
+        return f'<c r="{ref}" t="{value[0]}"><v>{value[1]}</v></c>'
+    return f'<c r="{ref}"><v>{value}</v></c>'
+
+
+def write_workbook(path, sheets):
+    """A minimal workbook with inline strings: {name: [rows]}."""
+    with zipfile.ZipFile(path, "w") as archive:
+        entries, rels = [], []
+        for number, (name, rows) in enumerate(sheets.items(), 1):
+            entries.append(
+                f'<sheet name="{name}" sheetId="{number}" r:id="rId{number}"/>'
+            )
+            rels.append(
+                f'<Relationship Id="rId{number}" '
+                f'Target="worksheets/sheet{number}.xml"/>'
+            )
+            data = "".join(
+                f'<row r="{r}">'
+                + "".join(
+                    cell(chr(ord("A") + c), r, value)
+                    for c, value in enumerate(row)
+                )
+                + "</row>"
+                for r, row in enumerate(rows, 1)
+            )
+            archive.writestr(
+                f"xl/worksheets/sheet{number}.xml",
+                f"<worksheet {NS}><sheetData>{data}</sheetData></worksheet>",
+            )
+        archive.writestr(
+            "xl/workbook.xml",
+            f"<workbook {NS} {NS_R}><sheets>{''.join(entries)}</sheets>"
+            "</workbook>",
+        )
+        archive.writestr(
+            "xl/_rels/workbook.xml.rels",
+            f"<Relationships {NS_PR}>{''.join(rels)}</Relationships>",
+        )
+
+
+class Test25XlsxImport:
+    def test_01_rows_match_csv(self):
+        tables = xlsx_tables(WORKBOOK)
+        expected = csv_tables(DATA_DIR)
+        assert set(tables) == set(expected)
+        for table, rows in tables.items():
+            assert list(rows) == list(
+                expected[table]
+            ), f"Проверьте, что лист {table} читается так же, как CSV"
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_import_command(self):
+        out = StringIO()
+        call_command("import_data", WORKBOOK, "--dry-run", stdout=out)
+        assert out.getvalue().startswith("Checked")
+        assert (
+            not Title.objects.exists()
+        ), "Проверьте, что --dry-run ничего не записывает"
+
+        err = StringIO()
+        call_command("import_data", WORKBOOK, stdout=StringIO(), stderr=err)
+        assert Title.objects.count() == 32
+        # the data has two second reviews of the same author, skipped
+        assert Review.objects.count() == 73
+        assert err.getvalue().count("duplicate review") == 2
+        assert Comment.objects.count() == 5
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_invalid_rows(self, tmp_path):
+        path = tmp_path / "broken.xlsx"
+        write_workbook(
+            path,
+            {
+                "Category": [["id", "name", "slug"], [1, "Фильм", "movie"]],
+                "Titles": [
+                    ["id", "name", "year", "category"],
+                    [1, "Фильм", 1994, 1],
+                    [2, "Без года", "", 7],
+                ],
+                "Users": [
+                    ["id", "username", "email"],
+                    [5, "reader", "reader@yamdb.fake"],
+                ],
+                "Review": [
+                    ["id", "title_id", "text", "author", "score", "pub_date"],
+                    [1, 1, "отзыв", 5, 11, 43831.5],
+                ],
+            },
+        )
+        err = StringIO()
+        with pytest.raises(CommandError):
+            call_command(
+                "import_data",
+                str(path),
+                "--dry-run",
+                stderr=err,
+                stdout=StringIO(),
+            )
+        errors = err.getvalue()
+        assert (
+            "titles 2" in errors and "reviews 1" in errors
+        ), "Проверьте, что пробный импорт сообщает обо всех ошибочных строках"
+        assert not Title.objects.exists()
+
+        rows = list(xlsx_tables(path)["reviews"])
+        assert rows[0]["pub_date"] == "2020-01-01T12:00:00Z"
+
+        with pytest.raises(CommandError):
+            call_command("import_data", str(path), stdout=StringIO())
+        assert not Title.objects.exists()
+
+    def test_04_rows_released(self, tmp_path, monkeypatch):
+        path = tmp_path / "long.xlsx"
+        write_workbook(
+            path,
+            {
+                "Genre": [["id", "name", "slug"]]
+                + [[i, f"Жанр {i}", f"genre-{i}"] for i in range(1, 301)]
+            },
+        )
+        roots = []
+
+        def recording_iterparse(source, events=("end",)):
+            root = None
+            for event, element in iterparse(source, ("start", "end")):
+                if root is None:
+                    root = element
+                    roots.append(root)
+                if event in events:
+                    yield event, element
+
+        monkeypatch.setattr(xlsx, "iterparse", recording_iterparse)
+        rows = xlsx_tables(path)["genres"]
+        assert next(rows)["slug"] == "genre-1"
+        assert len(list(rows)) == 299
+        assert not [
+            row for root in roots for row in root.iter(f"{xlsx.MAIN}row")
+        ], "Проверьте, что разобранные строки листа не остаются в дереве"
+
+    @pytest.mark.django_db(transaction=True)
+    def test_05_existing_rows(self):
+        call_command("import_data", DATA_DIR, stdout=StringIO())
+        users = User.objects.count()
+
+        err = StringIO()
+        with pytest.raises(CommandError):
+            call_command(
+                "import_data",
+                DATA_DIR,
+                "--dry-run",
+                stdout=StringIO(),
+                stderr=err,
+            )
+        assert "taken" in err.getvalue(), (
+            "Проверьте, что пробный импорт сообщает о занятых именах "
+            "и адресах"
+        )
+        with pytest.raises(CommandError, match="taken"):
+            call_command("import_data", DATA_DIR, stdout=StringIO())
+        assert User.objects.count() == users
+        with pytest.raises(CommandError, match="seeded already"):
+            call_command("loadtest", "--seed-scale", "1", stdout=StringIO())
+
+    def test_06_cell_types(self, tmp_path):
+        path = tmp_path / "dates.xlsx"
+        header = ["id", "title_id", "text", "author", "score", "pub_date"]
+        write_workbook(
+            path,
+            {
+                "Review": [
+                    header,
+                    [1, 1, "отзыв", 5, 7, ("d", "2020-01-01T12:00:00")],
+                    [2, 1, "отзыв", 6, 7, ("d", "2020-01-02")],
+                    [3, 1, "отзыв", 7, ("n", "x"), ("d", "2020-01-03")],
+                ]
+            },
+        )
+        rows = xlsx_tables(path)["reviews"]
+        assert (
+            next(rows)["pub_date"] == "2020-01-01T12:00:00Z"
+        ), "Проверьте, что ячейки с датой ISO 8601 читаются"
+        assert next(rows)["pub_date"] == "2020-01-02T00:00:00Z"
+        with pytest.raises(LoadError, match="cell E4"):
+            next(rows)
@@ -0,0 +1,104 @@
+import os
+import runpy
+import threading
+import time
+
+import pytest
+from django.core.cache import cache
+
+from api import hotcache
+
+from .common import auth_client, create_reviews
+
+
+class Test26HotCache:
+    def test_01_single_flight(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return {"id": 1}
+
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    hotcache.cached("title", 1, "", compute)
+                )
+            )
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == [{"id": 1}] * 8
+        assert len(calls) == 1, (
+            "Проверьте, что при одновременных промахах данные вычисляет "
+            "только один запрос"
+        )
+
+    def test_02_stale_while_revalidate(self, settings):
+        settings.HOT_CACHE_TTLS = {"title": (0, 60)}
+        values = iter(["old", "new"])
+        assert hotcache.cached("title", 1, "", lambda: next(values)) == "old"
+
+        # another request is refreshing the entry: serve the stale copy
+        cache.add("hot:title:1::lock", "other", 10)
+        assert hotcache.cached("title", 1, "", lambda: next(values)) == "old"
+        cache.delete("hot:title:1::lock")
+        assert hotcache.cached("title", 1, "", lambda: next(values)) == "new"
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_cached_responses(
+        self, client, user_client, admin, django_assert_num_queries
+    ):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        title_url = f"/api/v1/titles/{titles[0]['id']}/"
+        reviews_url = f"{title_url}reviews/"
+        first = client.get(title_url).json()
+        client.get(reviews_url)
+        with django_assert_num_queries(0):
+            assert client.get(title_url).json() == first
+            client.get(reviews_url)
+
+        response = auth_client(user).patch(
+            f"{reviews_url}{reviews[1]['id']}/", data={"score": 10}
+        )
+        assert response.status_code == 200
+        assert (
+            client.get(title_url).json()["rating"] != first["rating"]
+        ), "Проверьте, что изменение оценки сбрасывает кэш произведения"
+        auth_client(user).patch(
+            f"{reviews_url}{reviews[1]['id']}/", data={"text": "новый текст"}
+        )
+        texts = [r["text"] for r in client.get(reviews_url).json()["results"]]
+        assert (
+            "новый текст" in texts
+        ), "Проверьте, что изменение отзыва сбрасывает кэш первой страницы"
+
+    def test_04_gunicorn_requires_shared_cache(self, monkeypatch, settings):
+        config = os.path.join(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            "gunicorn.conf.py",
+        )
+        monkeypatch.setenv("GUNICORN_WORKERS", "4")
+        with pytest.raises(RuntimeError):
+            runpy.run_path(config)["on_starting"](None)
+
+        settings.CACHES = {
+            "default": {
+                "BACKEND": "django.core.cache.backends.filebased."
+                "FileBasedCache",
+                "LOCATION": "/tmp/yamdb-cache",
+            }
+        }
+        runpy.run_path(config)["on_starting"](None)
+        monkeypatch.setenv("GUNICORN_WORKERS", "1")
+        settings.CACHES = {
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+            }
+        }
+        runpy.run_path(config)["on_starting"](None)
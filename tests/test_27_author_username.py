@@ -0,0 +1,100 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Comment, Review, UsernameChange
+from api.usernames import propagate_username
+
+from .common import create_comments, create_reviews
+
+
+class Test27AuthorUsername:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_lists_read_one_table(self, client, user_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(
+            user_client, admin
+        )
+        assert not Review.objects.filter(
+            author_username=""
+        ).exists(), (
+            "Проверьте, что при создании отзыва сохраняется имя автора"
+        )
+
+        url = f"/api/v1/titles/{titles[0]['id']}/reviews/"
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(f"{url}?page=1")
+        assert response.status_code == 200
+        assert not any(
+            "users_customuser" in query["sql"]
+            for query in context.captured_queries
+        ), "Проверьте, что список отзывов не обращается к таблице юзеров"
+        authors = {review["author"] for review in response.json()["results"]}
+        assert authors == {admin.username, user.username, moderator.username}
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_rename_propagates(self, client, user_client, admin):
+        comments, reviews, titles, user, moderator = create_comments(
+            user_client, admin
+        )
+        response = user_client.patch(
+            f"/api/v1/users/{user.username}/", data={"username": "renamed"}
+        )
+        assert response.status_code == 200
+        assert (
+            UsernameChange.objects.filter(user=user).count() == 1
+        ), "Проверьте, что смена имени только ставится в очередь"
+        assert Review.objects.filter(
+            author=user, author_username=user.username
+        ).exists()
+
+        call_command("propagate_usernames", "--once")
+        assert not UsernameChange.objects.exists()
+        assert not Review.objects.filter(
+            author=user, author_username=user.username
+        ).exists()
+        assert set(
+            Comment.objects.filter(author=user).values_list(
+                "author_username", flat=True
+            )
+        ) == {"renamed"}, (
+            "Проверьте, что смена имени переписывает имя автора "
+            "в отзывах и комментариях"
+        )
+        url = f"/api/v1/titles/{titles[0]['id']}/reviews/"
+        authors = [r["author"] for r in client.get(url).json()["results"]]
+        assert "renamed" in authors and user.username not in authors
+
+        assert propagate_username(user.pk, "again", batch_size=1) == (
+            Review.objects.filter(author=user).count()
+            + Comment.objects.filter(author=user).count()
+        )
+
+    @pytest.mark.django_db(transaction=True)
+    def test_03_sync_command(self, user_client, admin):
+        create_comments(user_client, admin)
+        Review.objects.update(author_username="stale")
+        Comment.objects.update(author_username="")
+        out = StringIO()
+        call_command("sync_author_usernames", "--batch-size", "2", stdout=out)
+        assert not Review.objects.filter(author_username="stale").exists()
+        assert not Comment.objects.filter(author_username="").exists()
+        assert out.getvalue().startswith("review: ")
+
+    @pytest.mark.django_db(transaction=True)
+    def test_04_author_not_writable(self, user_client, admin):
+        reviews, titles, user, moderator = create_reviews(user_client, admin)
+        url = f"/api/v1/titles/{titles[0]['id']}/reviews/{reviews[0]['id']}/"
+        response = user_client.patch(
+            url, data={"author": user.username, "text": "правка"}
+        )
+        assert response.status_code == 200
+        assert response.json()["author"] == admin.username
+        review = Review.objects.get(pk=reviews[0]["id"])
+        assert (review.author_id, review.author_username) == (
+            admin.pk,
+            admin.username,
+        ), "Проверьте, что изменение отзыва не меняет его автора"
+        assert review.text == "правка"
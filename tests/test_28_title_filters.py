@@ -0,0 +1,76 @@
+import pytest
+from django.db import connection
+
+from api.filters import TitleFilter
+from api.views import TitleViewSet
+
+from .factories import Factory
+
+
+def create_catalogue(admin):
+    factory = Factory()
+    films, books, music = factory.categories("films", "books", "music")
+    old = factory.titles(2, category=films, year=1980)
+    middle = factory.titles(2, category=books, year=1995)
+    new = factory.titles(2, category=music, year=2010)
+    factory.reviews(old[:1], [admin], score=9)
+    factory.reviews(middle[:1], [admin], score=5)
+    factory.save()
+    return old, middle, new
+
+
+def ids(response):
+    assert response.status_code == 200
+    return sorted(title["id"] for title in response.json()["results"])
+
+
+class Test28TitleFilters:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_ranges_and_lists(self, client, admin):
+        old, middle, new = create_catalogue(admin)
+        url = "/api/v1/titles/"
+
+        response = client.get(f"{url}?year_min=1990&year_max=2010")
+        assert ids(response) == sorted(t.id for t in middle + new), (
+            "Проверьте, что `year_min` и `year_max` задают диапазон годов "
+            "включительно"
+        )
+        assert ids(client.get(f"{url}?year_max=1979")) == []
+
+        response = client.get(f"{url}?category=films,music")
+        assert ids(response) == sorted(
+            t.id for t in old + new
+        ), "Проверьте, что фильтр по категориям принимает список слагов"
+        assert ids(client.get(f"{url}?category=films,unknown")) == sorted(
+            t.id for t in old
+        )
+        assert ids(client.get(f"{url}?category=unknown")) == []
+
+        assert ids(client.get(f"{url}?rating_min=6")) == [
+            old[0].id
+        ], "Проверьте, что `rating_min` отбирает по рейтингу произведения"
+        response = client.get(f"{url}?rating_min=5&year_min=1990")
+        assert ids(response) == [middle[0].id]
+        assert client.get(f"{url}?year_min=abc").status_code == 400
+
+    @pytest.mark.skipif(
+        connection.vendor != "sqlite", reason="EXPLAIN QUERY PLAN"
+    )
+    @pytest.mark.django_db(transaction=True)
+    def test_02_index_usage(self, admin):
+        create_catalogue(admin)
+
+        def plan(**data):
+            return TitleFilter(
+                data, queryset=TitleViewSet.queryset
+            ).qs.explain()
+
+        assert "USING INDEX api_title_year" in plan(
+            year_min=1990, year_max=2000
+        ), "Проверьте, что диапазон годов использует индекс по году"
+        assert "USING INDEX api_title_category_id" in plan(
+            category="films,books"
+        )
+        assert "INDEX api_titleranking_rating" in plan(
+            rating_min=5
+        ), "Проверьте, что `rating_min` использует индекс рейтинга"
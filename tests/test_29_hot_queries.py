@@ -0,0 +1,115 @@
+from datetime import timedelta
+
+import pytest
+
+from api import hotqueries
+from api.archive import archive_comments
+from api.models import Review, Title
+
+from .common import auth_client
+from .factories import Factory
+
+
+def both_ways(settings, client, url):
+    """Responses with the prepared queries and with the ORM."""
+    settings.HOT_CACHE_TTLS = {}
+    responses = []
+    for hot in (True, False):
+        settings.HOT_QUERIES = hot
+        response = client.get(url)
+        responses.append((response.status_code, response.json()))
+    return responses
+
+
+class Test29HotQueries:
+    @pytest.mark.django_db(transaction=True)
+    def test_01_same_responses(self, client, settings):
+        factory = Factory()
+        authors = factory.users(105)
+        (films,) = factory.categories("films")
+        genres = factory.genres("drama", "comedy")
+        title, empty = factory.titles(2, category=films, genres=genres)
+        reviews = factory.reviews([title], authors, score=7)
+        factory.comments(reviews[:1], authors, per_review=120)
+        factory.save()
+        Review.objects.filter(pk=reviews[1].pk).update(is_hidden=True)
+        archive_comments(older_than=timedelta(seconds=90))
+
+        title_url = f"/api/v1/titles/{title.id}/"
+        comments_url = f"{title_url}reviews/{reviews[0].id}/comments/"
+        urls = [
+            title_url,
+            f"{title_url}?expand=comments",
+            f"/api/v1/titles/{empty.id}/",
+            "/api/v1/titles/0/",
+            f"{title_url}reviews/",
+            f"{title_url}reviews/?page=2",
+            "/api/v1/titles/0/reviews/",
+            comments_url,
+            f"{comments_url}?page=2",
+            f"/api/v1/titles/{empty.id}/reviews/{reviews[0].id}/comments/",
+        ]
+        for url in urls:
+            prepared, orm = both_ways(settings, client, url)
+            assert prepared == orm, (
+                f"Проверьте, что подготовленный запрос {url} отвечает так "
+                "же, как ORM"
+            )
+        assert orm[0] == 404
+        statement = hotqueries.review_page.statement
+        client.get(f"{title_url}reviews/?page=3")
+        assert (
+            hotqueries.review_page.statement is statement
+        ), "Проверьте, что запрос компилируется один раз"
+
+    @pytest.mark.django_db(transaction=True)
+    def test_02_jwt_user(self, settings, admin):
+        factory = Factory()
+        (user,) = factory.users(1)
+        factory.save()
+
+        prepared = hotqueries.jwt_user.first(user_id=user.email)
+        orm = type(user).objects.get(email=user.email)
+        fields = [f.attname for f in type(user)._meta.concrete_fields]
+        assert [getattr(prepared, f) for f in fields] == [
+            getattr(orm, f) for f in fields
+        ]
+        assert hotqueries.jwt_user.first(user_id="nobody@yamdb.fake") is None
+
+        for hot in (True, False):
+            settings.HOT_QUERIES = hot
+            type(user).objects.filter(pk=user.pk).update(is_active=True)
+            client = auth_client(user)
+            response = client.get("/api/v1/users/me/")
+            assert response.json()["username"] == user.username
+            type(user).objects.filter(pk=user.pk).update(is_active=False)
+            assert client.get("/api/v1/users/me/").status_code == 401, (
+                "Проверьте, что неактивный пользователь не проходит "
+                "аутентификацию"
+            )
+
+    @pytest.mark.django_db
+    def test_03_transformed_parameters(self):
+        for build, params in (
+            (
+                lambda name: Title.objects.filter(name__iexact=name),
+                {"name": str},
+            ),
+            (
+                lambda name: Title.objects.filter(name__contains=name),
+                {"name": str},
+            ),
+            (
+                lambda title_id: Title.objects.filter(
+                    pk=title_id, year=title_id
+                ),
+                {"title_id": int},
+            ),
+        ):
+            with pytest.raises(ValueError):
+                hotqueries.PreparedQuery(build, **params).compile()
+        query = hotqueries.PreparedQuery(
+            lambda name: Title.objects.filter(name=name).values("id"),
+            name=str,
+        )
+        assert query.bind(name="нет").count() == 0
@@ -0,0 +1,92 @@
+import gc
+import os
+import subprocess
+import sys
+
+from api import hotqueries
+from api.servebench import benchmark, parse_memory, summarize
+from api.slugs import category_slugs, genre_slugs
+from api.warmup import warm_up
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SMAPS = """\
+55d0c0a00000-7ffd5a7f1000 ---p 00000000 00:00 0      [rollup]
+Rss:               60000 kB
+Pss:               30000 kB
+Shared_Clean:      40000 kB
+Private_Clean:      2000 kB
+Private_Dirty:     10000 kB
+"""
+
+
+class Test30Serving:
+    def test_01_parse_memory(self):
+        assert parse_memory(SMAPS) == {
+            "rss": 60000,
+            "pss": 30000,
+            "uss": 12000,
+        }
+
+    def test_02_warm_up(self, catalogue):
+        for query in vars(hotqueries).values():
+            if isinstance(query, hotqueries.PreparedQuery):
+                query.statement = None
+        try:
+            warm_up()
+        finally:
+            gc.unfreeze()
+        for slug_map in (category_slugs, genre_slugs):
+            assert (
+                slug_map.version == slug_map.current_version()
+            ), "Проверьте, что прогрев загружает карты слагов"
+            assert slug_map.objects
+        assert (
+            hotqueries.title_detail.statement is not None
+        ), "Проверьте, что прогрев компилирует горячие запросы"
+
+    def test_03_benchmark(self, tmp_path):
+        (tmp_path / "bench_settings.py").write_text(
+            "from api_yamdb.settings_api import *\n"
+            "DATABASES = {'default': {\n"
+            "    'ENGINE': 'django.db.backends.sqlite3',\n"
+            f"    'NAME': {str(tmp_path / 'bench.sqlite3')!r},\n"
+            "}}\n"
+        )
+        env = dict(
+            os.environ,
+            DJANGO_SETTINGS_MODULE="bench_settings",
+            PYTHONPATH=os.pathsep.join([str(tmp_path), ROOT]),
+        )
+        migrate = subprocess.run(
+            [sys.executable, "manage.py", "migrate", "-v0"],
+            env=env,
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+        )
+        assert migrate.returncode == 0, migrate.stderr
+        os.environ["PYTHONPATH"] = env["PYTHONPATH"]
+        try:
+            results = {
+                mode: benchmark(
+                    mode, 2, ["/api/v1/titles/"], "bench_settings"
+                )
+                for mode in ("preload", "cold")
+            }
+        finally:
+            os.environ.pop("PYTHONPATH")
+        for mode, workers in results.items():
+            assert len(workers) == 2
+            assert all(
+                worker["requests"][0]["status"] == 200 for worker in workers
+            ), f"Проверьте ответы воркеров в режиме {mode}"
+        preload = summarize(results["preload"])
+        cold = summarize(results["cold"])
+        assert (
+            preload["boot_ms"] < cold["boot_ms"]
+        ), "Проверьте, что воркеры с предзагрузкой не загружают приложение"
+        if preload["uss"] is not None:
+            assert (
+                preload["uss"] < cold["uss"]
+            ), "Проверьте, что предзагруженные страницы общие для воркеров"
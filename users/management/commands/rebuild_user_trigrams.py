@@ -0,0 +1,24 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from users.search import index_users
+
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = "Rebuild the trigram index used by the fuzzy user search"
+
+    def handle(self, *args, **options):
+        users = get_user_model().objects.only("username", "email")
+        batch = []
+        count = 0
+        for user in users.iterator():
+            batch.append(user)
+            if len(batch) == BATCH_SIZE:
+                index_users(batch)
+                count += len(batch)
+                batch = []
+        index_users(batch)
+        count += len(batch)
+        self.stdout.write(f"Indexed {count} users")
@@ -5,9 +5,20 @@ from django.utils.translation import ugettext_lazy as _
 class CustomUserManager(BaseUserManager):
     """
     Custom user model manager where email is the unique identifiers
-    for authentication instead of usernames.
+    for authentication instead of usernames. Soft-deleted users are
+    left out unless `include_deleted` is set.
     """
 
+    def __init__(self, include_deleted=False):
+        super().__init__()
+        self.include_deleted = include_deleted
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.include_deleted:
+            return queryset
+        return queryset.filter(deleted_at=None)
+
     def create_user(self, email, password, **extra_fields):
         """
         Create and save a User with the given email and password.
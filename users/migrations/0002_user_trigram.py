@@ -0,0 +1,56 @@
+# Generated by Django 3.0.5 on 2026-10-19 12:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from users.search import user_trigrams
+
+
+def index_existing_users(apps, schema_editor):
+    CustomUser = apps.get_model("users", "CustomUser")
+    UserTrigram = apps.get_model("users", "UserTrigram")
+    UserTrigram.objects.bulk_create(
+        [
+            UserTrigram(user_id=user.pk, trigram=gram)
+            for user in CustomUser.objects.only("username", "email")
+            for gram in user_trigrams(user)
+        ],
+        batch_size=1000,
+    )
+
+
+def create_pg_trgm_indexes(apps, schema_editor):
+    # optional GIN trigram indexes used by USER_SEARCH_PG_TRGM
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for column in ("username", "email"):
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS users_customuser_{column}_trgm "
+            f"ON users_customuser USING gin ({column} gin_trgm_ops)"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserTrigram',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigram', models.CharField(max_length=3)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trigrams', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='usertrigram',
+            index=models.Index(fields=['trigram', 'user'], name='users_usert_trigram_860b3e_idx'),
+        ),
+        migrations.RunPython(index_existing_users, migrations.RunPython.noop),
+        migrations.RunPython(create_pg_trgm_indexes, migrations.RunPython.noop),
+    ]
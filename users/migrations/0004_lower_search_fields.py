@@ -0,0 +1,36 @@
+# Generated by Django 3.0.5 on 2026-10-19 13:31
+
+from django.db import migrations, models
+
+
+def fill_lower_fields(apps, schema_editor):
+    User = apps.get_model("users", "CustomUser")
+    users = []
+    for user in User._base_manager.only("pk", "username", "email"):
+        user.username_lower = (user.username or "").lower()
+        user.email_lower = (user.email or "").lower()
+        users.append(user)
+    User._base_manager.bulk_update(
+        users, ["username_lower", "email_lower"], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_soft_delete'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='email_lower',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='username_lower',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=150),
+        ),
+        migrations.RunPython(fill_lower_fields, migrations.RunPython.noop),
+    ]
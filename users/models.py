@@ -3,6 +3,7 @@ from django.db import models
 from django.utils.translation import ugettext_lazy as _
 
 from .managers import CustomUserManager
+from .search import LOWER_FIELDS, index_users, normalize, search_terms
 
 
 class CustomUser(AbstractUser):
@@ -26,12 +27,56 @@ class CustomUser(AbstractUser):
         null=True,
     )
 
+    # lowercased username and email for indexed prefix search, kept in
+    # step by save() and users.search.index_users
+    username_lower = models.CharField(
+        max_length=150, db_index=True, editable=False, default=""
+    )
+    email_lower = models.CharField(
+        max_length=254, db_index=True, editable=False, default=""
+    )
+
+    # set by a soft delete, the row is removed by `manage.py purge_deleted`
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = [
         "username",
     ]
 
     objects = CustomUserManager()
+    all_objects = CustomUserManager(include_deleted=True)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super().from_db(db, field_names, values)
+        # terms of the row as stored, save() reindexes when they change
+        if not user.get_deferred_fields() & LOWER_FIELDS.keys():
+            user._indexed_terms = search_terms(user)
+        return user
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        deferred = self.get_deferred_fields()
+        # a deferred field was neither loaded nor assigned: unchanged
+        loaded = [field for field in LOWER_FIELDS if field not in deferred]
+        update_fields = kwargs.get("update_fields")
+        if normalize(self, loaded) and update_fields is not None:
+            kwargs["update_fields"] = {
+                *update_fields,
+                *(
+                    LOWER_FIELDS[field]
+                    for field in LOWER_FIELDS
+                    if field in update_fields
+                ),
+            }
+        super().save(*args, **kwargs)
+        if not loaded:
+            return
+        terms = search_terms(self)
+        if adding or terms != getattr(self, "_indexed_terms", None):
+            index_users([self])
+            self._indexed_terms = terms
 
     def __str__(self):
         return self.email
@@ -49,3 +94,18 @@ class CustomUser(AbstractUser):
 
     class Meta:
         ordering = ["-date_joined"]
+
+
+class UserTrigram(models.Model):
+    """Trigram index of usernames and emails, see users.search."""
+
+    user = models.ForeignKey(
+        CustomUser, on_delete=models.CASCADE, related_name="trigrams"
+    )
+    trigram = models.CharField(max_length=3)
+
+    class Meta:
+        indexes = [models.Index(fields=["trigram", "user"])]
+
+    def __str__(self):
+        return self.trigram
@@ -0,0 +1,185 @@
+import math
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Q
+
+# lowercased copies of searchable fields, compared by prefix searches
+# (Django 3.0 has no functional indexes)
+LOWER_FIELDS = {"username": "username_lower", "email": "email_lower"}
+
+
+def shingles(value):
+    return {"".join(gram) for gram in zip(value, value[1:], value[2:])}
+
+
+def trigrams(value):
+    """Trigrams of a lowercased word padded like pg_trgm does."""
+    return shingles(f"  {value.lower()} ")
+
+
+def search_terms(user):
+    """
+    Words indexed for a user: the username and the local part of the
+    email (domains are shared by too many users to be selective).
+    """
+    terms = []
+    if user.username:
+        terms.append(user.username)
+    if user.email:
+        terms.append(user.email.split("@")[0])
+    return terms
+
+
+def user_trigrams(user):
+    grams = set()
+    for term in search_terms(user):
+        grams |= trigrams(term)
+    return grams
+
+
+def similarity(term, value):
+    a, b = trigrams(term), trigrams(value)
+    return len(a & b) / len(a | b)
+
+
+def normalize(user, fields=LOWER_FIELDS):
+    """Fill the lowercased copies, True if any of them changed."""
+    changed = False
+    for field in fields:
+        lower = LOWER_FIELDS[field]
+        value = (getattr(user, field) or "").lower()
+        if getattr(user, lower) != value:
+            setattr(user, lower, value)
+            changed = True
+    return changed
+
+
+def index_users(users):
+    """
+    Rebuild the trigram rows of the given users and fix their
+    lowercased copies (users inserted with bulk_create have none).
+    """
+    from .models import CustomUser, UserTrigram
+
+    users = list(users)
+    stale = [user for user in users if normalize(user)]
+    if stale:
+        CustomUser.all_objects.bulk_update(stale, list(LOWER_FIELDS.values()))
+    UserTrigram.objects.filter(user__in=users).delete()
+    UserTrigram.objects.bulk_create(
+        [
+            UserTrigram(user=user, trigram=gram)
+            for user in users
+            for gram in user_trigrams(user)
+        ]
+    )
+
+
+def trigram_matches(term):
+    """
+    Ids of users whose username or email matches `term` as a substring
+    or is at least USER_SEARCH_SIMILARITY similar to it. Only the
+    USER_SEARCH_CANDIDATES users sharing the most trigrams with the
+    term (and enough of them to possibly match) are checked, so the
+    cost of a search is bounded however common its trigrams are.
+    """
+    from .models import CustomUser, UserTrigram
+
+    term = term.lower()
+    # interior trigrams catch substrings, padded ones catch whole words
+    grams = trigrams(term) | shingles(term)
+    # a substring contains every interior trigram of the term; a value
+    # similar enough shares at least SIMILARITY of its padded trigrams
+    min_shared = max(
+        1,
+        min(
+            len(shingles(term)),
+            math.ceil(
+                settings.USER_SEARCH_SIMILARITY * len(trigrams(term)) - 1e-9
+            ),
+        ),
+    )
+    candidates = list(
+        UserTrigram.objects.filter(trigram__in=grams)
+        .values("user_id")
+        .annotate(shared=Count("id"))
+        .filter(shared__gte=min_shared)
+        .order_by("-shared", "user_id")
+        .values_list("user_id", flat=True)[: settings.USER_SEARCH_CANDIDATES]
+    )
+
+    matches = []
+    users = CustomUser.objects.filter(pk__in=candidates).values_list(
+        "pk", "username", "email"
+    )
+    for pk, username, email in users:
+        for value in (username or "", email or ""):
+            value = value.lower()
+            if term in value or (
+                similarity(term, value) >= settings.USER_SEARCH_SIMILARITY
+            ):
+                matches.append(pk)
+                break
+    return matches
+
+
+def prefix_filter(field, term):
+    """
+    `field` starts with `term` in any case, as a range on the field's
+    lowercased copy so its B-tree index is used (`__istartswith`
+    compiles to `LIKE UPPER(...)`, which no plain index serves).
+    """
+    lower, prefix = LOWER_FIELDS[field], term.lower()
+    return Q(
+        **{
+            f"{lower}__gte": prefix,
+            f"{lower}__lt": prefix + chr(0x10FFFF),
+            f"{lower}__startswith": prefix,
+        }
+    )
+
+
+def search_users(queryset, term, fields=("username", "email")):
+    """
+    Prefix, substring and typo-tolerant search on indexed columns:
+    prefixes use the indexes of the lowercased copies of `fields`, the
+    rest goes through pg_trgm on PostgreSQL or the UserTrigram table
+    elsewhere.
+    """
+    prefix = Q()
+    for field in fields:
+        prefix |= prefix_filter(field, term)
+
+    if len(term) < 3:
+        return queryset.filter(prefix)
+
+    if connection.vendor == "postgresql" and settings.USER_SEARCH_PG_TRGM:
+        from django.contrib.postgres.lookups import TrigramSimilar
+        from django.contrib.postgres.search import TrigramSimilarity
+        from django.db.models import CharField
+        from django.db.models.functions import Greatest
+
+        # registered by django.contrib.postgres, which is not installed
+        CharField.register_lookup(TrigramSimilar)
+        # `%` (served by the gin_trgm_ops indexes) matches above the
+        # session's threshold; a filter on the similarity value would
+        # compute it for every row
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT set_config('pg_trgm.similarity_threshold', %s, false)",
+                [str(settings.USER_SEARCH_SIMILARITY)],
+            )
+        similar = Q()
+        for field in fields:
+            similar |= Q(**{f"{field}__trigram_similar": term})
+        similarities = [TrigramSimilarity(field, term) for field in fields]
+        if len(similarities) > 1:
+            similarities = [Greatest(*similarities)]
+        return (
+            queryset.filter(prefix | similar)
+            .annotate(similarity=similarities[0])
+            .order_by("-similarity")
+        )
+
+    return queryset.filter(prefix | Q(pk__in=trigram_matches(term)))